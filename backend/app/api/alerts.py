@@ -1,17 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, status, BackgroundTasks
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Literal, Optional
 from app.database import get_db
 from app.api.auth import get_current_admin
-from app.schemas import AlertResponse, AlertCreate
+from app.schemas import AlertResponse, AlertCreate, AlertPlanResponse, AlertRecipientsResponse
 from app.services.alert_service import AlertService
+from app.services.alert_queue import alert_queue
 from app.models import AdminUser, AlertLevel
 
 router = APIRouter()
 
 
 @router.post("/", response_model=AlertResponse, status_code=status.HTTP_201_CREATED)
-async def create_alert(
+def create_alert(
     alert_data: AlertCreate,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
@@ -20,30 +21,46 @@ async def create_alert(
     """
     Create and send a new alert
     
-    Alert will be automatically delivered to affected users
+    Alert will be automatically delivered to affected users: around the
+    incident, or inside `target_area` / the organization's coverage area
+    
+    A plain def, so FastAPI runs it on its threadpool: geocoding, the DB
+    and the queue publish all block.
     """
+    try:
+        target_area = AlertService.resolve_target_area(
+            db, alert_data.target_area, alert_data.organization_id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
     # Generate alert from incident
     alert = AlertService.generate_alert_from_incident(
         db,
         incident_id=alert_data.incident_id,
-        alert_level=alert_data.severity if alert_data.severity else None
+        alert_level=alert_data.severity if alert_data.severity else None,
+        target_area=target_area
     )
     
-    # Deliver alert in background
-    background_tasks.add_task(AlertService.deliver_alert, db, alert.id)
+    # Hand delivery to the alert workers, or deliver in background if the queue is down
+    if not alert_queue.enqueue_alert(alert.id, alert.severity):
+        background_tasks.add_task(AlertService.deliver_alert_in_new_session, alert.id)
     
     return alert
 
 
 @router.post("/incident/{incident_id}/alert", response_model=AlertResponse)
-async def create_alert_for_incident(
+def create_alert_for_incident(
     incident_id: str,
     severity: Optional[str] = None,
     background_tasks: BackgroundTasks = BackgroundTasks(),
     db: Session = Depends(get_db),
     current_admin: AdminUser = Depends(get_current_admin)
 ):
-    """Generate and send alert for a specific incident"""
+    """Generate and send alert for a specific incident (blocking, run on the threadpool)"""
     # Convert string severity to AlertLevel enum
     alert_level = None
     if severity:
@@ -58,12 +75,35 @@ async def create_alert_for_incident(
     
     alert = AlertService.generate_alert_from_incident(db, incident_id, alert_level)
     
-    # Deliver in background
-    background_tasks.add_task(AlertService.deliver_alert, db, alert.id)
+    # Deliver via the alert workers, or in background if the queue is down
+    if not alert_queue.enqueue_alert(alert.id, alert.severity):
+        background_tasks.add_task(AlertService.deliver_alert_in_new_session, alert.id)
     
     return alert
 
 
+@router.get("/incident/{incident_id}/alert/plan", response_model=AlertPlanResponse)
+async def plan_alert_for_incident(
+    incident_id: str,
+    severity: Optional[AlertLevel] = None,
+    db: Session = Depends(get_db),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Dry run of POST /incident/{incident_id}/alert
+    
+    Returns how many users the alert would reach, by platform and language,
+    and the estimated delivery time at current provider rate limits
+    """
+    try:
+        return AlertService.plan_incident_alert(db, incident_id, severity)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Incident not found"
+        )
+
+
 @router.get("/", response_model=List[AlertResponse])
 async def get_alerts(
     limit: int = 50,
@@ -145,10 +185,32 @@ async def mark_alert_read(
     return {"status": "success"}
 
 
-@router.get("/{alert_id}/recipients")
+@router.get("/{alert_id}/recipients", response_model=AlertRecipientsResponse)
 async def get_alert_recipients(
+    alert_id: str,
+    after: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    state: Optional[Literal['delivered', 'read', 'pending', 'digest', 'retrying', 'failed']] = None,
+    db: Session = Depends(get_db),
     current_admin: AdminUser = Depends(get_current_admin)
 ):
-    """Get delivery status for alert recipients (admin only)"""
-    # TODO: Implement recipient status retrieval
-    return {"message": "Alert recipients endpoint - to be implemented"}
+    """
+    Get delivery status for alert recipients (admin only)
+    
+    Returns counts per delivery state and one page of recipients, optionally
+    filtered to one state. Pass `next_cursor` as `after` for the next page.
+    """
+    if not AlertService.get_alert_by_id(db, alert_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Alert not found"
+        )
+    
+    recipients = AlertService.get_alert_recipients_page(db, alert_id, after, limit, state)
+    
+    return {
+        "alert_id": alert_id,
+        "stats": AlertService.get_alert_recipient_stats(db, alert_id),
+        "recipients": recipients,
+        "next_cursor": recipients[-1].user_id if len(recipients) == limit else None
+    }
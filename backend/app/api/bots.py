@@ -4,9 +4,9 @@ from typing import Dict, Any, List
 from datetime import datetime, timedelta
 from app.database import get_db
 from app.config import get_settings
-from app.bots.telegram_api import TelegramAPI
-from app.bots.whatsapp_api import WhatsAppAPI
-from app.bots.session_manager import SessionManager
+from app.bots.telegram_api import telegram
+from app.bots.session_manager import session_manager
+from app.services.rate_limiter import rate_limiter
 from app.models import User, PlatformType
 
 router = APIRouter()
@@ -34,21 +34,13 @@ async def get_bot_status() -> Dict[str, Any]:
     # Check Telegram
     if settings.TELEGRAM_BOT_TOKEN:
         try:
-            telegram = TelegramAPI()
-            # Try to get bot info
-            import requests
-            response = requests.get(
-                f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/getMe",
-                timeout=5
-            )
+            # Try to get bot info (on the bot's pooled connections)
+            response = await telegram.http.request_async("GET", f"{telegram.base_url}/getMe")
             if response.status_code == 200:
                 telegram_status["connected"] = True
                 
                 # Get webhook info
-                webhook_response = requests.get(
-                    f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/getWebhookInfo",
-                    timeout=5
-                )
+                webhook_response = await telegram.http.request_async("GET", f"{telegram.base_url}/getWebhookInfo")
                 if webhook_response.status_code == 200:
                     webhook_data = webhook_response.json()
                     if webhook_data.get("result"):
@@ -62,7 +54,6 @@ async def get_bot_status() -> Dict[str, Any]:
     # Check WhatsApp
     if settings.WHATSAPP_API_KEY:
         try:
-            whatsapp = WhatsAppAPI()
             # WhatsApp status check would go here
             whatsapp_status["connected"] = True
         except Exception as e:
@@ -106,7 +97,6 @@ async def get_bot_metrics(db: Session = Depends(get_db)) -> Dict[str, Any]:
     ).count()
     
     # Get active sessions count from Redis
-    session_manager = SessionManager()
     active_sessions = 0
     telegram_sessions = 0
     whatsapp_sessions = 0
@@ -163,6 +153,7 @@ async def get_bot_metrics(db: Session = Depends(get_db)) -> Dict[str, Any]:
     return {
         "total_users": telegram_users + whatsapp_users,
         "active_sessions": active_sessions,
+        "memory_sessions": session_manager.memory_stats(),
         "total_messages": telegram_messages + whatsapp_messages,
         "users_today": users_today,
         "by_platform": {
@@ -190,7 +181,6 @@ async def get_bot_metrics(db: Session = Depends(get_db)) -> Dict[str, Any]:
 async def get_active_sessions(db: Session = Depends(get_db)) -> Dict[str, Any]:
     """Get list of active user sessions"""
     
-    session_manager = SessionManager()
     sessions = []
     
     if session_manager.use_redis:
@@ -254,6 +244,12 @@ async def get_bot_config() -> Dict[str, Any]:
     }
 
 
+@router.get("/throughput")
+async def get_outbound_throughput() -> Dict[str, Any]:
+    """Get outbound rate limits and current send throughput per platform"""
+    return rate_limiter.stats()
+
+
 @router.post("/test-connection")
 async def test_bot_connection(request: Dict[str, Any]) -> Dict[str, Any]:
     """Test bot API connection"""
@@ -265,11 +261,7 @@ async def test_bot_connection(request: Dict[str, Any]) -> Dict[str, Any]:
             raise HTTPException(status_code=400, detail="Telegram bot token not configured")
         
         try:
-            import requests
-            response = requests.get(
-                f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/getMe",
-                timeout=5
-            )
+            response = await telegram.http.request_async("GET", f"{telegram.base_url}/getMe")
             
             if response.status_code == 200:
                 bot_info = response.json()
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
@@ -6,6 +6,7 @@ from app.database import get_db
 from app.schemas import ReportCreate, ReportResponse, ReportUpdate
 from app.services.report_service import ReportService
 from app.services.user_service import UserService
+from app.services.subscriber_index import subscriber_index
 from app.models import VerificationStatus, SeverityLevel, AdminUser
 from app.api.auth import get_current_admin
 
@@ -13,11 +14,17 @@ router = APIRouter()
 
 
 @router.post("/", response_model=ReportResponse, status_code=status.HTTP_201_CREATED)
-async def create_report(
+def create_report(
     report_data: ReportCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
-    """Submit a new flood report"""
+    """
+    Submit a new flood report
+    
+    A plain def, so FastAPI runs it on its threadpool: verification,
+    geocoding, the incident lock and the queue publish all block.
+    """
     # Check if user exists, if not create them (for Supabase users)
     user = UserService.get_user_by_id(db, report_data.user_id)
     if not user:
@@ -40,6 +47,7 @@ async def create_report(
             db.add(new_user)
             db.commit()
             db.refresh(new_user)
+            subscriber_index.sync_user(new_user)
             user = new_user
             print(f"Auto-created user {report_data.user_id} from Supabase")
         except Exception as e:
@@ -76,9 +84,13 @@ async def create_report(
                 
                 # Generate and send alert to affected users
                 try:
-                    alert = AlertService.generate_alert_from_incident(db, incident.id)
-                    delivery_result = AlertService.deliver_alert(db, alert.id)
-                    print(f"Alert {alert.id} sent to {delivery_result['recipients']} users")
+                    from app.services.alert_queue import alert_queue
+                    
+                    alert = AlertService.trigger_incident_alert(db, incident.id)
+                    # Deliver via the alert workers, or in background if the queue is down
+                    if alert and not alert_queue.enqueue_alert(alert.id, alert.severity):
+                        background_tasks.add_task(AlertService.deliver_alert_in_new_session, alert.id)
+                        print(f"Alert {alert.id} delivering in-process")
                 except Exception as e:
                     print(f"Alert generation error: {e}")
         
@@ -1,6 +1,7 @@
-from typing import Dict, Any, Optional
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
 from sqlalchemy.orm import Session
-from app.bots.session_manager import SessionManager
+from app.bots.session_manager import SessionContext, session_manager
 from app.bots.conversation_flow import ConversationState, ConversationFlow
 from app.bots.localization import i18n
 from app.services.user_service import UserService
@@ -15,7 +16,18 @@ class CommandHandler:
     
     def __init__(self, db: Session):
         self.db = db
-        self.session_manager = SessionManager()
+        self.session_manager = session_manager
+        self.session: Optional[SessionContext] = None
+    
+    @contextmanager
+    def session_for(self, user_id: str, platform: PlatformType) -> Iterator[SessionContext]:
+        """Load the user's session for one message (as `self.session`) and write it back after"""
+        with self.session_manager.context(user_id, platform.value) as session:
+            self.session = session
+            try:
+                yield session
+            finally:
+                self.session = None
     
     def handle_command(
         self,
@@ -25,6 +37,10 @@ class CommandHandler:
         message_data: Dict[str, Any]
     ) -> str:
         """Route command to appropriate handler"""
+        if self.session is None:
+            with self.session_for(user_id, platform):
+                return self.handle_command(command, user_id, platform, message_data)
+        
         try:
             # Get user's language preference
             user = UserService.get_user_by_platform_id(self.db, platform, user_id)
@@ -69,11 +85,8 @@ class CommandHandler:
             )
             user = UserService.create_user(self.db, user_data)
         
-        # Clear any existing session (with error handling)
-        try:
-            self.session_manager.clear_session(user_id, platform.value)
-        except Exception as e:
-            print(f"Warning: Could not clear session: {e}")
+        # Clear any existing session
+        self.session.reset()
         
         return i18n.get("welcome", language)
     
@@ -84,10 +97,7 @@ class CommandHandler:
     def handle_report(self, user_id: str, platform: PlatformType, language: str, message_data: Dict) -> str:
         """Handle /report command - start report flow"""
         # Initialize report session
-        self.session_manager.set_session(user_id, platform.value, {
-            'state': ConversationState.AWAITING_LOCATION.value,
-            'temp_data': {}
-        })
+        self.session.reset(ConversationState.AWAITING_LOCATION.value)
         
         return i18n.get("report.request_location", language)
     
@@ -100,10 +110,7 @@ class CommandHandler:
             return i18n.get("alert.subscription_exists", language)
         
         # Start alert setup flow
-        self.session_manager.set_session(user_id, platform.value, {
-            'state': ConversationState.AWAITING_ALERT_LOCATION.value,
-            'temp_data': {}
-        })
+        self.session.reset(ConversationState.AWAITING_ALERT_LOCATION.value)
         
         return i18n.get("alert.request_location", language)
     
@@ -137,10 +144,7 @@ class CommandHandler:
     
     def handle_language(self, user_id: str, platform: PlatformType, language: str, message_data: Dict) -> str:
         """Handle /language command - change language"""
-        self.session_manager.set_session(user_id, platform.value, {
-            'state': ConversationState.SELECTING_LANGUAGE.value,
-            'temp_data': {}
-        })
+        self.session.reset(ConversationState.SELECTING_LANGUAGE.value)
         
         return i18n.get("select_language", language)
     
@@ -154,8 +158,12 @@ class CommandHandler:
         message_data: Dict
     ) -> str:
         """Handle regular message based on conversation state"""
+        if self.session is None:
+            with self.session_for(user_id, platform):
+                return self.handle_message(user_id, platform, message_text, location, media_urls, message_data)
+        
         # Get current state
-        state = self.session_manager.get_state(user_id, platform.value)
+        state = self.session.get_state()
         
         print(f"DEBUG: Current state for user {user_id}: {state}")
         
@@ -225,11 +233,11 @@ class CommandHandler:
             lat, lon = coords
             
             # Store location in session
-            self.session_manager.store_temp_data(user_id, platform.value, 'location', {'lat': lat, 'lon': lon})
-            self.session_manager.store_temp_data(user_id, platform.value, 'address', address)
+            self.session.store_temp_data('location', {'lat': lat, 'lon': lon})
+            self.session.store_temp_data('address', address)
             
             # Move to next state
-            self.session_manager.set_state(user_id, platform.value, ConversationState.AWAITING_SEVERITY.value)
+            self.session.set_state(ConversationState.AWAITING_SEVERITY.value)
             
             return i18n.get("report.request_severity", language)
         
@@ -242,41 +250,40 @@ class CommandHandler:
             return i18n.get("report.invalid_severity", language)
         
         severity = ConversationFlow.normalize_severity(message_text)
-        self.session_manager.store_temp_data(user_id, platform.value, 'severity', severity)
+        self.session.store_temp_data('severity', severity)
         
         # Move to description
-        self.session_manager.set_state(user_id, platform.value, ConversationState.AWAITING_DESCRIPTION.value)
+        self.session.set_state(ConversationState.AWAITING_DESCRIPTION.value)
         
         return i18n.get("report.request_description", language)
     
     def _handle_description_input(self, user_id: str, platform: PlatformType, language: str, message_text: str) -> str:
         """Handle description input"""
         if message_text.lower() != 'skip':
-            self.session_manager.store_temp_data(user_id, platform.value, 'description', message_text)
+            self.session.store_temp_data('description', message_text)
         
         # Move to photos
-        self.session_manager.set_state(user_id, platform.value, ConversationState.AWAITING_PHOTOS.value)
+        self.session.set_state(ConversationState.AWAITING_PHOTOS.value)
         
         return i18n.get("report.request_photos", language)
     
     def _handle_photos_input(self, user_id: str, platform: PlatformType, language: str, media_urls: list, message_text: Optional[str]) -> str:
         """Handle photo/video uploads"""
         if media_urls:
-            existing_images = self.session_manager.get_temp_data(user_id, platform.value, 'image_urls') or []
-            existing_images.extend(media_urls)
-            self.session_manager.store_temp_data(user_id, platform.value, 'image_urls', existing_images)
+            # Photos of an album arrive as separate, concurrent messages
+            self.session.append_temp_data('image_urls', media_urls)
             
             return "📸 Photo received. Send more or type 'done' to continue."
         
         if message_text and message_text.lower() in ['done', 'skip']:
             # Get all stored data
-            location = self.session_manager.get_temp_data(user_id, platform.value, 'location')
-            address = self.session_manager.get_temp_data(user_id, platform.value, 'address')
-            severity = self.session_manager.get_temp_data(user_id, platform.value, 'severity')
-            description = self.session_manager.get_temp_data(user_id, platform.value, 'description') or "No description provided"
+            location = self.session.get_temp_data('location')
+            address = self.session.get_temp_data('address')
+            severity = self.session.get_temp_data('severity')
+            description = self.session.get_temp_data('description') or "No description provided"
             
             # Move to confirmation
-            self.session_manager.set_state(user_id, platform.value, ConversationState.AWAITING_CONFIRMATION.value)
+            self.session.set_state(ConversationState.AWAITING_CONFIRMATION.value)
             
             return i18n.get("report.confirm_submission", language,
                           location=address,
@@ -291,11 +298,11 @@ class CommandHandler:
             # Create the report
             user = UserService.get_user_by_platform_id(self.db, platform, user_id)
             
-            location = self.session_manager.get_temp_data(user_id, platform.value, 'location')
-            address = self.session_manager.get_temp_data(user_id, platform.value, 'address')
-            severity = self.session_manager.get_temp_data(user_id, platform.value, 'severity')
-            description = self.session_manager.get_temp_data(user_id, platform.value, 'description')
-            image_urls = self.session_manager.get_temp_data(user_id, platform.value, 'image_urls') or []
+            location = self.session.get_temp_data('location')
+            address = self.session.get_temp_data('address')
+            severity = self.session.get_temp_data('severity')
+            description = self.session.get_temp_data('description')
+            image_urls = self.session.get_temp_data('image_urls') or []
             
             from app.schemas import ReportCreate
             report_data = ReportCreate(
@@ -311,12 +318,12 @@ class CommandHandler:
             report = ReportService.create_report(self.db, report_data)
             
             # Clear session
-            self.session_manager.clear_session(user_id, platform.value)
+            self.session.reset()
             
             return i18n.get("report.submitted", language, report_id=report.id[:8])
         
         elif message_text.lower() == 'cancel':
-            self.session_manager.clear_session(user_id, platform.value)
+            self.session.reset()
             return i18n.get("report.cancelled", language)
         
         return "Please send 'confirm' to submit or 'cancel' to discard."
@@ -348,8 +355,8 @@ class CommandHandler:
             lat, lon = coords
             
             # Store location in session
-            self.session_manager.store_temp_data(user_id, platform.value, 'location', {'lat': lat, 'lon': lon})
-            self.session_manager.set_state(user_id, platform.value, ConversationState.AWAITING_ALERT_RADIUS.value)
+            self.session.store_temp_data('location', {'lat': lat, 'lon': lon})
+            self.session.set_state(ConversationState.AWAITING_ALERT_RADIUS.value)
             
             return i18n.get("alert.request_radius", language)
         
@@ -362,7 +369,7 @@ class CommandHandler:
             return i18n.get("alert.invalid_radius", language)
         
         radius = int(message_text)
-        location = self.session_manager.get_temp_data(user_id, platform.value, 'location')
+        location = self.session.get_temp_data('location')
         
         # Update user with alert preferences
         user = UserService.get_user_by_platform_id(self.db, platform, user_id)
@@ -375,7 +382,7 @@ class CommandHandler:
         ))
         
         # Clear session
-        self.session_manager.clear_session(user_id, platform.value)
+        self.session.reset()
         
         address = geocoding.reverse_geocode(location['lat'], location['lon'])
         return i18n.get("alert.subscription_confirmed", language, location=address, radius=radius)
@@ -398,6 +405,6 @@ class CommandHandler:
             UserService.update_user(self.db, user.id, UserUpdate(language_code=new_lang))
         
         # Clear session
-        self.session_manager.clear_session(user_id, platform.value)
+        self.session.reset()
         
         return i18n.get("language_changed", new_lang)
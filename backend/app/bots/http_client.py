@@ -0,0 +1,97 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class PooledHTTPClient:
+    """
+    Long-lived keep-alive HTTP connections to one provider API
+
+    The sync session is shared by all threads. Async clients are bound to an
+    event loop: the application's loop (see `start`) keeps one pooled client
+    until `aclose`, while code on any other loop (e.g. `asyncio.run` in a
+    worker thread) gets a client closed when its `async_client` block ends,
+    so short-lived loops leave no open connections behind. Both are created
+    on first use, so connections (and their TLS handshakes) are reused
+    across messages instead of opened per request.
+    """
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None):
+        self.headers = headers or {}
+        self.pool_size = settings.BOT_HTTP_POOL_SIZE
+        self.timeout = (settings.BOT_HTTP_CONNECT_TIMEOUT_SECONDS, settings.BOT_HTTP_TIMEOUT_SECONDS)
+        self._session: Optional[requests.Session] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pooled: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """Pooled requests session for sync calls"""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update(self.headers)
+                    self._session = session
+        return self._session
+
+    def start(self) -> None:
+        """Keep a pooled async client for the running (application) loop until `aclose`"""
+        self._loop = asyncio.get_running_loop()
+
+    def _new_async_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            headers=self.headers,
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size
+            ),
+            timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0])
+        )
+
+    @asynccontextmanager
+    async def async_client(self, client: Optional[httpx.AsyncClient] = None) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        Async client to use in the block: `client` if given (owned by the
+        caller), the pooled client on the application loop, or else a client
+        closed when the block ends
+        """
+        if client is not None:
+            yield client
+        elif asyncio.get_running_loop() is self._loop:
+            if self._pooled is None or self._pooled.is_closed:
+                self._pooled = self._new_async_client()
+            yield self._pooled
+        else:
+            async with self._new_async_client() as client:
+                yield client
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    async def request_async(self, method: str, url: str, **kwargs) -> httpx.Response:
+        async with self.async_client() as client:
+            return await client.request(method, url, **kwargs)
+
+    async def aclose(self) -> None:
+        """Close the sync session and the application loop's async client"""
+        if self._pooled is not None:
+            await self._pooled.aclose()
+        self._pooled, self._loop = None, None
+
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
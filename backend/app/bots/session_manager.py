@@ -1,79 +1,338 @@
+import asyncio
 import json
+import threading
+import time
 import redis
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Set, Tuple
 from datetime import timedelta
 from app.config import get_settings
+from app.redis_client import get_redis
 
 settings = get_settings()
 
+# Hash fields holding report/alert flow data (the rest are session fields like `state`)
+TEMP_PREFIX = "temp:"
+
+# Append JSON values (ARGV[2]) to the JSON list in field ARGV[1], server-side
+APPEND_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+local list = current and cjson.decode(current) or {}
+for _, value in ipairs(cjson.decode(ARGV[2])) do
+    table.insert(list, value)
+end
+redis.call('HSET', KEYS[1], ARGV[1], cjson.encode(list))
+return #list
+"""
+
+
+class MemorySessionStore:
+    """
+    Process-wide fallback for sessions while Redis is unavailable
+    
+    Entries expire `ttl` seconds after their last write, like the Redis
+    keys, and the least recently used ones are evicted beyond `max_size`, so
+    memory stays bounded however long Redis is down. Counters of expired and
+    evicted sessions are kept for `stats`.
+    """
+    
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.expired = 0
+        self.evicted = 0
+    
+    def _live(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._entries[key]
+            self.expired += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            value = self._live(key, time.monotonic())
+        return default if value is None else value
+    
+    def __setitem__(self, key: str, value: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._purge_expired(now)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+    
+    def pop(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+    
+    def _purge_expired(self, now: float) -> int:
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        self.expired += len(expired)
+        return len(expired)
+    
+    def purge_expired(self) -> int:
+        """Drop every expired session, returning how many were dropped"""
+        with self._lock:
+            return self._purge_expired(time.monotonic())
+    
+    def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value) for key, (expires_at, value) in self._entries.items() if expires_at > now]
+    
+    def keys(self) -> List[str]:
+        return [key for key, _ in self.items()]
+    
+    def __len__(self) -> int:
+        return len(self.items())
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self),
+            "max_sessions": self.max_size,
+            "expired": self.expired,
+            "evicted": self.evicted
+        }
+
 
 class SessionManager:
-    """Manage conversation sessions using Redis (or in-memory fallback)"""
+    """
+    Manage conversation sessions using Redis (or in-memory fallback)
+    
+    A session is a Redis hash: `state` and other session fields, plus flow
+    data as `temp:<name>` fields, each JSON-encoded. Fields are updated
+    individually, so messages of one chat handled at the same time do not
+    overwrite each other's changes. Handlers work on a `context`, which
+    loads the session once per message and writes it back once.
+    
+    One instance is shared by the whole process (`session_manager`) and uses
+    the shared Redis connection pool. Redis health is checked by a background
+    task instead of on every message; while Redis is down (or after a failed
+    command) sessions are kept in memory until the next successful check.
+    """
     
-    def __init__(self):
+    def __init__(self, health_check_interval: Optional[float] = None):
+        self.session_ttl = timedelta(hours=24)  # Sessions expire after 24 hours
+        self.health_check_interval = health_check_interval or settings.BOT_SESSION_HEALTH_CHECK_SECONDS
+        # Fallback store of session fields, shared by every handler of the process
+        self._memory_store = MemorySessionStore(
+            ttl=self.session_ttl.total_seconds(),
+            max_size=settings.BOT_SESSION_MEMORY_MAX
+        )
+        self._lock = threading.Lock()
+        self._append = None
+        self._healthy = True
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def redis_client(self) -> Optional[redis.Redis]:
+        """Shared Redis client, or None while sessions are kept in memory"""
+        return get_redis() if self._healthy else None
+    
+    @property
+    def use_redis(self) -> bool:
+        return self.redis_client is not None
+    
+    def memory_stats(self) -> Dict[str, int]:
+        """Size and expiry/eviction counters of the in-memory fallback"""
+        return self._memory_store.stats()
+    
+    def _redis_failed(self, error: Exception) -> None:
+        """Fall back to memory until the health check sees Redis again"""
+        if self._healthy:
+            print(f"⚠️  Redis session command failed ({error}), using in-memory session storage")
+        self._healthy = False
+    
+    def check_health(self) -> bool:
+        """Ping Redis and switch between Redis and in-memory storage"""
+        client = get_redis()
         try:
-            self.redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
-            # Test connection
-            self.redis_client.ping()
-            self.use_redis = True
-            print("✅ Redis connected successfully")
-        except Exception as e:
-            print(f"⚠️  Redis not available ({e}), using in-memory session storage")
-            self.redis_client = None
-            self.use_redis = False
-            self._memory_store = {}  # Fallback to in-memory dict
+            healthy = client is not None and bool(client.ping())
+        except redis.RedisError:
+            healthy = False
         
-        self.session_ttl = timedelta(hours=24)  # Sessions expire after 24 hours
+        if healthy and not self._healthy:
+            print("✅ Redis available again for sessions")
+        elif not healthy and self._healthy:
+            print("⚠️  Redis not available, using in-memory session storage")
+        
+        self._healthy = healthy
+        return healthy
+    
+    async def run_health_checks(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await loop.run_in_executor(None, self.check_health)
+            self._memory_store.purge_expired()
+            await asyncio.sleep(self.health_check_interval)
+    
+    def start(self) -> None:
+        """Start background health checks on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run_health_checks())
+    
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
     
     def _get_session_key(self, user_id: str, platform: str) -> str:
         """Generate Redis key for session"""
         return f"session:{platform}:{user_id}"
     
-    def get_session(self, user_id: str, platform: str) -> Optional[Dict[str, Any]]:
-        """Get user's conversation session"""
-        key = self._get_session_key(user_id, platform)
+    @staticmethod
+    def _to_fields(session_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Flatten a session dict into hash fields (temp data as `temp:<name>`)"""
+        fields = {name: value for name, value in session_data.items() if name != 'temp_data'}
+        for name, value in (session_data.get('temp_data') or {}).items():
+            fields[TEMP_PREFIX + name] = value
+        return fields
+    
+    @staticmethod
+    def _from_fields(fields: Dict[str, Any]) -> Dict[str, Any]:
+        session = {'temp_data': {}}
+        for name, value in fields.items():
+            if name.startswith(TEMP_PREFIX):
+                session['temp_data'][name[len(TEMP_PREFIX):]] = value
+            else:
+                session[name] = value
+        return session
+    
+    def _load(self, key: str) -> Dict[str, Any]:
+        """All fields of a session (one HGETALL)"""
+        client = self.redis_client
+        if client is not None:
+            try:
+                return {name: json.loads(value) for name, value in client.hgetall(key).items()}
+            except redis.ResponseError:
+                # Sessions written before they were hashes: start them over
+                client.delete(key)
+                return {}
+            except redis.RedisError as e:
+                self._redis_failed(e)
         
-        if self.use_redis:
-            data = self.redis_client.get(key)
-            if data:
-                return json.loads(data)
-        else:
-            return self._memory_store.get(key)
+        with self._lock:
+            return dict(self._memory_store.get(key) or {})
+    
+    def _get_fields(self, key: str, *names: str) -> List[Any]:
+        """Some fields of a session (one HMGET)"""
+        client = self.redis_client
+        if client is not None:
+            try:
+                return [None if value is None else json.loads(value) for value in client.hmget(key, names)]
+            except redis.ResponseError:
+                return [None] * len(names)
+            except redis.RedisError as e:
+                self._redis_failed(e)
+        
+        with self._lock:
+            fields = self._memory_store.get(key) or {}
+            return [fields.get(name) for name in names]
+    
+    def _write(
+        self,
+        key: str,
+        cleared: bool = False,
+        fields: Optional[Dict[str, Any]] = None,
+        deleted: Iterable[str] = (),
+        appends: Optional[Dict[str, List[Any]]] = None
+    ) -> None:
+        """
+        Apply changes to a session atomically (one MULTI/EXEC round trip)
+        
+        Fields are set or deleted one by one and list appends run server-side,
+        so concurrent messages from one chat never overwrite each other's
+        fields. `cleared` first drops the whole session.
+        """
+        fields, deleted, appends = fields or {}, list(deleted), appends or {}
+        
+        client = self.redis_client
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=True)
+                if cleared:
+                    pipe.delete(key)
+                if deleted:
+                    pipe.hdel(key, *deleted)
+                if fields:
+                    pipe.hset(key, mapping={name: json.dumps(value) for name, value in fields.items()})
+                for name, values in appends.items():
+                    self._append_script(keys=[key], args=[name, json.dumps(values)], client=pipe)
+                if fields or appends:
+                    pipe.expire(key, self.session_ttl)
+                pipe.execute()
+                return
+            except redis.RedisError as e:
+                self._redis_failed(e)
         
-        return None
+        with self._lock:
+            session = {} if cleared else self._memory_store.get(key) or {}
+            for name in deleted:
+                session.pop(name, None)
+            session.update(fields)
+            for name, values in appends.items():
+                session[name] = list(session.get(name) or []) + values
+        
+            if session:
+                self._memory_store[key] = session
+            else:
+                self._memory_store.pop(key, None)
+    
+    @property
+    def _append_script(self):
+        if self._append is None:
+            self._append = get_redis().register_script(APPEND_SCRIPT)
+        return self._append
+    
+    @contextmanager
+    def context(self, user_id: str, platform: str) -> Iterator["SessionContext"]:
+        """
+        Session of one message: loaded once on entry, changes written once
+        on a normal exit (nothing is written if the message fails)
+        """
+        key = self._get_session_key(user_id, platform)
+        session = SessionContext(self, key, self._load(key))
+        yield session
+        session.flush()
+    
+    def get_session(self, user_id: str, platform: str) -> Optional[Dict[str, Any]]:
+        """Get user's conversation session"""
+        fields = self._load(self._get_session_key(user_id, platform))
+        return self._from_fields(fields) if fields else None
     
     def set_session(self, user_id: str, platform: str, session_data: Dict[str, Any]) -> None:
         """Save user's conversation session"""
-        key = self._get_session_key(user_id, platform)
-        
-        if self.use_redis:
-            self.redis_client.setex(
-                key,
-                self.session_ttl,
-                json.dumps(session_data)
-            )
-        else:
-            self._memory_store[key] = session_data
+        self._write(self._get_session_key(user_id, platform), cleared=True, fields=self._to_fields(session_data))
     
     def update_session(self, user_id: str, platform: str, updates: Dict[str, Any]) -> None:
         """Update specific fields in session"""
-        session = self.get_session(user_id, platform) or {}
-        session.update(updates)
-        self.set_session(user_id, platform, session)
+        self._write(self._get_session_key(user_id, platform), fields=self._to_fields(updates))
     
     def clear_session(self, user_id: str, platform: str) -> None:
         """Clear user's conversation session"""
-        key = self._get_session_key(user_id, platform)
-        
-        if self.use_redis:
-            self.redis_client.delete(key)
-        else:
-            self._memory_store.pop(key, None)
+        self._write(self._get_session_key(user_id, platform), cleared=True)
     
     def get_state(self, user_id: str, platform: str) -> Optional[str]:
         """Get current conversation state"""
-        session = self.get_session(user_id, platform)
-        return session.get('state') if session else None
+        return self._get_fields(self._get_session_key(user_id, platform), 'state')[0]
     
     def set_state(self, user_id: str, platform: str, state: str) -> None:
         """Set conversation state"""
@@ -81,22 +340,84 @@ class SessionManager:
     
     def store_temp_data(self, user_id: str, platform: str, key: str, value: Any) -> None:
         """Store temporary data during report submission"""
-        session = self.get_session(user_id, platform) or {}
-        if 'temp_data' not in session:
-            session['temp_data'] = {}
-        session['temp_data'][key] = value
-        self.set_session(user_id, platform, session)
+        self._write(self._get_session_key(user_id, platform), fields={TEMP_PREFIX + key: value})
     
     def get_temp_data(self, user_id: str, platform: str, key: str) -> Any:
         """Get temporary data"""
-        session = self.get_session(user_id, platform)
-        if session and 'temp_data' in session:
-            return session['temp_data'].get(key)
-        return None
+        return self._get_fields(self._get_session_key(user_id, platform), TEMP_PREFIX + key)[0]
     
     def clear_temp_data(self, user_id: str, platform: str) -> None:
         """Clear temporary data (after report submission)"""
-        session = self.get_session(user_id, platform)
-        if session:
-            session['temp_data'] = {}
-            self.set_session(user_id, platform, session)
+        with self.context(user_id, platform) as session:
+            session.clear_temp_data()
+
+
+class SessionContext:
+    """
+    One message's view of a conversation session
+    
+    Reads are served from the fields loaded on entry; changes are recorded
+    and written back together by `flush` (see SessionManager._write).
+    """
+    
+    def __init__(self, manager: SessionManager, key: str, fields: Dict[str, Any]):
+        self.manager = manager
+        self.key = key
+        self._fields = fields
+        self._cleared = False
+        self._set: Dict[str, Any] = {}
+        self._deleted: Set[str] = set()
+        self._appends: Dict[str, List[Any]] = {}
+    
+    def _put(self, name: str, value: Any) -> None:
+        self._fields[name] = value
+        self._set[name] = value
+        self._deleted.discard(name)
+        self._appends.pop(name, None)
+    
+    def get_state(self) -> Optional[str]:
+        return self._fields.get('state')
+    
+    def set_state(self, state: str) -> None:
+        self._put('state', state)
+    
+    def get_temp_data(self, key: str) -> Any:
+        return self._fields.get(TEMP_PREFIX + key)
+    
+    def store_temp_data(self, key: str, value: Any) -> None:
+        self._put(TEMP_PREFIX + key, value)
+    
+    def append_temp_data(self, key: str, values: List[Any]) -> None:
+        """Add to a list in temp data, keeping items appended concurrently by other messages"""
+        name = TEMP_PREFIX + key
+        self._fields[name] = list(self._fields.get(name) or []) + list(values)
+        if self._cleared or name in self._set:
+            self._set[name] = self._fields[name]
+        else:
+            self._appends.setdefault(name, []).extend(values)
+    
+    def clear_temp_data(self) -> None:
+        for name in [name for name in self._fields if name.startswith(TEMP_PREFIX)]:
+            del self._fields[name]
+            self._set.pop(name, None)
+            self._appends.pop(name, None)
+            self._deleted.add(name)
+    
+    def reset(self, state: Optional[str] = None) -> None:
+        """Drop the whole session, optionally starting a new flow in `state`"""
+        self._fields.clear()
+        self._cleared = True
+        self._set, self._deleted, self._appends = {}, set(), {}
+        if state is not None:
+            self.set_state(state)
+    
+    def flush(self) -> None:
+        """Write this message's changes in one round trip"""
+        if self._cleared or self._set or self._deleted or self._appends:
+            self.manager._write(self.key, self._cleared, self._set, self._deleted, self._appends)
+        self._cleared = False
+        self._set, self._deleted, self._appends = {}, set(), {}
+
+
+# Global instance
+session_manager = SessionManager()
@@ -1,6 +1,8 @@
-import requests
+import httpx
 from typing import Dict, Any, Optional
 from app.config import get_settings
+from app.bots.http_client import PooledHTTPClient
+from app.models import PlatformType
 from app.integrations.storage import storage
 
 settings = get_settings()
@@ -13,6 +15,32 @@ class TelegramAPI:
         self.bot_token = settings.TELEGRAM_BOT_TOKEN
         self.base_url = f"https://api.telegram.org/bot{self.bot_token}" if self.bot_token else None
         self.enabled = bool(self.bot_token)
+        self.http = PooledHTTPClient()
+    
+    def _post_paced(self, method: str, chat_id: str, payload: Dict[str, Any]) -> bool:
+        """
+        POST to the Bot API paced by the shared rate limiter (blocking); on
+        429 the whole platform backs off for `retry_after` seconds and the
+        request is retried
+        """
+        from app.services.rate_limiter import rate_limiter, parse_retry_after
+        
+        for _ in range(settings.RATE_LIMIT_MAX_RETRIES + 1):
+            rate_limiter.wait(PlatformType.telegram, chat_id)
+            response = self.http.request("POST", f"{self.base_url}/{method}", json=payload)
+            
+            if response.status_code == 429:
+                retry_after = response.json().get('parameters', {}).get('retry_after', 1)
+                rate_limiter.penalize(PlatformType.telegram, parse_retry_after(retry_after))
+                continue
+            
+            if response.status_code == 200:
+                rate_limiter.record_sent(PlatformType.telegram)
+                return True
+            
+            return False
+        
+        return False
     
     def send_message(self, chat_id: str, message: str, parse_mode: str = "Markdown") -> bool:
         """Send text message via Telegram"""
@@ -21,22 +49,66 @@ class TelegramAPI:
             return True
         
         try:
-            response = requests.post(
-                f"{self.base_url}/sendMessage",
-                json={
-                    "chat_id": chat_id,
-                    "text": message,
-                    "parse_mode": parse_mode
-                },
-                timeout=10
-            )
-            
-            return response.status_code == 200
+            return self._post_paced("sendMessage", chat_id, {
+                "chat_id": chat_id,
+                "text": message,
+                "parse_mode": parse_mode
+            })
             
         except Exception as e:
             print(f"Error sending Telegram message: {e}")
             return False
     
+    async def send_message_async(
+        self,
+        chat_id: str,
+        message: str,
+        parse_mode: str = "Markdown",
+        client: Optional[httpx.AsyncClient] = None
+    ) -> bool:
+        """
+        Send text message via Telegram from async code, on `client` (alert
+        fan-out passes its own) or this API's client for the running loop
+        
+        Paced by the shared rate limiter; on 429 the whole platform backs off
+        for `retry_after` seconds and the message is retried.
+        """
+        from app.services.rate_limiter import rate_limiter, parse_retry_after
+        
+        if not self.enabled:
+            print(f"[Telegram Dev Mode] Would send to {chat_id}: {message}")
+            return True
+        
+        async with self.http.async_client(client) as client:
+            try:
+                for _ in range(settings.RATE_LIMIT_MAX_RETRIES + 1):
+                    await rate_limiter.acquire(PlatformType.telegram, chat_id)
+                    response = await client.post(
+                        f"{self.base_url}/sendMessage",
+                        json={
+                            "chat_id": chat_id,
+                            "text": message,
+                            "parse_mode": parse_mode
+                        }
+                    )
+                    
+                    if response.status_code == 429:
+                        retry_after = response.json().get('parameters', {}).get('retry_after', 1)
+                        await rate_limiter.penalize_async(PlatformType.telegram, parse_retry_after(retry_after))
+                        continue
+                    
+                    if response.status_code == 200:
+                        await rate_limiter.record_sent_async(PlatformType.telegram)
+                        return True
+                    
+                    return False
+                
+                return False
+                
+            except Exception as e:
+                print(f"Error sending Telegram message: {e}")
+                return False
+    
     def send_location(self, chat_id: str, lat: float, lon: float) -> bool:
         """Send location via Telegram"""
         if not self.enabled:
@@ -44,17 +116,11 @@ class TelegramAPI:
             return True
         
         try:
-            response = requests.post(
-                f"{self.base_url}/sendLocation",
-                json={
-                    "chat_id": chat_id,
-                    "latitude": lat,
-                    "longitude": lon
-                },
-                timeout=10
-            )
-            
-            return response.status_code == 200
+            return self._post_paced("sendLocation", chat_id, {
+                "chat_id": chat_id,
+                "latitude": lat,
+                "longitude": lon
+            })
             
         except Exception as e:
             print(f"Error sending Telegram location: {e}")
@@ -67,10 +133,10 @@ class TelegramAPI:
         
         try:
             # Get file path
-            response = requests.get(
+            response = self.http.request(
+                "GET",
                 f"{self.base_url}/getFile",
-                params={"file_id": file_id},
-                timeout=10
+                params={"file_id": file_id}
             )
             
             if response.status_code == 200:
@@ -96,10 +162,10 @@ class TelegramAPI:
             return True
         
         try:
-            response = requests.post(
+            response = self.http.request(
+                "POST",
                 f"{self.base_url}/setWebhook",
-                json={"url": webhook_url},
-                timeout=10
+                json={"url": webhook_url}
             )
             
             return response.status_code == 200
@@ -0,0 +1,56 @@
+from typing import Optional
+import redis
+from app.config import get_settings
+from app.redis_client import get_redis
+
+settings = get_settings()
+
+
+class UpdateDeduplicator:
+    """
+    Drops webhook updates that were already handled
+
+    Providers redeliver updates whose webhook was slow or failed. Each update
+    is claimed once in Redis (SET NX with a TTL, keyed by the provider's
+    update/message id, shared by all workers) before it is handled. When
+    Redis is unavailable every update is handled, so none is lost.
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds or settings.BOT_UPDATE_DEDUP_TTL_SECONDS
+
+    def _key(self, platform: str, update_id: str) -> str:
+        return f"botupdate:{platform}:{update_id}"
+
+    def claim(self, platform: str, update_id: Optional[str]) -> bool:
+        """True if this update has not been claimed before and should be handled"""
+        if update_id is None or update_id == "":
+            return True
+
+        client = get_redis()
+        if client is None:
+            return True
+
+        try:
+            return bool(client.set(self._key(platform, update_id), 1, nx=True, ex=self.ttl_seconds))
+        except redis.RedisError as e:
+            print(f"⚠️  Update deduplication unavailable ({e}), handling update")
+            return True
+
+    def release(self, platform: str, update_id: Optional[str]) -> None:
+        """Forget a claim whose handling failed, so a redelivery is handled"""
+        if update_id is None or update_id == "":
+            return
+
+        client = get_redis()
+        if client is None:
+            return
+
+        try:
+            client.delete(self._key(platform, update_id))
+        except redis.RedisError:
+            pass
+
+
+# Global instance
+update_dedup = UpdateDeduplicator()
@@ -0,0 +1,328 @@
+import asyncio
+import time
+import traceback
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import insert
+from typing import Any, Callable, Dict, List, Optional
+from app.config import get_settings
+from app.bots.command_handlers import CommandHandler
+from app.bots.update_dedup import update_dedup
+from app.bots.telegram_api import telegram
+from app.bots.whatsapp_api import whatsapp
+from app.models import PlatformType
+
+settings = get_settings()
+
+# Blocking provider calls (media downloads, replies) made in parallel for a batch
+_provider_calls = ThreadPoolExecutor(max_workers=settings.BOT_HTTP_POOL_SIZE, thread_name_prefix="bot-provider")
+
+
+def telegram_chat_key(update_data: Dict[str, Any]) -> str:
+    """Chat an update belongs to (updates of one chat must be handled in order)"""
+    for field in ('message', 'edited_message', 'channel_post'):
+        chat_id = update_data.get(field, {}).get('chat', {}).get('id')
+        if chat_id is not None:
+            return f"telegram:{chat_id}"
+
+    chat_id = update_data.get('callback_query', {}).get('message', {}).get('chat', {}).get('id')
+    if chat_id is not None:
+        return f"telegram:{chat_id}"
+
+    return f"telegram:update:{update_data.get('update_id')}"
+
+
+def whatsapp_chats(messages: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Raw WhatsApp messages grouped by chat key, each chat's kept in order"""
+    chats: Dict[str, List[Dict[str, Any]]] = {}
+    for message in messages:
+        chats.setdefault(f"whatsapp:{message.get('from')}", []).append(message)
+    return chats
+
+
+class UpdateProcessor:
+    """Handle incoming bot updates: parse, run the conversation, log and reply"""
+
+    @staticmethod
+    def _respond(handler: CommandHandler, platform: PlatformType, message_data: Dict[str, Any]) -> str:
+        """Route a parsed message to its command or the conversation flow"""
+        message_text = message_data.get('text') or ''
+
+        if message_text.startswith('/'):
+            return handler.handle_command(
+                command=message_text.split()[0].split('@')[0],  # Remove bot username if present
+                user_id=message_data['user_id'],
+                platform=platform,
+                message_data=message_data
+            )
+
+        # Handle regular message based on conversation state
+        return handler.handle_message(
+            user_id=message_data['user_id'],
+            platform=platform,
+            message_text=message_text,
+            location=message_data.get('location'),
+            media_urls=message_data.get('media_urls', []),
+            message_data=message_data
+        )
+
+    @staticmethod
+    def _log_row(
+        platform: PlatformType,
+        message_data: Dict[str, Any],
+        session_state: Optional[str],
+        received_at: float
+    ) -> Dict[str, Any]:
+        """BotMessage analytics row for a handled message"""
+        from app.models.models import MessageType
+
+        message_text = message_data.get('text')
+
+        # Determine message type
+        if message_text and message_text.startswith('/'):
+            msg_type = MessageType.command
+        elif message_data.get('location'):
+            msg_type = MessageType.location
+        elif message_data.get('media_urls'):
+            msg_type = MessageType.media
+        else:
+            msg_type = MessageType.text
+
+        return {
+            'platform': platform,
+            'platform_user_id': message_data['user_id'],
+            'message_type': msg_type,
+            'message_text': message_text[:500] if message_text else None,  # Limit to 500 chars
+            'session_state': session_state,
+            'response_time_ms': int((time.time() - received_at) * 1000)
+        }
+
+    @staticmethod
+    def _once(platform: PlatformType, update_id: Any, handle: Callable[[], None]) -> None:
+        """Run `handle` unless the update was already claimed; a failed run can be redelivered"""
+        update_id = None if update_id is None else str(update_id)
+        if not update_dedup.claim(platform.value, update_id):
+            print(f"Skipping duplicate {platform.value} update {update_id}")
+            return
+
+        try:
+            handle()
+        except Exception:
+            update_dedup.release(platform.value, update_id)
+            raise
+
+    @staticmethod
+    def process_telegram_update(update_data: Dict[str, Any], received_at: Optional[float] = None) -> None:
+        """
+        Handle one Telegram update and send the reply, unless it was handled before
+
+        `received_at` is when the webhook got the update, so the logged
+        response time includes any time spent queued.
+        """
+        received_at = received_at or time.time()
+        UpdateProcessor._once(
+            PlatformType.telegram,
+            update_data.get('update_id'),
+            lambda: UpdateProcessor._handle_telegram_update(update_data, received_at)
+        )
+
+    @staticmethod
+    def _handle_telegram_update(update_data: Dict[str, Any], received_at: float) -> None:
+        from app.database import SessionLocal
+        from app.models.models import BotMessage
+
+        # Parse incoming update (downloads any media)
+        message_data = telegram.parse_webhook_update(update_data)
+        if not message_data:
+            return
+
+        user_id = message_data['user_id']
+
+        db = SessionLocal()
+        try:
+            handler = CommandHandler(db)
+
+            # Get current session state (the session is loaded once for the whole message)
+            with handler.session_for(user_id, PlatformType.telegram) as session:
+                session_state = session.get_state()
+                response = UpdateProcessor._respond(handler, PlatformType.telegram, message_data)
+
+            # Log message to database for analytics
+            try:
+                db.add(BotMessage(**UpdateProcessor._log_row(
+                    PlatformType.telegram, message_data, session_state, received_at
+                )))
+                db.commit()
+            except Exception as log_error:
+                print(f"Error logging message: {log_error}")
+                db.rollback()
+        finally:
+            db.close()
+
+        telegram.send_message(user_id, response)
+
+    @staticmethod
+    def process_whatsapp_messages(messages: List[Dict[str, Any]], received_at: Optional[float] = None) -> None:
+        """
+        Handle a batch of raw WhatsApp messages and send the replies
+
+        Messages already handled are dropped. The rest are parsed (and their
+        media downloaded) in parallel, run through the conversation in order
+        on one DB session, logged with a single insert, and answered in
+        parallel across chats, in order within each chat. If the batch fails
+        before its messages are handled, their claims are released so the
+        provider's redelivery is handled.
+        """
+        from app.database import SessionLocal
+        from app.models.models import BotMessage
+
+        received_at = received_at or time.time()
+        platform = PlatformType.whatsapp
+
+        messages = [
+            message for message in messages
+            if update_dedup.claim(platform.value, message.get('id'))
+        ]
+        if not messages:
+            return
+
+        replies: Dict[str, List[str]] = {}
+        settled = set()  # indexes of messages handled, or released after failing
+        try:
+            parsed = list(_provider_calls.map(whatsapp.parse_message, messages))
+
+            log_rows = []
+            db = SessionLocal()
+            try:
+                handler = CommandHandler(db)
+                for index, (message, message_data) in enumerate(zip(messages, parsed)):
+                    if not message_data:
+                        settled.add(index)
+                        continue
+
+                    user_id = message_data['user_id']
+                    try:
+                        with handler.session_for(user_id, platform) as session:
+                            session_state = session.get_state()
+                            response = UpdateProcessor._respond(handler, platform, message_data)
+                    except Exception as e:
+                        print(f"Error handling WhatsApp message {message.get('id')}: {e}")
+                        db.rollback()
+                        update_dedup.release(platform.value, message.get('id'))
+                        settled.add(index)
+                        continue
+
+                    settled.add(index)
+                    replies.setdefault(user_id, []).append(response)
+                    log_rows.append(UpdateProcessor._log_row(platform, message_data, session_state, received_at))
+
+                # Log messages to database for analytics
+                if log_rows:
+                    try:
+                        db.execute(insert(BotMessage), log_rows)
+                        db.commit()
+                    except Exception as log_error:
+                        print(f"Error logging messages: {log_error}")
+                        db.rollback()
+            finally:
+                db.close()
+        except Exception:
+            for index, message in enumerate(messages):
+                if index not in settled:
+                    update_dedup.release(platform.value, message.get('id'))
+            raise
+
+        def send_chat(user_id: str) -> None:
+            for response in replies[user_id]:
+                whatsapp.send_message(user_id, response)
+
+        list(_provider_calls.map(send_chat, replies))
+
+
+class UpdateQueue:
+    """
+    Background processing of webhook updates, in order per chat
+
+    Updates are partitioned by chat over a fixed set of worker tasks; each
+    worker handles its partition one update at a time (on its own thread, as
+    handling is blocking), so the updates of one chat never overlap or
+    reorder while different chats proceed in parallel.
+
+    Queued updates live in this process only: they are drained on shutdown
+    but lost if the process crashes after the webhook was acknowledged.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.workers = workers or settings.BOT_UPDATE_WORKERS
+        self.max_pending = max_pending or settings.BOT_UPDATE_QUEUE_MAX
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def partition(self, chat_key: str) -> int:
+        """Worker that handles every update of a chat"""
+        return zlib.crc32(chat_key.encode()) % self.workers
+
+    def submit(self, chat_key: str, handler: Callable[[Any, float], None], payload: Any) -> bool:
+        """
+        Queue `handler(payload, received_at)` behind the chat's earlier updates
+
+        Returns False if the queue is not running or the chat's partition is
+        full, so the webhook can ask the provider to retry later.
+        """
+        if not self.running:
+            return False
+
+        try:
+            self._queues[self.partition(chat_key)].put_nowait((handler, payload, time.time()))
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def pending(self) -> int:
+        """Number of queued updates not yet handled"""
+        return sum(queue.qsize() for queue in self._queues)
+
+    async def _work(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            handler, payload, received_at = await queue.get()
+            try:
+                await loop.run_in_executor(self._executor, handler, payload, received_at)
+            except Exception as e:
+                print(f"❌ Failed to process bot update: {e}")
+                traceback.print_exc()
+            finally:
+                queue.task_done()
+
+    def start(self) -> None:
+        """Start the workers on the running event loop"""
+        if self.running:
+            return
+
+        loop = asyncio.get_running_loop()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bot-update")
+        self._queues = [asyncio.Queue(maxsize=max(1, self.max_pending // self.workers)) for _ in range(self.workers)]
+        self._tasks = [loop.create_task(self._work(queue)) for queue in self._queues]
+        print(f"✅ Bot update queue processing with {self.workers} workers")
+
+    async def stop(self) -> None:
+        """Handle every queued update, then stop the workers"""
+        if not self.running:
+            return
+
+        await asyncio.gather(*(queue.join() for queue in self._queues))
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        self._executor.shutdown(wait=True)
+        self._queues, self._tasks, self._executor = [], [], None
+
+
+# Global instance
+update_queue = UpdateQueue()
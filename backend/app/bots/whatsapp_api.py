@@ -1,6 +1,8 @@
-import requests
+import httpx
 from typing import Dict, Any, List, Optional
 from app.config import get_settings
+from app.bots.http_client import PooledHTTPClient
+from app.models import PlatformType
 from app.integrations.storage import storage
 
 settings = get_settings()
@@ -14,6 +16,32 @@ class WhatsAppAPI:
         self.api_key = settings.WHATSAPP_API_KEY
         self.phone_number_id = settings.WHATSAPP_PHONE_NUMBER_ID
         self.enabled = bool(self.api_url and self.api_key)
+        self.http = PooledHTTPClient(headers={"D360-API-KEY": self.api_key or ""})
+    
+    def _post_paced(self, to: str, payload: Dict[str, Any]) -> bool:
+        """
+        POST a message paced by the shared rate limiter (blocking); on 429
+        the whole platform backs off for the provider's Retry-After and the
+        request is retried
+        """
+        from app.services.rate_limiter import rate_limiter, parse_retry_after
+        
+        for _ in range(settings.RATE_LIMIT_MAX_RETRIES + 1):
+            rate_limiter.wait(PlatformType.whatsapp, to)
+            response = self.http.request("POST", f"{self.api_url}/messages", json=payload)
+            
+            if response.status_code == 429:
+                retry_after = response.headers.get("Retry-After", "1")
+                rate_limiter.penalize(PlatformType.whatsapp, parse_retry_after(retry_after))
+                continue
+            
+            if response.status_code == 200:
+                rate_limiter.record_sent(PlatformType.whatsapp)
+                return True
+            
+            return False
+        
+        return False
     
     def send_message(self, to: str, message: str) -> bool:
         """Send text message via WhatsApp"""
@@ -22,28 +50,74 @@ class WhatsAppAPI:
             return True
         
         try:
-            response = requests.post(
-                f"{self.api_url}/messages",
-                headers={
-                    "D360-API-KEY": self.api_key,
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "to": to,
-                    "type": "text",
-                    "text": {
-                        "body": message
-                    }
-                },
-                timeout=10
-            )
-            
-            return response.status_code == 200
+            return self._post_paced(to, {
+                "to": to,
+                "type": "text",
+                "text": {
+                    "body": message
+                }
+            })
             
         except Exception as e:
             print(f"Error sending WhatsApp message: {e}")
             return False
     
+    async def send_message_async(
+        self,
+        to: str,
+        message: str,
+        client: Optional[httpx.AsyncClient] = None
+    ) -> Optional[str]:
+        """
+        Send text message via WhatsApp from async code, on `client` (alert
+        fan-out passes its own) or this API's client for the running loop
+        
+        Paced by the shared rate limiter; on 429 the whole platform backs off
+        for the provider's Retry-After and the message is retried.
+        
+        Returns the provider's message id (matched against later status
+        callbacks; empty if none was returned), or None if the send failed.
+        """
+        from app.services.rate_limiter import rate_limiter, parse_retry_after
+        
+        if not self.enabled:
+            print(f"[WhatsApp Dev Mode] Would send to {to}: {message}")
+            return ""
+        
+        async with self.http.async_client(client) as client:
+            try:
+                for _ in range(settings.RATE_LIMIT_MAX_RETRIES + 1):
+                    await rate_limiter.acquire(PlatformType.whatsapp, to)
+                    response = await client.post(
+                        f"{self.api_url}/messages",
+                        headers={"D360-API-KEY": self.api_key},
+                        json={
+                            "to": to,
+                            "type": "text",
+                            "text": {
+                                "body": message
+                            }
+                        }
+                    )
+                    
+                    if response.status_code == 429:
+                        retry_after = response.headers.get("Retry-After", "1")
+                        await rate_limiter.penalize_async(PlatformType.whatsapp, parse_retry_after(retry_after))
+                        continue
+                    
+                    if response.status_code == 200:
+                        await rate_limiter.record_sent_async(PlatformType.whatsapp)
+                        messages = response.json().get('messages') or [{}]
+                        return messages[0].get('id', "")
+                    
+                    return None
+                
+                return None
+                
+            except Exception as e:
+                print(f"Error sending WhatsApp message: {e}")
+                return None
+    
     def send_location(self, to: str, lat: float, lon: float, name: str = "", address: str = "") -> bool:
         """Send location via WhatsApp"""
         if not self.enabled:
@@ -51,26 +125,16 @@ class WhatsAppAPI:
             return True
         
         try:
-            response = requests.post(
-                f"{self.api_url}/messages",
-                headers={
-                    "D360-API-KEY": self.api_key,
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "to": to,
-                    "type": "location",
-                    "location": {
-                        "latitude": lat,
-                        "longitude": lon,
-                        "name": name,
-                        "address": address
-                    }
-                },
-                timeout=10
-            )
-            
-            return response.status_code == 200
+            return self._post_paced(to, {
+                "to": to,
+                "type": "location",
+                "location": {
+                    "latitude": lat,
+                    "longitude": lon,
+                    "name": name,
+                    "address": address
+                }
+            })
             
         except Exception as e:
             print(f"Error sending WhatsApp location: {e}")
@@ -83,11 +147,7 @@ class WhatsAppAPI:
         
         try:
             # Get media URL
-            response = requests.get(
-               f"{self.api_url}/media/{media_id}",
-                headers={"D360-API-KEY": self.api_key},
-                timeout=10
-            )
+            response = self.http.request("GET", f"{self.api_url}/media/{media_id}")
             
             if response.status_code == 200:
                 media_data = response.json()
@@ -103,20 +163,24 @@ class WhatsAppAPI:
         
         return None
     
-    def parse_webhook_message(self, webhook_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Parse incoming webhook message"""
+    @staticmethod
+    def webhook_messages(webhook_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Raw messages of a webhook payload, in order
+        
+        Under load WhatsApp batches several entries, changes and messages
+        into one POST.
+        """
+        return [
+            message
+            for entry in webhook_data.get('entry', [])
+            for change in entry.get('changes', [])
+            for message in change.get('value', {}).get('messages', [])
+        ]
+    
+    def parse_message(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Parse one incoming webhook message (downloads its media)"""
         try:
-            # WhatsApp Business API webhook structure
-            entry = webhook_data.get('entry', [])[0]
-            changes = entry.get('changes', [])[0]
-            value = changes.get('value', {})
-            
-            messages = value.get('messages', [])
-            if not messages:
-                return None
-            
-            message = messages[0]
-            
             # Extract message data
             parsed = {
                 'user_id': message.get('from'),
@@ -0,0 +1,206 @@
+import asyncio
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+import httpx
+from app.config import get_settings
+
+settings = get_settings()
+
+# Africa's Talking per-recipient status codes that mean the message was accepted
+AFRICAS_TALKING_ACCEPTED = {100, 101, 102}  # Processed, Sent, Queued
+
+
+def normalize_phone_number(value: Optional[str]) -> Optional[str]:
+    """
+    Phone number in international format (+2547...), or None if `value`
+    is not one (e.g. the `platform_...` placeholder of Telegram users)
+    """
+    if not value:
+        return None
+
+    digits = re.sub(r"[\s\-()]", "", value)
+    if not re.fullmatch(r"\+?[1-9]\d{7,14}", digits):
+        return None
+
+    return digits if digits.startswith("+") else f"+{digits}"
+
+
+class SMSProvider(ABC):
+    """
+    One SMS provider API
+
+    `send_bulk` sends one message to up to `max_recipients` numbers and maps
+    each number to the provider's message id ("" if none was returned), or
+    to None if it was not accepted.
+    """
+    name = "sms"
+    max_recipients = 1
+
+    @abstractmethod
+    async def send_bulk(
+        self,
+        client: httpx.AsyncClient,
+        phone_numbers: List[str],
+        message: str
+    ) -> Dict[str, Optional[str]]:
+        ...
+
+
+class AfricasTalkingProvider(SMSProvider):
+    """Africa's Talking bulk SMS: many recipients per request"""
+    name = "africastalking"
+
+    def __init__(self):
+        self.username = settings.AFRICAS_TALKING_USERNAME
+        self.api_key = settings.AFRICAS_TALKING_API_KEY
+        self.sender_id = settings.SMS_SENDER_ID
+        self.max_recipients = settings.SMS_BULK_BATCH_SIZE
+        host = "api.sandbox.africastalking.com" if self.username == "sandbox" else "api.africastalking.com"
+        self.api_url = f"https://{host}/version1/messaging"
+
+    async def send_bulk(self, client, phone_numbers, message):
+        data = {
+            "username": self.username,
+            "to": ",".join(phone_numbers),
+            "message": message,
+            "bulkSMSMode": 1
+        }
+        if self.sender_id:
+            data["from"] = self.sender_id
+
+        response = await client.post(
+            self.api_url,
+            data=data,
+            headers={"apiKey": self.api_key, "Accept": "application/json"}
+        )
+
+        if response.status_code not in (200, 201):
+            print(f"Africa's Talking error {response.status_code}: {response.text[:200]}")
+            return {number: None for number in phone_numbers}
+
+        results = {number: None for number in phone_numbers}
+        for recipient in response.json().get("SMSMessageData", {}).get("Recipients", []):
+            if recipient.get("number") in results and recipient.get("statusCode") in AFRICAS_TALKING_ACCEPTED:
+                results[recipient["number"]] = recipient.get("messageId", "")
+        return results
+
+
+class TwilioProvider(SMSProvider):
+    """
+    Twilio Programmable SMS: one recipient per request
+
+    A bulk send makes its requests concurrently, at most
+    ALERT_SMS_CONCURRENCY at a time.
+    """
+    name = "twilio"
+
+    def __init__(self):
+        self.account_sid = settings.TWILIO_ACCOUNT_SID
+        self.auth_token = settings.TWILIO_AUTH_TOKEN
+        self.from_number = settings.TWILIO_PHONE_NUMBER
+        self.concurrency = settings.ALERT_SMS_CONCURRENCY
+        self.api_url = f"https://api.twilio.com/2010-04-01/Accounts/{self.account_sid}/Messages.json"
+
+    async def send_bulk(self, client, phone_numbers, message):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(number: str) -> Optional[str]:
+            async with semaphore:
+                try:
+                    response = await client.post(
+                        self.api_url,
+                        data={"To": number, "From": self.from_number, "Body": message},
+                        auth=(self.account_sid, self.auth_token)
+                    )
+                    if response.status_code != 201:
+                        print(f"Twilio error {response.status_code}: {response.text[:200]}")
+                        return None
+                    return response.json().get("sid", "")
+                except Exception as e:
+                    print(f"Error sending SMS via Twilio: {e}")
+                    return None
+
+        message_ids = await asyncio.gather(*[send(number) for number in phone_numbers])
+        return dict(zip(phone_numbers, message_ids))
+
+
+class StubSMSProvider(SMSProvider):
+    """
+    Local provider that accepts every number without any network call
+
+    For tests and throughput benchmarks: `latency_ms` simulates the provider
+    round trip and every request is recorded in `requests`.
+    """
+    name = "stub"
+
+    def __init__(self, max_recipients: Optional[int] = None, latency_ms: float = 0):
+        self.max_recipients = max_recipients or settings.SMS_BULK_BATCH_SIZE
+        self.latency = latency_ms / 1000
+        self.requests: List[Dict] = []
+
+    async def send_bulk(self, client, phone_numbers, message):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.requests.append({"to": list(phone_numbers), "message": message})
+        return {
+            number: f"stub-{len(self.requests)}-{i}"
+            for i, number in enumerate(phone_numbers)
+        }
+
+
+class SMSAPI:
+    """
+    Outbound SMS through the configured provider
+
+    SMS_PROVIDER picks the provider; if unset, Africa's Talking is used when
+    its credentials are configured, then Twilio. Without any provider SMS
+    runs in dev mode and is only logged.
+    """
+
+    def __init__(self):
+        self.provider = self._configured_provider()
+        self.enabled = self.provider is not None
+
+    @staticmethod
+    def _configured_provider() -> Optional[SMSProvider]:
+        choice = (settings.SMS_PROVIDER or "").lower()
+
+        if choice == "stub":
+            return StubSMSProvider()
+        if choice in ("", "africastalking") and settings.AFRICAS_TALKING_USERNAME and settings.AFRICAS_TALKING_API_KEY:
+            return AfricasTalkingProvider()
+        if choice in ("", "twilio") and settings.TWILIO_ACCOUNT_SID and settings.TWILIO_AUTH_TOKEN:
+            return TwilioProvider()
+        return None
+
+    @property
+    def max_recipients(self) -> int:
+        """Numbers to pass to one send_bulk call"""
+        return self.provider.max_recipients if self.provider else settings.SMS_BULK_BATCH_SIZE
+
+    @property
+    def estimated_rate(self) -> float:
+        """Recipients per second with ALERT_SMS_CONCURRENCY requests in flight (for delivery estimates)"""
+        return self.max_recipients * settings.ALERT_SMS_CONCURRENCY / settings.SMS_BULK_REQUEST_SECONDS
+
+    async def send_bulk(
+        self,
+        client: httpx.AsyncClient,
+        phone_numbers: List[str],
+        message: str
+    ) -> Dict[str, Optional[str]]:
+        """Send one message to many numbers (see SMSProvider.send_bulk)"""
+        if not self.enabled:
+            print(f"[SMS Dev Mode] Would send to {len(phone_numbers)} numbers: {message}")
+            return {number: "" for number in phone_numbers}
+
+        try:
+            return await self.provider.send_bulk(client, phone_numbers, message)
+        except Exception as e:
+            print(f"Error sending SMS via {self.provider.name}: {e}")
+            return {number: None for number in phone_numbers}
+
+
+# Global instance
+sms = SMSAPI()
@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
@@ -154,6 +155,51 @@ async def startup_event():
         print("✅ Database initialized successfully")
     except Exception as e:
         print(f"❌ Database initialization failed: {e}")
+        return
+    
+    # Pick up alert deliveries interrupted by a restart, without blocking startup
+    from app.services.alert_service import AlertService
+    asyncio.get_running_loop().run_in_executor(None, AlertService.resume_incomplete_deliveries)
+    
+    # Apply buffered delivery/read receipts in the background
+    from app.services.status_ingestor import status_ingestor
+    status_ingestor.start()
+    
+    # Check Redis for bot sessions in the background rather than per message
+    from app.bots.session_manager import session_manager
+    session_manager.start()
+    
+    # Keep pooled async bot connections on this loop until shutdown
+    from app.bots.telegram_api import telegram
+    from app.bots.whatsapp_api import whatsapp
+    telegram.http.start()
+    whatsapp.http.start()
+    
+    # Process bot updates in the background when webhooks acknowledge at once
+    if settings.BOT_WEBHOOK_FAST_ACK:
+        from app.bots.update_processor import update_queue
+        update_queue.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Finish queued bot updates, write buffered receipts and close bot and alert connections before exiting"""
+    from app.bots.update_processor import update_queue
+    await update_queue.stop()
+    
+    from app.bots.session_manager import session_manager
+    await session_manager.stop()
+    
+    from app.services.status_ingestor import status_ingestor
+    await status_ingestor.stop()
+    
+    from app.bots.telegram_api import telegram
+    from app.bots.whatsapp_api import whatsapp
+    await telegram.http.aclose()
+    await whatsapp.http.aclose()
+    
+    from app.services.alert_dispatcher import alert_dispatcher
+    await asyncio.get_running_loop().run_in_executor(None, alert_dispatcher.close)
 
 
 @app.get("/")
@@ -4,8 +4,10 @@ from app.models.models import (
     Report,
     Incident,
     IncidentReport,
+    IncidentCoverage,
     Alert,
     AlertRecipient,
+    AlertDeadLetter,
     Organization,
     AdminUser,
     Verification,
@@ -27,8 +29,10 @@ __all__ = [
     "Report",
     "Incident",
     "IncidentReport",
+    "IncidentCoverage",
     "Alert",
     "AlertRecipient",
+    "AlertDeadLetter",
     "Organization",
     "AdminUser",
     "Verification",
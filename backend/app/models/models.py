@@ -157,11 +157,13 @@ class Incident(Base):
     
     id = Column(String(36), primary_key=True, default=generate_uuid)
     location = Column(Geography(geometry_type='POINT', srid=4326), nullable=False)
+    place_name = Column(String(255))  # Reverse-geocoded once, used in alert messages
     affected_radius_km = Column(Float)
     severity = Column(Enum(SeverityLevel), nullable=False)
     status = Column(Enum(IncidentStatus), default=IncidentStatus.active, index=True)
     report_count = Column(Integer, default=0)
     affected_population_estimate = Column(Integer)
+    next_alert_at = Column(DateTime(timezone=True), index=True)  # Pending coalesced follow-up alert
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     resolved_at = Column(DateTime(timezone=True))
     
@@ -187,6 +189,7 @@ class Alert(Base):
     severity = Column(Enum(AlertLevel, values_callable=lambda x: [e.value for e in x]), nullable=False)
     message = Column(Text, nullable=False)
     affected_radius_km = Column(Float)
+    target_area = Column(Geography(geometry_type='MULTIPOLYGON', srid=4326))  # Polygon targeting (basin, ward); overrides the radius
     recipients_count = Column(Integer)
     delivery_status = Column(Enum(AlertDeliveryStatus, values_callable=lambda x: [e.value for e in x]), default=AlertDeliveryStatus.PENDING)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -205,6 +208,10 @@ class AlertRecipient(Base):
     user_id = Column(String(36), ForeignKey("users.id"), primary_key=True)
     delivered = Column(Boolean, default=False)
     delivered_at = Column(DateTime(timezone=True))
+    attempts = Column(Integer, default=0)  # Send attempts made for this recipient
+    next_retry_at = Column(DateTime(timezone=True), index=True)  # Set while a retry is scheduled
+    digest = Column(Boolean, default=False)  # Held back by the frequency cap, to be sent in a digest
+    provider_message_id = Column(String(128), index=True)  # Provider's id for the sent message (WhatsApp status callbacks)
     read = Column(Boolean, default=False)
     read_at = Column(DateTime(timezone=True))
     
@@ -213,6 +220,28 @@ class AlertRecipient(Base):
     user = relationship("User", back_populates="alert_recipients")
 
 
+# --- Incident Coverage Table ---
+class IncidentCoverage(Base):
+    __tablename__ = "incident_coverage"
+    
+    incident_id = Column(String(36), ForeignKey("incidents.id"), primary_key=True)
+    user_id = Column(String(36), ForeignKey("users.id"), primary_key=True)
+    alert_id = Column(String(36), ForeignKey("alerts.id"), nullable=False)  # Latest alert sent to the user
+    # Highest level the user has been alerted at (enum order = escalation order)
+    alert_level = Column(Enum(AlertLevel, values_callable=lambda x: [e.value for e in x]), nullable=False)
+    alerted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# --- Alert Dead Letters Table ---
+class AlertDeadLetter(Base):
+    __tablename__ = "alert_dead_letters"
+    
+    alert_id = Column(String(36), ForeignKey("alerts.id"), primary_key=True)
+    user_id = Column(String(36), ForeignKey("users.id"), primary_key=True)
+    attempts = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
 # --- Organizations Table ---
 class Organization(Base):
     __tablename__ = "organizations"
@@ -0,0 +1,44 @@
+import time
+import redis
+from typing import Optional
+from app.config import get_settings
+
+settings = get_settings()
+
+# How long to wait before trying an unreachable Redis again
+RECONNECT_INTERVAL_SECONDS = 30
+
+_client: Optional[redis.Redis] = None
+_unavailable_until = 0.0
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """
+    Shared Redis client backed by one process-wide connection pool
+
+    Returns None while Redis is unreachable so callers can fall back to
+    in-process state. Commands can still raise redis.RedisError if Redis
+    goes away after the first connection.
+    """
+    global _client, _unavailable_until
+
+    if _client is not None:
+        return _client
+
+    if time.monotonic() < _unavailable_until:
+        return None
+
+    try:
+        client = redis.Redis(connection_pool=redis.ConnectionPool.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=2,
+            socket_timeout=2
+        ))
+        client.ping()
+        _client = client
+    except Exception as e:
+        print(f"⚠️  Redis not available ({e}), using in-process state")
+        _unavailable_until = time.monotonic() + RECONNECT_INTERVAL_SECONDS
+
+    return _client
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 from app.models import (
     PlatformType,
@@ -167,6 +167,10 @@ class AlertBase(BaseModel):
 class AlertCreate(AlertBase):
     incident_id: str
     affected_radius_km: float
+    # Optional polygon targeting: a GeoJSON Polygon/MultiPolygon (lon/lat),
+    # or an organization whose coverage area to alert
+    target_area: Optional[Dict[str, Any]] = None
+    organization_id: Optional[str] = None
 
 
 class AlertResponse(AlertBase):
@@ -182,6 +186,55 @@ class AlertResponse(AlertBase):
         from_attributes = True
 
 
+class AlertPlanResponse(BaseModel):
+    """Dry run of an incident alert: who it would reach and how long delivery would take"""
+    incident_id: str
+    alert_level: AlertLevel
+    affected_radius_km: float
+    recipients_count: int
+    digest_count: int = 0  # Over their frequency cap: held back for a digest
+    by_platform: Dict[str, int]
+    by_language: Dict[str, int]
+    eta_seconds: float
+    eta_by_platform: Dict[str, float]
+
+
+class AlertRecipientStatus(BaseModel):
+    user_id: str
+    platform: PlatformType
+    platform_id: str
+    language_code: Optional[str] = None
+    delivered: bool
+    delivered_at: Optional[datetime] = None
+    read: bool
+    read_at: Optional[datetime] = None
+    attempts: int
+    next_retry_at: Optional[datetime] = None
+    digest: bool
+    
+    class Config:
+        from_attributes = True
+
+
+class AlertRecipientStats(BaseModel):
+    total: int
+    delivered: int
+    read: int
+    pending: int
+    digest: int
+    retrying: int
+    failed: int
+    by_platform: Dict[str, Dict[str, int]]
+
+
+class AlertRecipientsResponse(BaseModel):
+    """Delivery stats for an alert and one page of its recipients"""
+    alert_id: str
+    stats: AlertRecipientStats
+    recipients: List[AlertRecipientStatus]
+    next_cursor: Optional[str] = None  # Pass as `after` to get the next page
+
+
 # --- Authentication Schemas ---
 class Token(BaseModel):
     access_token: str
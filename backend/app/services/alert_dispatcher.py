@@ -0,0 +1,309 @@
+import asyncio
+import threading
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from itertools import cycle, islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+import httpx
+from app.config import get_settings
+from app.models import PlatformType
+from app.bots.telegram_api import telegram
+from app.bots.whatsapp_api import whatsapp
+from app.integrations.sms import sms, normalize_phone_number
+
+settings = get_settings()
+
+
+@dataclass
+class DeliveryResult:
+    """Outcome of sending an alert to a single recipient"""
+    user_id: str
+    platform: PlatformType
+    delivered: bool
+    provider_message_id: Optional[str] = None  # WhatsApp/SMS message id, for status callbacks
+
+
+def _chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yield successive lists of at most `size` items"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class AlertDispatcher:
+    """
+    Concurrent alert fan-out engine
+
+    Sends to recipients in batches over keep-alive HTTP clients, with a
+    separate concurrency limit per platform so a slow provider cannot starve
+    the other one. Each platform's connections are spread over several small
+    clients because httpx scans its whole pool on every request, which stops
+    scaling past a few dozen connections.
+
+    `run` sends on the dispatcher's own event loop, started in a background
+    thread on first use, whose clients are kept until `close`. Connections
+    (and their TLS handshakes) are therefore reused across alerts and batch
+    jobs for the life of the process. `dispatch` awaited on any other loop
+    uses clients closed when it returns.
+
+    SMS users, and users whose bot message failed (when an SMS provider is
+    configured), are sent SMS after the bot sends of each batch. Those are
+    grouped by message text so each provider request covers many numbers.
+    """
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        concurrency: Optional[Dict[PlatformType, int]] = None
+    ):
+        self.batch_size = batch_size or settings.ALERT_DELIVERY_BATCH_SIZE
+        self.concurrency = concurrency or {
+            PlatformType.telegram: settings.ALERT_TELEGRAM_CONCURRENCY,
+            PlatformType.whatsapp: settings.ALERT_WHATSAPP_CONCURRENCY,
+            PlatformType.sms: settings.ALERT_SMS_CONCURRENCY,
+        }
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pooled: Optional[Dict[PlatformType, List[httpx.AsyncClient]]] = None
+        self._lock = threading.Lock()
+
+    async def dispatch(
+        self,
+        recipients: Iterable[Any],
+        render: Callable[[str], str],
+        on_batch: Optional[Callable[[List[DeliveryResult]], None]] = None
+    ) -> Dict[str, int]:
+        """
+        Deliver a message to every recipient
+
+        Recipients only need `id`, `platform`, `platform_id` and `language_code`
+        attributes (plus `phone_number` for SMS), so ORM users and projected
+        rows both work. `render` maps a language code to the message text,
+        unless a recipient carries its own `message`, and `on_batch` is called
+        with the results of each batch once it has been sent.
+        """
+        delivery_stats = {
+            'total': 0,
+            'whatsapp': 0,
+            'telegram': 0,
+            'sms': 0,
+            'failed': 0
+        }
+
+        semaphores = {
+            platform: asyncio.Semaphore(limit)
+            for platform, limit in self.concurrency.items()
+        }
+
+        async with AsyncExitStack() as stack:
+            if asyncio.get_running_loop() is self._loop:
+                if self._pooled is None:
+                    self._pooled = {
+                        platform: [self._create_client() for _ in range(self._client_count(limit))]
+                        for platform, limit in self.concurrency.items()
+                    }
+                clients = {platform: cycle(shards) for platform, shards in self._pooled.items()}
+            else:
+                clients = {
+                    platform: cycle([
+                        await stack.enter_async_context(self._create_client())
+                        for _ in range(self._client_count(limit))
+                    ])
+                    for platform, limit in self.concurrency.items()
+                }
+
+            for batch in _chunked(recipients, self.batch_size):
+                results = await asyncio.gather(*[
+                    self._send(clients, semaphores, recipient, render)
+                    for recipient in batch
+                    if PlatformType(recipient.platform) != PlatformType.sms
+                ])
+
+                sms_recipients = [
+                    recipient for recipient in batch
+                    if PlatformType(recipient.platform) == PlatformType.sms
+                ]
+                if sms.enabled and settings.ALERT_SMS_FALLBACK_ENABLED:
+                    failed = {result.user_id for result in results if not result.delivered}
+                    sms_recipients += [recipient for recipient in batch if recipient.id in failed]
+
+                if sms_recipients:
+                    by_user = {result.user_id: result for result in results}
+                    by_user.update(await self._send_sms(
+                        clients[PlatformType.sms],
+                        semaphores[PlatformType.sms],
+                        sms_recipients,
+                        render
+                    ))
+                    results = [by_user[recipient.id] for recipient in batch]
+
+                for result in results:
+                    delivery_stats['total'] += 1
+                    if result.delivered:
+                        delivery_stats[result.platform.value] += 1
+                    else:
+                        delivery_stats['failed'] += 1
+
+                if on_batch:
+                    on_batch(results)
+
+        return delivery_stats
+
+    def _client_count(self, concurrency: int) -> int:
+        """Number of client shards needed to serve `concurrency` parallel sends"""
+        per_client = settings.ALERT_HTTP_CONNECTIONS_PER_CLIENT
+        return max(1, -(-concurrency // per_client))
+
+    def _create_client(self) -> httpx.AsyncClient:
+        """Keep-alive client for one shard of a platform's connections"""
+        per_client = settings.ALERT_HTTP_CONNECTIONS_PER_CLIENT
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=per_client,
+                max_keepalive_connections=per_client
+            ),
+            timeout=settings.ALERT_HTTP_TIMEOUT_SECONDS
+        )
+
+    async def _send(
+        self,
+        clients: Dict[PlatformType, Iterator[httpx.AsyncClient]],
+        semaphores: Dict[PlatformType, asyncio.Semaphore],
+        recipient: Any,
+        render: Callable[[str], str]
+    ) -> DeliveryResult:
+        """Send to one recipient, bounded by its platform's concurrency limit"""
+        platform = PlatformType(recipient.platform)
+        message = getattr(recipient, 'message', None) or render(recipient.language_code or 'en')
+        delivered = False
+        message_id = None
+
+        if platform == PlatformType.whatsapp:
+            async with semaphores[platform]:
+                message_id = await whatsapp.send_message_async(
+                    recipient.platform_id, message, client=next(clients[platform])
+                )
+            delivered = message_id is not None
+
+        elif platform == PlatformType.telegram:
+            async with semaphores[platform]:
+                delivered = await telegram.send_message_async(
+                    recipient.platform_id, message, client=next(clients[platform])
+                )
+
+        return DeliveryResult(
+            user_id=recipient.id,
+            platform=platform,
+            delivered=delivered,
+            provider_message_id=message_id or None
+        )
+
+    async def _send_sms(
+        self,
+        clients: Iterator[httpx.AsyncClient],
+        semaphore: asyncio.Semaphore,
+        recipients: List[Any],
+        render: Callable[[str], str]
+    ) -> Dict[str, DeliveryResult]:
+        """
+        SMS recipients in bulk, one provider request per message text and
+        chunk of numbers; recipients without a usable phone number fail.
+        Recipients sharing a number are sent one SMS and share its result.
+        """
+        by_message: Dict[str, Dict[str, List[Any]]] = {}
+        results = {
+            recipient.id: DeliveryResult(user_id=recipient.id, platform=PlatformType.sms, delivered=False)
+            for recipient in recipients
+        }
+
+        for recipient in recipients:
+            number = normalize_phone_number(getattr(recipient, 'phone_number', None))
+            if number:
+                message = getattr(recipient, 'message', None) or render(recipient.language_code or 'en')
+                by_message.setdefault(message, {}).setdefault(number, []).append(recipient)
+
+        requests = [
+            (message, numbers)
+            for message, by_number in by_message.items()
+            for numbers in _chunked(by_number, sms.max_recipients)
+        ]
+
+        async def send(message: str, numbers: List[str]) -> Dict[str, Optional[str]]:
+            async with semaphore:
+                return await sms.send_bulk(next(clients), numbers, message)
+
+        outcomes = await asyncio.gather(*[send(message, numbers) for message, numbers in requests])
+
+        for (message, numbers), outcome in zip(requests, outcomes):
+            for number in numbers:
+                message_id = outcome.get(number)
+                for recipient in by_message[message][number]:
+                    results[recipient.id] = DeliveryResult(
+                        user_id=recipient.id,
+                        platform=PlatformType.sms,
+                        delivered=message_id is not None,
+                        provider_message_id=message_id or None
+                    )
+
+        return results
+
+    def run(
+        self,
+        recipients: Iterable[Any],
+        render: Callable[[str], str],
+        on_batch: Optional[Callable[[List[DeliveryResult]], None]] = None
+    ) -> Dict[str, int]:
+        """
+        Run `dispatch` from synchronous code on the dispatcher loop
+
+        Blocks until the fan-out finishes. `recipients` and `on_batch` are
+        used from the loop's thread, one at a time.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self.dispatch(recipients, render, on_batch),
+            self._get_loop()
+        )
+        return future.result()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """The dispatcher's event loop, started in a daemon thread on first use"""
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(
+                        target=loop.run_forever,
+                        name="alert-dispatcher",
+                        daemon=True
+                    )
+                    self._thread.start()
+                    self._loop = loop
+        return self._loop
+
+    async def _close_pooled(self) -> None:
+        if self._pooled is not None:
+            for shards in self._pooled.values():
+                for client in shards:
+                    await client.aclose()
+        self._pooled = None
+
+    def close(self) -> None:
+        """Close the kept clients and stop the dispatcher loop"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+
+        if loop is None:
+            return
+
+        asyncio.run_coroutine_threadsafe(self._close_pooled(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+# Global instance
+alert_dispatcher = AlertDispatcher()
@@ -0,0 +1,82 @@
+import enum
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+from app.config import get_settings
+from app.models import AlertLevel
+
+settings = get_settings()
+
+# Escalation order of alert levels
+ALERT_LEVEL_RANK = {
+    AlertLevel.ADVISORY: 1,
+    AlertLevel.WATCH: 2,
+    AlertLevel.WARNING: 3,
+    AlertLevel.EMERGENCY: 4,
+}
+
+
+class AlertAction(str, enum.Enum):
+    SEND = "send"          # Generate and deliver an alert now
+    DEFER = "defer"        # Fold into one follow-up alert at `due_at`
+    SUPPRESS = "suppress"  # No alert for this change
+
+
+@dataclass
+class AlertDecision:
+    """What to do about a change in an incident"""
+    action: AlertAction
+    reason: str
+    due_at: Optional[datetime] = None
+
+
+class AlertPolicy:
+    """
+    Debounce and escalation rules for incident alerts
+
+    - The first alert for an incident, and any escalation above the highest
+      level already sent, go out immediately
+    - Changes at the current level are coalesced: at most one follow-up alert
+      per coalesce window, sent when the window ends
+    - Changes below the current level do not alert
+    """
+
+    def __init__(self, coalesce_window: Optional[timedelta] = None):
+        self.coalesce_window = coalesce_window or timedelta(
+            minutes=settings.ALERT_COALESCE_WINDOW_MINUTES
+        )
+
+    def decide(
+        self,
+        level: AlertLevel,
+        highest_level: Optional[AlertLevel],
+        last_alert_at: Optional[datetime],
+        now: datetime
+    ) -> AlertDecision:
+        """
+        Decide whether an incident now at `level` should alert
+
+        `highest_level` is the highest level the incident has alerted at and
+        `last_alert_at` when its latest alert was created (both None if it
+        has never alerted).
+        """
+        if highest_level is None or last_alert_at is None:
+            return AlertDecision(AlertAction.SEND, "first alert for incident")
+
+        level, highest_level = AlertLevel(level), AlertLevel(highest_level)
+
+        if ALERT_LEVEL_RANK[level] > ALERT_LEVEL_RANK[highest_level]:
+            return AlertDecision(AlertAction.SEND, f"escalated from {highest_level.value}")
+
+        if ALERT_LEVEL_RANK[level] < ALERT_LEVEL_RANK[highest_level]:
+            return AlertDecision(AlertAction.SUPPRESS, f"below current level {highest_level.value}")
+
+        due_at = last_alert_at + self.coalesce_window
+        if now >= due_at:
+            return AlertDecision(AlertAction.SEND, "coalesce window elapsed")
+
+        return AlertDecision(AlertAction.DEFER, "within coalesce window", due_at=due_at)
+
+
+# Global instance
+alert_policy = AlertPolicy()
@@ -0,0 +1,204 @@
+import json
+import pika
+from typing import Dict, Any, Iterable, List, Optional, Set
+from app.config import get_settings
+from app.models import AlertLevel
+
+settings = get_settings()
+
+ALERT_DELIVERY_QUEUE = "alert_delivery"
+
+# Lanes from highest to lowest priority
+ALERT_LANES = [AlertLevel.EMERGENCY, AlertLevel.WARNING, AlertLevel.WATCH, AlertLevel.ADVISORY]
+
+
+# Jobs that failed every attempt, kept for inspection and manual replay
+ALERT_FAILED_QUEUE = f"{ALERT_DELIVERY_QUEUE}.failed"
+
+
+def lane_queue(level: AlertLevel) -> str:
+    """RabbitMQ queue for one alert level's delivery jobs"""
+    return f"{ALERT_DELIVERY_QUEUE}.{AlertLevel(level).value}"
+
+
+def retry_queue(level: AlertLevel) -> str:
+    """Queue where a lane's failed jobs wait out the retry delay before going back to the lane"""
+    return f"{lane_queue(level)}.retry"
+
+
+class LaneScheduler:
+    """
+    Chooses which priority lane a worker takes its next job from
+
+    Emergency jobs preempt everything: whenever the emergency lane has work
+    it is served next. The other lanes share the worker by smooth weighted
+    round robin, so lower levels are slowed down by busier higher levels but
+    never starved.
+    """
+
+    def __init__(self, weights: Optional[Dict[AlertLevel, int]] = None):
+        self.weights = weights or {
+            AlertLevel.WARNING: settings.ALERT_LANE_WEIGHT_WARNING,
+            AlertLevel.WATCH: settings.ALERT_LANE_WEIGHT_WATCH,
+            AlertLevel.ADVISORY: settings.ALERT_LANE_WEIGHT_ADVISORY,
+        }
+        self._current = {level: 0 for level in self.weights}
+
+    def pick(self, ready: Set[AlertLevel]) -> Optional[AlertLevel]:
+        """Lane to serve next out of those with queued jobs"""
+        if AlertLevel.EMERGENCY in ready:
+            return AlertLevel.EMERGENCY
+
+        ready = [level for level in ALERT_LANES if level in ready and level in self.weights]
+        if not ready:
+            return None
+
+        for level in ready:
+            self._current[level] += self.weights[level]
+        chosen = max(ready, key=lambda level: self._current[level])
+        self._current[chosen] -= sum(self.weights[level] for level in ready)
+        return chosen
+
+
+class AlertQueue:
+    """
+    Durable RabbitMQ queue for alert delivery jobs
+
+    Two kinds of job are published:
+    - {"type": "alert", "alert_id": ..., "level": ...}: expand an alert into recipient batches
+    - {"type": "batch", "alert_id": ..., "level": ..., "user_ids": [...]}: send to one batch
+
+    Jobs go to one queue per alert level (see ALERT_LANES), so an emergency
+    never waits behind the batches of a large advisory.
+
+    A failed job is published to its lane's retry queue, whose messages
+    expire after ALERT_JOB_RETRY_DELAY_SECONDS and are dead-lettered back
+    into the lane. After ALERT_JOB_MAX_ATTEMPTS it is parked in
+    ALERT_FAILED_QUEUE instead of being dropped.
+    """
+
+    def __init__(self):
+        self.url = settings.RABBITMQ_URL
+        self.enabled = settings.ALERT_QUEUE_ENABLED
+        self.retry_delay_ms = int(settings.ALERT_JOB_RETRY_DELAY_SECONDS * 1000)
+        self.max_attempts = settings.ALERT_JOB_MAX_ATTEMPTS
+
+    def connect(self) -> pika.BlockingConnection:
+        """Open a new blocking connection to RabbitMQ"""
+        return pika.BlockingConnection(pika.URLParameters(self.url))
+
+    def declare(self, channel) -> None:
+        """Declare every lane's delivery and retry queue, and the failed queue (idempotent)"""
+        for level in ALERT_LANES:
+            channel.queue_declare(queue=lane_queue(level), durable=True)
+            channel.queue_declare(
+                queue=retry_queue(level),
+                durable=True,
+                arguments={
+                    "x-message-ttl": self.retry_delay_ms,
+                    "x-dead-letter-exchange": "",
+                    "x-dead-letter-routing-key": lane_queue(level)
+                }
+            )
+        channel.queue_declare(queue=ALERT_FAILED_QUEUE, durable=True)
+
+    def ready_lanes(self, channel) -> Set[AlertLevel]:
+        """Lanes that currently have queued jobs"""
+        return {
+            level for level in ALERT_LANES
+            if channel.queue_declare(queue=lane_queue(level), passive=True).method.message_count
+        }
+
+    def publish(self, channel, job: Dict[str, Any]) -> None:
+        """Publish a persistent job on an open channel, to its alert level's lane"""
+        self._publish(channel, lane_queue(job["level"]), json.dumps(job).encode())
+
+    def _publish(self, channel, queue: str, body: bytes, attempts: int = 0) -> None:
+        # mandatory: on a confirm-mode channel a publish that reaches no queue raises
+        channel.basic_publish(
+            exchange="",
+            routing_key=queue,
+            body=body,
+            properties=pika.BasicProperties(
+                content_type="application/json",
+                delivery_mode=pika.DeliveryMode.Persistent,
+                headers={"x-attempts": attempts}
+            ),
+            mandatory=True
+        )
+
+    def attempts(self, properties) -> int:
+        """Times a received job has already failed"""
+        return int((properties.headers or {}).get("x-attempts", 0))
+
+    def retry(self, channel, body: bytes, attempts: int) -> bool:
+        """
+        Schedule a job that failed its `attempts`-th time for another try
+        after the retry delay, or park it in ALERT_FAILED_QUEUE once out of
+        attempts (or unreadable). Returns True if it will be retried.
+        """
+        try:
+            level = AlertLevel(json.loads(body)["level"])
+        except (ValueError, KeyError, TypeError):
+            level = None
+
+        if level is None or attempts >= self.max_attempts:
+            self._publish(channel, ALERT_FAILED_QUEUE, body, attempts)
+            return False
+
+        self._publish(channel, retry_queue(level), body, attempts)
+        return True
+
+    def publish_batches(
+        self,
+        channel,
+        alert_id: str,
+        level: AlertLevel,
+        batches: Iterable[List[str]]
+    ) -> int:
+        """Publish one delivery job per recipient batch, returning the job count"""
+        count = 0
+        for user_ids in batches:
+            self.publish(channel, {
+                "type": "batch",
+                "alert_id": alert_id,
+                "level": AlertLevel(level).value,
+                "user_ids": user_ids
+            })
+            count += 1
+        return count
+
+    def enqueue_alert(self, alert_id: str, level: AlertLevel) -> bool:
+        """
+        Queue an alert for delivery by the worker processes
+
+        Returns False if the queue is disabled or unreachable so the caller
+        can fall back to in-process delivery.
+        """
+        if not self.enabled:
+            return False
+
+        try:
+            connection = self.connect()
+            try:
+                channel = connection.channel()
+                channel.confirm_delivery()
+                self.declare(channel)
+                self.publish(channel, {
+                    "type": "alert",
+                    "alert_id": alert_id,
+                    "level": AlertLevel(level).value
+                })
+            finally:
+                connection.close()
+
+            print(f"📨 Alert {alert_id} queued for delivery ({AlertLevel(level).value} lane)")
+            return True
+
+        except Exception as e:
+            print(f"⚠️  Could not queue alert {alert_id} ({e}), delivering in-process")
+            return False
+
+
+# Global instance
+alert_queue = AlertQueue()
@@ -1,15 +1,66 @@
+from sqlalchemy import String, any_, bindparam, case, column, func, select, tuple_, update, values
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
-from datetime import datetime
+from sqlalchemy.engine import Row
+from typing import Callable, List, Dict, Optional, Iterator, Tuple
+from datetime import datetime, timezone
+from geoalchemy2.shape import from_shape, to_shape
 from app.models import (
-    Alert, AlertRecipient, Incident, User, AlertLevel, 
-    AlertDeliveryStatus, PlatformType
+    Alert, AlertRecipient, AlertDeadLetter, Incident, IncidentCoverage, Organization, User,
+    AlertLevel, AlertDeliveryStatus, IncidentStatus, PlatformType
 )
 from app.schemas import AlertCreate
 from app.services.user_service import UserService
 from app.services.incident_service import IncidentService
 from app.integrations.weather import weather_service
+from app.services.alert_dispatcher import _chunked
+from app.services.alert_policy import alert_policy, AlertAction, ALERT_LEVEL_RANK
+from app.services.frequency_cap import frequency_cap
+from app.services.target_area import parse_target_area
+from app.config import get_settings
 import uuid
+from dataclasses import dataclass
+
+settings = get_settings()
+
+ALERT_TEMPLATES = {
+    'en': {
+        AlertLevel.ADVISORY: "🌊 FLOOD ADVISORY\n\nFlood reported in {location}. {report_count} reports received. Water levels rising. Stay alert and monitor conditions.",
+        AlertLevel.WATCH: "⚠️ FLOOD WATCH\n\nFLOODING IN PROGRESS near {location}. {report_count} confirmed reports. Avoid the area. Prepare for possible evacuation.",
+        AlertLevel.WARNING: "🚨 FLOOD WARNING\n\nSIGNIFICANT FLOODING at {location}. {report_count} reports. DANGEROUS CONDITIONS. Avoid area immediately. Move to higher ground if nearby.",
+        AlertLevel.EMERGENCY: "🆘 FLOOD EMERGENCY\n\nCRITICAL FLOOD SITUATION at {location}. LIFE-THREATENING CONDITIONS. EVACUATE IMMEDIATELY if in area. Seek higher ground NOW. Emergency services notified."
+    },
+    'sw': {  # Swahili
+        AlertLevel.ADVISORY: "🌊 TAHADHARI YA MAFURIKO\n\nMafuriko yameripotiwa {location}. Ripoti {report_count} zimepokelewa. Maji yanaongezeka. Kuwa macho.",
+        AlertLevel.WARNING: "🚨 ONYO LA MAFURIKO\n\nMAFURIKO MAKUBWA {location}. Ripoti {report_count}. HALI HATARI. Epuka eneo mara moja.",
+        AlertLevel.EMERGENCY: "🆘 DHARURA YA MAFURIKO\n\nHALI YA HATARI {location}. HAMISHA MARA MOJA. Nenda mahali pa juu SASA."
+    }
+}
+
+DIGEST_TEMPLATES = {
+    'en': {
+        'header': "📋 FLOOD ALERT SUMMARY\n\n{count} flood alerts near you:",
+        'line': "• {level}: {location}",
+        'footer': "Stay alert and avoid flooded areas."
+    },
+    'sw': {  # Swahili
+        'header': "📋 MUHTASARI WA TAHADHARI ZA MAFURIKO\n\nTahadhari {count} za mafuriko karibu nawe:",
+        'line': "• {level}: {location}",
+        'footer': "Kuwa macho na epuka maeneo yenye mafuriko."
+    }
+}
+
+
+@dataclass
+class DigestRecipient:
+    """Recipient of a digest; carries its own message for the dispatcher"""
+    id: str
+    platform: PlatformType
+    platform_id: str
+    language_code: Optional[str]
+    message: str
+    phone_number: Optional[str] = None
 
 
 class AlertService:
@@ -19,12 +70,18 @@ class AlertService:
     def generate_alert_from_incident(
         db: Session,
         incident_id: str,
-        alert_level: Optional[AlertLevel] = None
+        alert_level: Optional[AlertLevel] = None,
+        target_area=None,
+        geocode: bool = True
     ) -> Alert:
         """
         Generate alert from verified incident
         
-        Automatically determines alert level if not provided
+        Automatically determines alert level if not provided. With a
+        `target_area` (shapely MultiPolygon, lon/lat) the alert goes to
+        subscribers inside that area instead of around the incident.
+        Callers holding a row lock pass `geocode=False` and resolve the
+        place name before locking.
         """
         incident = IncidentService.get_incident_by_id(db, incident_id)
         if not incident:
@@ -32,16 +89,10 @@ class AlertService:
         
         # Determine alert level from incident severity
         if not alert_level:
-            severity_to_alert = {
-                'low': AlertLevel.ADVISORY,
-                'medium': AlertLevel.WATCH,
-                'high': AlertLevel.WARNING,
-                'critical': AlertLevel.EMERGENCY
-            }
-            alert_level = severity_to_alert.get(
-                incident.severity.value, 
-                AlertLevel.WARNING
-            )
+            alert_level = AlertService._alert_level_for_incident(incident)
+        
+        # Resolve the place name once; every later render reads it
+        IncidentService.ensure_place_name(db, incident, lookup=geocode)
         
         # Generate alert message
         message = AlertService._generate_alert_message(
@@ -60,6 +111,7 @@ class AlertService:
             severity=alert_level.value,  # Use .value to get lowercase string
             message=message,
             affected_radius_km=affected_radius,
+            target_area=from_shape(target_area, srid=4326) if target_area is not None else None,
             delivery_status=AlertDeliveryStatus.PENDING,
             recipients_count=0
         )
@@ -70,6 +122,220 @@ class AlertService:
         
         return alert
     
+    @staticmethod
+    def resolve_target_area(
+        db: Session,
+        geojson: Optional[Dict] = None,
+        organization_id: Optional[str] = None
+    ):
+        """
+        Polygon target area for a new alert, from GeoJSON or an
+        organization's coverage area (None for a radius alert)
+        """
+        if geojson:
+            return parse_target_area(geojson)
+        
+        if organization_id:
+            organization = db.query(Organization).filter(Organization.id == organization_id).first()
+            if not organization or organization.coverage_area is None:
+                raise ValueError("Organization has no coverage area")
+            return parse_target_area(to_shape(organization.coverage_area).__geo_interface__)
+        
+        return None
+    
+    @staticmethod
+    def _alert_level_for_incident(incident: Incident) -> AlertLevel:
+        """Map incident severity to an alert level"""
+        severity_to_alert = {
+            'low': AlertLevel.ADVISORY,
+            'medium': AlertLevel.WATCH,
+            'high': AlertLevel.WARNING,
+            'critical': AlertLevel.EMERGENCY
+        }
+        return severity_to_alert.get(
+            incident.severity.value, 
+            AlertLevel.WARNING
+        )
+    
+    @staticmethod
+    def plan_incident_alert(
+        db: Session,
+        incident_id: str,
+        alert_level: Optional[AlertLevel] = None
+    ) -> Dict:
+        """
+        Dry run of generate_alert_from_incident followed by delivery
+        
+        Counts the recipients the alert would reach, by platform and
+        language, with aggregate queries over the same geofence. As in
+        prepare_delivery, users the incident already alerted at this level or
+        higher are left out (the _extend_coverage delta), and as in
+        deliver_batch, users over their frequency cap are counted as digests
+        instead. Delivery time is estimated at the configured provider rate
+        limits and SMS throughput. Nothing is written.
+        """
+        from app.services.rate_limiter import rate_limiter
+        from app.integrations.sms import sms
+        
+        incident = IncidentService.get_incident_by_id(db, incident_id)
+        if not incident:
+            raise ValueError("Incident not found")
+        
+        level = alert_level or AlertService._alert_level_for_incident(incident)
+        radius_km = incident.affected_radius_km or 5.0
+        point = to_shape(incident.location)
+        
+        # Users _extend_coverage would not insert or escalate
+        covered = select(IncidentCoverage.user_id).where(
+            IncidentCoverage.incident_id == incident_id,
+            IncidentCoverage.alert_level >= level
+        )
+        
+        # Emergencies are never held back by the frequency cap; the capped
+        # users are passed as one array parameter and split out in the same GROUP BY
+        capped = frequency_cap.capped_users() if level != AlertLevel.EMERGENCY else set()
+        group_by = []
+        if capped:
+            group_by.append(User.id == any_(bindparam('capped_ids', list(capped), type_=ARRAY(String))))
+        
+        by_platform: Dict[str, int] = {}
+        by_language: Dict[str, int] = {}
+        recipients_count = 0
+        for platform, language, *is_capped, n in UserService.count_alert_recipients(
+            db, lat=point.y, lon=point.x, radius_km=radius_km,
+            filters=[User.id.not_in(covered)], group_by=group_by
+        ):
+            recipients_count += n
+            if is_capped and is_capped[0]:
+                continue
+            platform = PlatformType(platform).value
+            by_platform[platform] = by_platform.get(platform, 0) + n
+            by_language[language] = by_language.get(language, 0) + n
+        digest_count = recipients_count - sum(by_platform.values())
+        
+        # Platforms are sent to in parallel, each paced by its own rate limit
+        rates = {platform: limit.rate for platform, limit in rate_limiter.limits.items()}
+        rates[PlatformType.sms] = sms.estimated_rate
+        eta_by_platform = {
+            platform: round(n / rates[PlatformType(platform)], 1)
+            for platform, n in by_platform.items()
+            if n and PlatformType(platform) in rates
+        }
+        
+        return {
+            'incident_id': incident_id,
+            'alert_level': level,
+            'affected_radius_km': radius_km,
+            'recipients_count': recipients_count - digest_count,
+            'digest_count': digest_count,
+            'by_platform': by_platform,
+            'by_language': by_language,
+            'eta_seconds': max(eta_by_platform.values(), default=0.0),
+            'eta_by_platform': eta_by_platform
+        }
+    
+    @staticmethod
+    def trigger_incident_alert(db: Session, incident_id: str) -> Optional[Alert]:
+        """
+        Apply the alert policy after an incident changed (e.g. a new report)
+        
+        Returns the alert to deliver now, or None if the change was
+        suppressed or deferred to a coalesced follow-up alert.
+        """
+        # Reverse-geocode before locking, so the lock is not held over the network call
+        incident = IncidentService.get_incident_by_id(db, incident_id)
+        if not incident:
+            raise ValueError("Incident not found")
+        place_name = None if incident.place_name else IncidentService.lookup_place_name(incident)
+        
+        # Lock the incident so concurrent reports are decided one at a time
+        incident = db.query(Incident).filter(
+            Incident.id == incident_id
+        ).with_for_update().populate_existing().first()
+        if not incident:
+            raise ValueError("Incident not found")
+        IncidentService.ensure_place_name(db, incident, place_name, lookup=False)
+        
+        return AlertService._apply_alert_policy(db, incident)
+    
+    @staticmethod
+    def _apply_alert_policy(db: Session, incident: Incident) -> Optional[Alert]:
+        """
+        Decide on an alert for a locked incident and act on it, committing
+        (which releases the lock)
+        
+        Returns the alert generated, or None if suppressed or deferred.
+        """
+        level = AlertService._alert_level_for_incident(incident)
+        highest_level, last_alert_at = db.query(
+            func.max(Alert.severity), func.max(Alert.created_at)
+        ).filter(Alert.incident_id == incident.id).one()
+        
+        decision = alert_policy.decide(level, highest_level, last_alert_at, datetime.now(timezone.utc))
+        print(f"🚦 Incident {incident.id} at {level.value}: {decision.action.value} ({decision.reason})")
+        
+        if decision.action == AlertAction.SEND:
+            incident.next_alert_at = None
+            return AlertService.generate_alert_from_incident(db, incident.id, level, geocode=False)
+        
+        if decision.action == AlertAction.DEFER:
+            if not incident.next_alert_at or decision.due_at < incident.next_alert_at:
+                incident.next_alert_at = decision.due_at
+        
+        db.commit()
+        return None
+    
+    @staticmethod
+    def fire_due_alerts(db: Session, limit: int = 100) -> int:
+        """
+        Send the coalesced follow-up alerts whose window has ended
+        
+        Each due incident is locked and the alert policy re-run on its
+        current state before anything is sent: a resolved incident, or one
+        whose level has since dropped, no longer alerts, and one alerted
+        again in the meantime is deferred to its new window.
+        """
+        from app.services.alert_queue import alert_queue
+        
+        due = db.query(Incident.id, Incident.place_name.is_(None)).filter(
+            Incident.next_alert_at <= func.now()
+        ).limit(limit).all()
+        
+        fired = 0
+        for incident_id, needs_place_name in due:
+            # Reverse-geocode before locking, as trigger_incident_alert does
+            place_name = None
+            if needs_place_name:
+                place_name = IncidentService.lookup_place_name(
+                    IncidentService.get_incident_by_id(db, incident_id)
+                )
+            
+            incident = db.query(Incident).filter(
+                Incident.id == incident_id,
+                Incident.next_alert_at <= func.now()
+            ).with_for_update(skip_locked=True).populate_existing().first()
+            if not incident:
+                # Fired by another worker, or being decided for a new report
+                db.commit()
+                continue
+            
+            incident.next_alert_at = None
+            if incident.status == IncidentStatus.resolved:
+                db.commit()
+                continue
+            
+            IncidentService.ensure_place_name(db, incident, place_name, lookup=False)
+            alert = AlertService._apply_alert_policy(db, incident)
+            if not alert:
+                continue
+            
+            fired += 1
+            print(f"⏰ Coalesced follow-up alert {alert.id} for incident {incident_id}")
+            if not alert_queue.enqueue_alert(alert.id, alert.severity):
+                AlertService.deliver_alert(db, alert.id)
+        
+        return fired
+    
     @staticmethod
     def _generate_alert_message(
         incident: Incident,
@@ -77,27 +343,11 @@ class AlertService:
         language: str = 'en'
     ) -> str:
         """Generate localized alert message"""
-        # Get incident location info (would extract from PostGIS)
-        # For now using placeholder
-        location = "affected area"
-        
-        templates = {
-            'en': {
-                AlertLevel.ADVISORY: "🌊 FLOOD ADVISORY\n\nFlood reported in {location}. {report_count} reports received. Water levels rising. Stay alert and monitor conditions.",
-                AlertLevel.WATCH: "⚠️ FLOOD WATCH\n\nFLOODING IN PROGRESS near {location}. {report_count} confirmed reports. Avoid the area. Prepare for possible evacuation.",
-                AlertLevel.WARNING: "🚨 FLOOD WARNING\n\nSIGNIFICANT FLOODING at {location}. {report_count} reports. DANGEROUS CONDITIONS. Avoid area immediately. Move to higher ground if nearby.",
-                AlertLevel.EMERGENCY: "🆘 FLOOD EMERGENCY\n\nCRITICAL FLOOD SITUATION at {location}. LIFE-THREATENING CONDITIONS. EVACUATE IMMEDIATELY if in area. Seek higher ground NOW. Emergency services notified."
-            },
-            'sw': {  # Swahili
-                AlertLevel.ADVISORY: "🌊 TAHADHARI YA MAFURIKO\n\nMafuriko yameripotiwa {location}. Ripoti {report_count} zimepokelewa. Maji yanaongezeka. Kuwa macho.",
-                AlertLevel.WARNING: "🚨 ONYO LA MAFURIKO\n\nMAFURIKO MAKUBWA {location}. Ripoti {report_count}. HALI HATARI. Epuka eneo mara moja.",
-                AlertLevel.EMERGENCY: "🆘 DHARURA YA MAFURIKO\n\nHALI YA HATARI {location}. HAMISHA MARA MOJA. Nenda mahali pa juu SASA."
-            }
-        }
+        location = incident.place_name or "affected area"
         
-        template = templates.get(language, templates['en']).get(
+        template = ALERT_TEMPLATES.get(language, ALERT_TEMPLATES['en']).get(
             alert_level,
-            templates['en'][AlertLevel.WARNING]
+            ALERT_TEMPLATES['en'][AlertLevel.WARNING]
         )
         
         return template.format(
@@ -106,23 +356,60 @@ class AlertService:
         )
     
     @staticmethod
-    def get_affected_users(
-        db: Session,
-        alert: Alert
-    ) -> List[User]:
+    def _message_renderer(alert: Alert) -> Callable[[str], str]:
         """
-        Get users who should receive this alert
-        Uses geofencing based on alert radius
+        Render the alert once per supported language before fan-out
+        
+        Returns a lookup for the dispatcher; unsupported languages get the
+        English message, as _generate_alert_message does.
         """
-        # Extract lat/lon from incident's PostGIS location
+        messages = {
+            language: AlertService._generate_alert_message(alert.incident, alert.severity, language)
+            for language in ALERT_TEMPLATES
+        }
+        
+        def render(language: str) -> str:
+            return messages.get(language, messages['en'])
+        
+        return render
+    
+    @staticmethod
+    def _get_alert_location(alert: Alert) -> Optional[Tuple[float, float]]:
+        """Extract (lat, lon) from the alert incident's PostGIS location"""
         try:
             from geoalchemy2.shape import to_shape
             point = to_shape(alert.incident.location)
             lat, lon = point.y, point.x
             print(f"📍 Alert location extracted: lat={lat}, lon={lon}, radius={alert.affected_radius_km}km")
+            return lat, lon
         except Exception as e:
             print(f"❌ Error extracting incident location: {e}")
+            return None
+    
+    @staticmethod
+    def get_affected_users(
+        db: Session,
+        alert: Alert
+    ) -> List[User]:
+        """
+        Get users who should receive this alert
+        Uses geofencing based on the alert radius and each user's own radius,
+        or the alert's target area if it has one
+        """
+        if alert.target_area is not None:
+            user_ids = [row.id for row in AlertService.stream_affected_recipients(db, alert)]
+            users = [
+                user
+                for start in range(0, len(user_ids), 1000)
+                for user in db.query(User).filter(User.id.in_(user_ids[start:start + 1000]))
+            ]
+            print(f"✅ Found {len(users)} users inside the alert's target area")
+            return users
+        
+        location = AlertService._get_alert_location(alert)
+        if not location:
             return []
+        lat, lon = location
         
         # Find users within affected radius
         users = UserService.get_users_within_radius(
@@ -130,144 +417,590 @@ class AlertService:
             lat=lat,
             lon=lon,
             radius_km=alert.affected_radius_km,
-            alert_subscribed_only=True
+            alert_subscribed_only=True,
+            honor_user_radius=True
         )
         
         print(f"✅ Found {len(users)} users within {alert.affected_radius_km}km of alert location")
         return users
     
+    @staticmethod
+    def stream_affected_recipients(
+        db: Session,
+        alert: Alert
+    ) -> Iterator[Row]:
+        """
+        Stream the users who should receive this alert
+        
+        Same geofence as get_affected_users, but yields lightweight rows
+        (id, platform, platform_id, language_code) instead of loading users.
+        """
+        if alert.target_area is not None:
+            return UserService.stream_area_recipients(
+                db,
+                area=to_shape(alert.target_area),
+                batch_size=settings.ALERT_DELIVERY_BATCH_SIZE
+            )
+        
+        location = AlertService._get_alert_location(alert)
+        if not location:
+            return iter(())
+        lat, lon = location
+        
+        return UserService.stream_alert_recipients(
+            db,
+            lat=lat,
+            lon=lon,
+            radius_km=alert.affected_radius_km,
+            batch_size=settings.ALERT_DELIVERY_BATCH_SIZE
+        )
+    
     @staticmethod
     def deliver_alert(db: Session, alert_id: str) -> Dict:
         """
         Deliver alert to all affected users
         Multi-channel delivery: WhatsApp → Telegram → SMS
+        
+        Recipient records are written up front and progress is committed
+        after every batch, so calling this again for an alert whose
+        delivery was interrupted resumes with the recipients not yet sent to.
+        """
+        AlertService.prepare_delivery(db, alert_id)
+        
+        delivery_stats = {'total': 0, 'whatsapp': 0, 'telegram': 0, 'sms': 0, 'failed': 0}
+        
+        # SMS fallback for failed bot sends happens per batch in the dispatcher
+        for user_ids in AlertService.iter_pending_batches(
+            db, alert_id, batch_size=settings.ALERT_DELIVERY_BATCH_SIZE
+        ):
+            batch_stats = AlertService.deliver_batch(db, alert_id, user_ids)
+            for key in delivery_stats:
+                delivery_stats[key] += batch_stats[key]
+        
+        alert = db.query(Alert).filter(Alert.id == alert_id).first()
+        
+        return {
+            'alert_id': alert_id,
+            'status': alert.delivery_status.value,
+            'delivery_stats': delivery_stats,
+            'recipients': alert.recipients_count
+        }
+    
+    @staticmethod
+    def deliver_alert_in_new_session(alert_id: str) -> Dict:
+        """Deliver alert on a session owned by this call (for background tasks)"""
+        from app.database import SessionLocal
+        
+        db = SessionLocal()
+        try:
+            return AlertService.deliver_alert(db, alert_id)
+        finally:
+            db.close()
+    
+    @staticmethod
+    def prepare_delivery(db: Session, alert_id: str) -> None:
+        """
+        Create recipient records for a queued alert
+        
+        Recipients are streamed and bulk-inserted one batch at a time. For an
+        incident alert, only users the incident has not yet alerted at this
+        level or higher are recorded. Safe to call again for the same alert:
+        existing records are kept.
         """
         alert = db.query(Alert).filter(Alert.id == alert_id).first()
         if not alert:
             raise ValueError("Alert not found")
         
-        # Get affected users
-        users = AlertService.get_affected_users(db, alert)
+        alert.delivery_status = AlertDeliveryStatus.SENDING
+        db.commit()
         
-        # Update recipients count
-        alert.recipients_count = len(users)
+        # Alerts created by hand skip generate_alert_from_incident
+        if alert.incident:
+            IncidentService.ensure_place_name(db, alert.incident)
         
-        # Create recipient records
-        delivery_stats = {
-            'total': len(users),
-            'whatsapp': 0,
-            'telegram': 0,
-            'sms': 0,
-            'failed': 0
-        }
+        recipients = AlertService.stream_affected_recipients(db, alert)
         
-        for user in users:
-            # Create recipient record
-            recipient = AlertRecipient(
-                alert_id=alert_id,
-                user_id=user.id,
-                delivered=False
-            )
-            db.add(recipient)
+        # One multi-row INSERT per batch, committed as a checkpoint
+        for batch in _chunked(recipients, settings.ALERT_DELIVERY_BATCH_SIZE):
+            user_ids = [recipient.id for recipient in batch]
+            if alert.incident_id:
+                user_ids = AlertService._extend_coverage(db, alert, user_ids)
             
-            # Get user's preferred language
-            language = user.language_code or 'en'
+            if user_ids:
+                db.execute(
+                    insert(AlertRecipient).on_conflict_do_nothing(
+                        index_elements=[AlertRecipient.alert_id, AlertRecipient.user_id]
+                    ),
+                    [
+                        {'alert_id': alert_id, 'user_id': user_id, 'delivered': False, 'attempts': 0}
+                        for user_id in user_ids
+                    ]
+                )
+            db.commit()
+        
+        alert.recipients_count = db.query(func.count(AlertRecipient.user_id)).filter(
+            AlertRecipient.alert_id == alert_id
+        ).scalar()
+        db.commit()
+        
+        AlertService._finalize_delivery(db, alert)
+    
+    @staticmethod
+    def _extend_coverage(db: Session, alert: Alert, user_ids: List[str]) -> List[str]:
+        """
+        Record that the alert's incident now covers these users at its level
+        
+        Returns only the users that were newly covered or escalated; users
+        already alerted at this level or higher are left untouched.
+        """
+        stmt = insert(IncidentCoverage).values([
+            {
+                'incident_id': alert.incident_id,
+                'user_id': user_id,
+                'alert_id': alert.id,
+                'alert_level': alert.severity
+            }
+            # A row may only be upserted once per statement
+            for user_id in dict.fromkeys(user_ids)
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IncidentCoverage.incident_id, IncidentCoverage.user_id],
+            set_={
+                'alert_id': stmt.excluded.alert_id,
+                'alert_level': stmt.excluded.alert_level,
+                'alerted_at': func.now()
+            },
+            where=IncidentCoverage.alert_level < stmt.excluded.alert_level
+        ).returning(IncidentCoverage.user_id)
+        
+        return [user_id for (user_id,) in db.execute(stmt)]
+    
+    @staticmethod
+    def iter_pending_batches(db: Session, alert_id: str, batch_size: int) -> Iterator[List[str]]:
+        """
+        Yield ids of recipients not yet sent to, in batches
+        
+        Pages by user_id rather than holding a cursor open, so the caller
+        may commit on `db` between batches.
+        """
+        last_user_id = ''
+        while True:
+            user_ids = [
+                user_id for (user_id,) in db.query(AlertRecipient.user_id).filter(
+                    AlertRecipient.alert_id == alert_id,
+                    AlertRecipient.attempts == 0,
+                    AlertRecipient.user_id > last_user_id
+                ).order_by(AlertRecipient.user_id).limit(batch_size)
+            ]
+            if not user_ids:
+                return
             
-            # Regenerate message in user's language
-            message = AlertService._generate_alert_message(
-                alert.incident,
-                alert.severity,
-                language
+            yield user_ids
+            last_user_id = user_ids[-1]
+    
+    @staticmethod
+    def deliver_batch(db: Session, alert_id: str, user_ids: List[str]) -> Dict:
+        """
+        Deliver a queued alert to one batch of recipients
+        
+        Only recipients that have never been attempted are claimed (with
+        SKIP LOCKED), so a redelivered or duplicated batch does not re-send.
+        """
+        from app.services.alert_dispatcher import alert_dispatcher
+        
+        alert = db.query(Alert).filter(Alert.id == alert_id).first()
+        if not alert:
+            raise ValueError("Alert not found")
+        
+        recipients = db.query(
+            User.id, User.platform, User.platform_id, User.language_code, User.phone_number
+        ).join(
+            AlertRecipient, AlertRecipient.user_id == User.id
+        ).filter(
+            AlertRecipient.alert_id == alert_id,
+            AlertRecipient.user_id.in_(user_ids),
+            AlertRecipient.attempts == 0
+        ).with_for_update(of=AlertRecipient, skip_locked=True).all()
+        
+        recipients = AlertService._hold_back_capped(db, alert, recipients)
+        
+        render = AlertService._message_renderer(alert)
+        
+        def record_batch(results) -> None:
+            AlertService._record_results(db, alert_id, results)
+        
+        delivery_stats = alert_dispatcher.run(recipients, render, on_batch=record_batch)
+        db.commit()
+        
+        AlertService._finalize_delivery(db, alert)
+        
+        return delivery_stats
+    
+    @staticmethod
+    def _record_results(db: Session, alert_id: str, results) -> None:
+        """Checkpoint one sent batch of an alert"""
+        AlertService._record_sends(
+            db,
+            attempted=[(alert_id, r.user_id) for r in results],
+            delivered=[(alert_id, r.user_id) for r in results if r.delivered],
+            message_ids=[
+                (alert_id, r.user_id, r.provider_message_id)
+                for r in results if r.provider_message_id
+            ]
+        )
+    
+    @staticmethod
+    def _record_sends(
+        db: Session,
+        attempted: List[Tuple[str, str]],
+        delivered: List[Tuple[str, str]],
+        message_ids: Optional[List[Tuple[str, str, str]]] = None
+    ) -> None:
+        """
+        Record sends to (alert_id, user_id) recipients with one set-based UPDATE
+        
+        Failed recipients are scheduled for a retry with exponential backoff
+        and jitter; those out of attempts are copied to the dead-letter table.
+        `message_ids` holds (alert_id, user_id, provider_message_id) for sends
+        whose delivery/read status callbacks should be matched back.
+        """
+        if not attempted:
+            return
+        
+        key = tuple_(AlertRecipient.alert_id, AlertRecipient.user_id)
+        is_delivered = key.in_(delivered)
+        failed = list(set(attempted) - set(delivered))
+        max_attempts = settings.ALERT_RETRY_MAX_ATTEMPTS
+        
+        # attempts still holds the value from before this send here
+        backoff = func.least(
+            settings.ALERT_RETRY_MAX_DELAY_SECONDS,
+            settings.ALERT_RETRY_BASE_DELAY_SECONDS * func.power(2, AlertRecipient.attempts)
+        ) * (0.5 + func.random() * 0.5)
+        
+        db.execute(
+            update(AlertRecipient).where(key.in_(attempted)).values(
+                attempts=AlertRecipient.attempts + 1,
+                delivered=case((is_delivered, True), else_=AlertRecipient.delivered),
+                delivered_at=case((is_delivered, datetime.utcnow()), else_=AlertRecipient.delivered_at),
+                digest=case((is_delivered, False), else_=AlertRecipient.digest),
+                next_retry_at=case(
+                    (is_delivered, None),
+                    (AlertRecipient.attempts + 1 >= max_attempts, None),
+                    else_=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, backoff)
+                )
+            ).execution_options(synchronize_session=False)
+        )
+        
+        if failed:
+            exhausted = select(
+                AlertRecipient.alert_id, AlertRecipient.user_id, AlertRecipient.attempts
+            ).where(
+                key.in_(failed),
+                AlertRecipient.delivered == False,
+                AlertRecipient.attempts >= max_attempts
             )
-            
-            # Try multi-channel delivery
-            delivered = False
-            
-            # Try WhatsApp first
-            if user.platform == PlatformType.whatsapp:
-                from app.bots.whatsapp_api import whatsapp
-                success = whatsapp.send_message(user.platform_id, message)
-                if success:
-                    delivered = True
-                    delivery_stats['whatsapp'] += 1
-            
-            # Try Telegram
-            elif user.platform == PlatformType.telegram:
-                from app.bots.telegram_api import telegram
-                success = telegram.send_message(user.platform_id, message)
-                if success:
-                    delivered = True
-                    delivery_stats['telegram'] += 1
-            
-            # Fallback to SMS (if configured)
-            if not delivered:
-                # TODO: Implement Twilio SMS
-                # success = send_sms(user.phone_number, message)
-                delivery_stats['failed'] += 1
-            
-            # Update recipient status
-            if delivered:
-                recipient.delivered = True
-                recipient.delivered_at = datetime.utcnow()
-            
-        # Update alert status
-        if delivery_stats['failed'] == 0:
-            alert.delivery_status = AlertDeliveryStatus.SENT
-        elif delivery_stats['failed'] < delivery_stats['total']:
+            db.execute(
+                insert(AlertDeadLetter).from_select(
+                    ['alert_id', 'user_id', 'attempts'], exhausted
+                ).on_conflict_do_nothing()
+            )
+        
+        if message_ids:
+            sent = values(
+                column('alert_id', String),
+                column('user_id', String),
+                column('message_id', String),
+                name='sent'
+            ).data(message_ids)
+            db.execute(
+                update(AlertRecipient).where(
+                    AlertRecipient.alert_id == sent.c.alert_id,
+                    AlertRecipient.user_id == sent.c.user_id
+                ).values(
+                    provider_message_id=sent.c.message_id
+                ).execution_options(synchronize_session=False)
+            )
+        
+        db.commit()
+    
+    @staticmethod
+    def _hold_back_capped(db: Session, alert: Alert, recipients: List) -> List:
+        """
+        Recipients to send to now
+        
+        Users over their frequency cap get a digest later instead;
+        emergencies are never held back, but still count towards the cap.
+        """
+        capped = frequency_cap.over_cap(
+            [recipient.id for recipient in recipients],
+            exempt=alert.severity == AlertLevel.EMERGENCY
+        )
+        if not capped:
+            return recipients
+        
+        AlertService._defer_to_digest(db, alert.id, list(capped))
+        return [recipient for recipient in recipients if recipient.id not in capped]
+    
+    @staticmethod
+    def _defer_to_digest(db: Session, alert_id: str, user_ids: List[str]) -> None:
+        """
+        Hold back recipients who hit their frequency cap
+        
+        They are sent a single digest of all held-back alerts by the retry
+        worker once their cap window rolls over. Not committed here, so the
+        rest of the claimed batch stays locked.
+        """
+        db.query(AlertRecipient).filter(
+            AlertRecipient.alert_id == alert_id,
+            AlertRecipient.user_id.in_(user_ids)
+        ).update({
+            AlertRecipient.attempts: 1,
+            AlertRecipient.digest: True,
+            AlertRecipient.next_retry_at: frequency_cap.next_window_start()
+        }, synchronize_session=False)
+    
+    @staticmethod
+    def get_incomplete_alerts(db: Session) -> List[Row]:
+        """
+        (id, severity) of alerts whose delivery started but never finished
+        (e.g. after a crash), most severe first
+        """
+        return db.query(Alert.id, Alert.severity).filter(
+            Alert.delivery_status == AlertDeliveryStatus.SENDING
+        ).order_by(Alert.severity.desc(), Alert.created_at).all()
+    
+    @staticmethod
+    def resume_incomplete_deliveries() -> int:
+        """Re-queue (or deliver in-process) every alert left mid-delivery"""
+        from app.database import SessionLocal
+        from app.services.alert_queue import alert_queue
+        
+        db = SessionLocal()
+        try:
+            alerts = AlertService.get_incomplete_alerts(db)
+        finally:
+            db.close()
+        
+        for alert_id, severity in alerts:
+            print(f"🔁 Resuming delivery of alert {alert_id}")
+            if not alert_queue.enqueue_alert(alert_id, severity):
+                AlertService.deliver_alert_in_new_session(alert_id)
+        
+        return len(alerts)
+    
+    @staticmethod
+    def _finalize_delivery(db: Session, alert: Alert) -> None:
+        """Set final alert status once every recipient has been attempted"""
+        remaining = db.query(AlertRecipient.user_id).filter(
+            AlertRecipient.alert_id == alert.id,
+            AlertRecipient.attempts == 0
+        ).first()
+        if remaining:
+            return
+        
+        # Recipients waiting for a digest will still be reached
+        delivered = db.query(AlertRecipient.user_id).filter(
+            AlertRecipient.alert_id == alert.id,
+            (AlertRecipient.delivered == True) | (AlertRecipient.digest == True)
+        ).first()
+        
+        if delivered or not alert.recipients_count:
             alert.delivery_status = AlertDeliveryStatus.SENT
         else:
             alert.delivery_status = AlertDeliveryStatus.FAILED
         
-        alert.sent_at = datetime.utcnow()
-        
+        alert.sent_at = alert.sent_at or datetime.utcnow()
         db.commit()
+    
+    @staticmethod
+    def claim_due_retries(db: Session, limit: int) -> List[Row]:
+        """
+        Claim recipients whose retry is due
         
-        return {
-            'alert_id': alert_id,
-            'status': alert.delivery_status.value,
-            'delivery_stats': delivery_stats,
-            'recipients': alert.recipients_count
-        }
+        Claimed rows get a lease (next_retry_at pushed forward) before the
+        sends start, so other retry workers skip them and a worker that dies
+        mid-batch only delays those retries until the lease runs out.
+        """
+        def due():
+            return db.query(
+                AlertRecipient.alert_id, AlertRecipient.digest,
+                User.id, User.platform, User.platform_id, User.language_code, User.phone_number
+            ).join(
+                User, User.id == AlertRecipient.user_id
+            ).join(
+                Alert, Alert.id == AlertRecipient.alert_id
+            ).filter(
+                AlertRecipient.next_retry_at <= func.now(),
+                AlertRecipient.delivered == False
+            )
+        
+        # Most severe alerts first, so emergency retries never wait behind advisories
+        rows = due().order_by(
+            Alert.severity.desc(), AlertRecipient.next_retry_at
+        ).limit(limit).with_for_update(of=AlertRecipient, skip_locked=True).all()
+        
+        # Take all of a user's held-back alerts so they get a single digest
+        digest_users = {row.id for row in rows if row.digest}
+        if digest_users:
+            claimed = {(row.alert_id, row.id) for row in rows}
+            rows += [
+                row for row in due().filter(
+                    AlertRecipient.digest == True,
+                    AlertRecipient.user_id.in_(digest_users)
+                ).with_for_update(of=AlertRecipient, skip_locked=True)
+                if (row.alert_id, row.id) not in claimed
+            ]
+        
+        if rows:
+            db.query(AlertRecipient).filter(
+                tuple_(AlertRecipient.alert_id, AlertRecipient.user_id).in_(
+                    [(row.alert_id, row.id) for row in rows]
+                )
+            ).update({
+                AlertRecipient.next_retry_at: func.now() + func.make_interval(
+                    0, 0, 0, 0, 0, 0, settings.ALERT_RETRY_LEASE_SECONDS
+                )
+            }, synchronize_session=False)
+        
+        db.commit()
+        return rows
     
     @staticmethod
-    def retry_failed_deliveries(db: Session, alert_id: str) -> int:
-        """Retry failed alert deliveries"""
-        # Get failed recipients
-        failed_recipients = db.query(AlertRecipient).filter(
-            AlertRecipient.alert_id == alert_id,
-            AlertRecipient.delivered == False
-        ).all()
+    def deliver_due_retries(db: Session, limit: int) -> Dict:
+        """Retry one batch of failed deliveries whose backoff has elapsed"""
+        from app.services.alert_dispatcher import alert_dispatcher
         
-        retried = 0
+        rows = AlertService.claim_due_retries(db, limit)
         
-        for recipient in failed_recipients:
-            user = recipient.user
-            alert = recipient.alert
+        by_alert: Dict[str, List[Row]] = {}
+        for row in rows:
+            if not row.digest:
+                by_alert.setdefault(row.alert_id, []).append(row)
+        
+        delivery_stats = AlertService._deliver_digests(db, [row for row in rows if row.digest])
+        
+        for alert_id, recipients in by_alert.items():
+            alert = db.query(Alert).filter(Alert.id == alert_id).first()
             
-            # Get user's language
-            language = user.language_code or 'en'
-            message = AlertService._generate_alert_message(
-                alert.incident,
-                alert.severity,
-                language
-            )
+            def record_batch(results, alert_id=alert_id) -> None:
+                AlertService._record_results(db, alert_id, results)
             
-            # Retry delivery
-            delivered = False
+            alert_stats = alert_dispatcher.run(
+                recipients,
+                AlertService._message_renderer(alert),
+                on_batch=record_batch
+            )
             
-            if user.platform == PlatformType.WHATSAPP:
-                from app.bots.whatsapp_api import whatsapp
-                success = whatsapp.send_message(user.platform_id, message)
-                delivered = success
-            elif user.platform == PlatformType.TELEGRAM:
-                from app.bots.telegram_api import telegram
-                success = telegram.send_message(user.platform_id, message)
-                delivered = success
+            # An alert that failed outright has now reached someone
+            if alert_stats['total'] > alert_stats['failed'] and alert.delivery_status == AlertDeliveryStatus.FAILED:
+                alert.delivery_status = AlertDeliveryStatus.SENT
+                db.commit()
             
-            if delivered:
-                recipient.delivered = True
-                recipient.delivered_at = datetime.utcnow()
-                retried += 1
+            for key in delivery_stats:
+                delivery_stats[key] += alert_stats[key]
+        
+        return delivery_stats
+    
+    @staticmethod
+    def _deliver_digests(db: Session, rows: List[Row]) -> Dict:
+        """Send each user one message covering all their held-back alerts"""
+        from app.services.alert_dispatcher import alert_dispatcher
+        
+        by_user: Dict[str, List[Row]] = {}
+        for row in rows:
+            by_user.setdefault(row.id, []).append(row)
+        
+        alerts = {
+            alert.id: alert
+            for alert in db.query(Alert).filter(Alert.id.in_({row.alert_id for row in rows}))
+        }
+        
+        # The digest itself counts towards the cap but is never held back
+        frequency_cap.over_cap(list(by_user), exempt=True)
+        
+        recipients = [
+            DigestRecipient(
+                id=user_rows[0].id,
+                platform=user_rows[0].platform,
+                platform_id=user_rows[0].platform_id,
+                language_code=user_rows[0].language_code,
+                phone_number=user_rows[0].phone_number,
+                message=AlertService._render_digest(
+                    [alerts[row.alert_id] for row in user_rows],
+                    user_rows[0].language_code or 'en'
+                )
+            )
+            for user_rows in by_user.values()
+        ]
+        
+        def record_batch(results) -> None:
+            AlertService._record_sends(
+                db,
+                attempted=[
+                    (row.alert_id, row.id)
+                    for result in results for row in by_user[result.user_id]
+                ],
+                delivered=[
+                    (row.alert_id, row.id)
+                    for result in results if result.delivered for row in by_user[result.user_id]
+                ],
+                message_ids=[
+                    (row.alert_id, row.id, result.provider_message_id)
+                    for result in results if result.provider_message_id
+                    for row in by_user[result.user_id]
+                ]
+            )
+        
+        return alert_dispatcher.run(recipients, lambda language: '', on_batch=record_batch)
+    
+    @staticmethod
+    def _render_digest(alerts: List[Alert], language: str) -> str:
+        """One message listing several alerts, highest level per incident first"""
+        if len(alerts) == 1:
+            alert = alerts[0]
+            return AlertService._generate_alert_message(alert.incident, alert.severity, language)
+        
+        by_incident: Dict[str, Alert] = {}
+        for alert in alerts:
+            key = alert.incident_id or alert.id
+            current = by_incident.get(key)
+            if not current or ALERT_LEVEL_RANK[AlertLevel(alert.severity)] > ALERT_LEVEL_RANK[AlertLevel(current.severity)]:
+                by_incident[key] = alert
+        
+        ranked = sorted(
+            by_incident.values(),
+            key=lambda alert: ALERT_LEVEL_RANK[AlertLevel(alert.severity)],
+            reverse=True
+        )
+        template = DIGEST_TEMPLATES.get(language, DIGEST_TEMPLATES['en'])
+        lines = [
+            template['line'].format(
+                level=AlertLevel(alert.severity).value.upper(),
+                location=(alert.incident.place_name if alert.incident else None) or "affected area"
+            )
+            for alert in ranked
+        ]
+        
+        return "\n".join([template['header'].format(count=len(ranked)), *lines, "", template['footer']])
+    
+    @staticmethod
+    def retry_failed_deliveries(db: Session, alert_id: str) -> int:
+        """
+        Schedule an immediate retry for every undelivered recipient
+        
+        The retry worker sends them; dead-lettered recipients get one more
+        attempt.
+        """
+        retried = db.query(AlertRecipient).filter(
+            AlertRecipient.alert_id == alert_id,
+            AlertRecipient.delivered == False,
+            AlertRecipient.attempts > 0
+        ).update({AlertRecipient.next_retry_at: func.now()}, synchronize_session=False)
+        
+        db.query(AlertDeadLetter).filter(
+            AlertDeadLetter.alert_id == alert_id
+        ).delete(synchronize_session=False)
         
         db.commit()
         return retried
@@ -298,18 +1031,114 @@ class AlertService:
             AlertRecipient.user_id == user_id
         ).order_by(Alert.created_at.desc()).limit(limit).all()
     
+    @staticmethod
+    def _recipient_states() -> Dict:
+        """Filters for each delivery state of an alert recipient"""
+        undelivered = AlertRecipient.delivered == False
+        return {
+            'delivered': AlertRecipient.delivered == True,
+            'read': AlertRecipient.read == True,
+            'pending': AlertRecipient.attempts == 0,
+            'digest': undelivered & (AlertRecipient.digest == True),
+            'retrying': undelivered & (AlertRecipient.digest == False) & AlertRecipient.next_retry_at.isnot(None),
+            'failed': (
+                undelivered & (AlertRecipient.attempts > 0) & (AlertRecipient.digest == False)
+                & AlertRecipient.next_retry_at.is_(None)
+            ),
+        }
+    
+    @staticmethod
+    def get_alert_recipient_stats(db: Session, alert_id: str) -> Dict:
+        """
+        Recipient counts per delivery state, overall and by platform
+        
+        One GROUP BY with conditional counts over the alert's recipients.
+        """
+        states = AlertService._recipient_states()
+        rows = db.execute(
+            select(
+                User.platform,
+                func.count().label('total'),
+                *[func.count().filter(condition).label(state) for state, condition in states.items()]
+            ).select_from(AlertRecipient).join(
+                User, User.id == AlertRecipient.user_id
+            ).where(
+                AlertRecipient.alert_id == alert_id
+            ).group_by(User.platform)
+        ).all()
+        
+        by_platform = {
+            PlatformType(row.platform).value: {key: row._mapping[key] for key in ['total', *states]}
+            for row in rows
+        }
+        totals = {
+            key: sum(counts[key] for counts in by_platform.values())
+            for key in ['total', *states]
+        }
+        
+        return {**totals, 'by_platform': by_platform}
+    
+    @staticmethod
+    def get_alert_recipients_page(
+        db: Session,
+        alert_id: str,
+        after: Optional[str] = None,
+        limit: int = 100,
+        state: Optional[str] = None
+    ) -> List[Row]:
+        """
+        One page of an alert's recipients with their platform details
+        
+        Keyset-paginated on user_id (the second column of the primary key),
+        so every page is an index range scan however large the alert is.
+        `after` is the last user_id of the previous page.
+        """
+        query = select(
+            AlertRecipient.user_id,
+            User.platform,
+            User.platform_id,
+            User.language_code,
+            AlertRecipient.delivered,
+            AlertRecipient.delivered_at,
+            AlertRecipient.read,
+            AlertRecipient.read_at,
+            AlertRecipient.attempts,
+            AlertRecipient.next_retry_at,
+            AlertRecipient.digest
+        ).join(
+            User, User.id == AlertRecipient.user_id
+        ).where(
+            AlertRecipient.alert_id == alert_id
+        )
+        
+        if after:
+            query = query.where(AlertRecipient.user_id > after)
+        if state:
+            query = query.where(AlertService._recipient_states()[state])
+        
+        return db.execute(
+            query.order_by(AlertRecipient.user_id).limit(limit)
+        ).all()
+    
     @staticmethod
     def mark_alert_read(db: Session, alert_id: str, user_id: str) -> bool:
-        """Mark alert as read by user"""
-        recipient = db.query(AlertRecipient).filter(
-            AlertRecipient.alert_id == alert_id,
-            AlertRecipient.user_id == user_id
-        ).first()
+        """
+        Mark alert as read by user
         
-        if recipient:
-            recipient.read = True
-            recipient.read_at = datetime.utcnow()
-            db.commit()
+        Only checks the recipient exists; the write is buffered and applied
+        in bulk with other read receipts by the status ingestor.
+        """
+        from app.services.status_ingestor import status_ingestor
+        
+        exists = db.query(
+            select(AlertRecipient.alert_id).where(
+                AlertRecipient.alert_id == alert_id,
+                AlertRecipient.user_id == user_id
+            ).exists()
+        ).scalar()
+        
+        if exists:
+            status_ingestor.mark_read(alert_id, user_id)
             return True
         
         return False
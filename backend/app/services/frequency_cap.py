@@ -0,0 +1,105 @@
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Set
+import redis
+from app.config import get_settings
+from app.redis_client import get_redis
+
+settings = get_settings()
+
+
+class FrequencyCap:
+    """
+    Per-user alert frequency cap over fixed time windows
+
+    Counts alerts sent to each user in Redis, shared by all workers. When
+    Redis is unavailable nothing is capped, so alerts are never lost to the
+    cap.
+    """
+
+    def __init__(self, limit: Optional[int] = None, window_seconds: Optional[int] = None):
+        self.limit = settings.ALERT_USER_CAP_COUNT if limit is None else limit
+        self.window_seconds = window_seconds or settings.ALERT_USER_CAP_WINDOW_MINUTES * 60
+
+    def _window(self, now: float) -> int:
+        return int(now // self.window_seconds)
+
+    def _key(self, user_id: str, window: int) -> str:
+        return f"alertcap:{window}:{user_id}"
+
+    def _capped_key(self, window: int) -> str:
+        """Set of the users at the cap in a window"""
+        return f"alertcapped:{window}"
+
+    def next_window_start(self, now: Optional[float] = None) -> datetime:
+        """When the current window ends and capped users can be messaged again"""
+        now = time.time() if now is None else now
+        start = (self._window(now) + 1) * self.window_seconds
+        return datetime.fromtimestamp(start, tz=timezone.utc)
+
+    def capped_users(self) -> Set[str]:
+        """
+        Users the next non-exempt alert would hold back, without counting one
+
+        Read from the window's set of users at the cap, which over_cap keeps
+        up to date. Empty when Redis is unavailable.
+        """
+        if not self.limit:
+            return set()
+
+        client = get_redis()
+        if client is None:
+            return set()
+
+        try:
+            members = client.smembers(self._capped_key(self._window(time.time())))
+        except redis.RedisError as e:
+            print(f"⚠️  Frequency cap unavailable ({e}), not capping")
+            return set()
+
+        return {member.decode() if isinstance(member, bytes) else member for member in members}
+
+    def over_cap(self, user_ids: List[str], exempt: bool = False) -> Set[str]:
+        """
+        Count one alert for each user and return those now over the cap
+
+        With `exempt`, the alert is counted but nobody is capped.
+        """
+        if not self.limit or not user_ids:
+            return set()
+
+        client = get_redis()
+        if client is None:
+            return set()
+
+        window = self._window(time.time())
+        try:
+            pipe = client.pipeline(transaction=False)
+            for user_id in user_ids:
+                key = self._key(user_id, window)
+                pipe.incr(key)
+                pipe.expire(key, self.window_seconds)
+            counts = pipe.execute()[::2]
+
+            # Users whose next alert is over the cap, for capped_users
+            at_cap = [user_id for user_id, count in zip(user_ids, counts) if count >= self.limit]
+            if at_cap:
+                capped_key = self._capped_key(window)
+                pipe.sadd(capped_key, *at_cap)
+                pipe.expire(capped_key, self.window_seconds)
+                pipe.execute()
+        except redis.RedisError as e:
+            print(f"⚠️  Frequency cap unavailable ({e}), not capping")
+            return set()
+
+        if exempt:
+            return set()
+
+        return {
+            user_id for user_id, count in zip(user_ids, counts)
+            if count > self.limit
+        }
+
+
+# Global instance
+frequency_cap = FrequencyCap()
@@ -6,6 +6,7 @@ from geoalchemy2.functions import ST_GeogFromText, ST_DWithin, ST_Centroid, ST_U
 from app.models import Incident, Report, IncidentReport, IncidentStatus, SeverityLevel, VerificationStatus
 from app.schemas import IncidentCreate, IncidentUpdate
 from app.services.report_service import ReportService
+from app.integrations.geocoding import geocoding
 
 
 class IncidentService:
@@ -55,6 +56,53 @@ class IncidentService:
         db.refresh(incident)
         return incident
     
+    @staticmethod
+    def lookup_place_name(incident: Incident) -> Optional[str]:
+        """
+        Reverse-geocode the incident location (a network call, nothing stored)
+        
+        Returns None when geocoding failed, including when only the
+        coordinate fallback came back, so a later call can try again.
+        """
+        try:
+            from geoalchemy2.shape import to_shape
+            point = to_shape(incident.location)
+            place_name = geocoding.reverse_geocode(point.y, point.x)
+        except Exception as e:
+            print(f"❌ Error geocoding incident {incident.id}: {e}")
+            return None
+        
+        if not place_name or place_name == f"{point.y}, {point.x}":
+            return None
+        
+        return place_name[:255]
+    
+    @staticmethod
+    def ensure_place_name(
+        db: Session,
+        incident: Incident,
+        place_name: Optional[str] = None,
+        lookup: bool = True
+    ) -> Optional[str]:
+        """
+        Store the incident's place name once (`place_name` if already looked
+        up, else reverse-geocoded unless `lookup` is False)
+        
+        Only flushed, so the caller's transaction (and any row lock it holds)
+        stays open.
+        """
+        if incident.place_name:
+            return incident.place_name
+        
+        if place_name is None and lookup:
+            place_name = IncidentService.lookup_place_name(incident)
+        
+        if place_name:
+            incident.place_name = place_name
+            db.flush()
+        
+        return incident.place_name
+    
     @staticmethod
     def add_report_to_incident(db: Session, incident_id: str, report_id: str) -> bool:
         """Link a report to an incident"""
@@ -0,0 +1,279 @@
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+import redis
+from app.config import get_settings
+from app.models import PlatformType
+from app.redis_client import get_redis
+
+settings = get_settings()
+
+# Seconds of send history used to report current throughput
+THROUGHPUT_WINDOW_SECONDS = 10
+
+# Per-chat slots kept in memory before expired ones are pruned
+MAX_TRACKED_CHATS = 10000
+
+# Reserve one send slot: refill the platform bucket, take a token (the bucket
+# may go negative, which queues callers behind each other at the platform
+# rate) and book the next free slot for the chat. Returns seconds to wait.
+RESERVE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local chat_interval = tonumber(ARGV[4])
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - 1
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], 3600)
+
+local wait = 0
+if tokens < 0 then
+    wait = -tokens / rate
+end
+
+if chat_interval > 0 then
+    local slot = math.max(now + wait, tonumber(redis.call('GET', KEYS[2]) or '0'))
+    local ttl = math.ceil((slot + chat_interval - now) * 1000)
+    redis.call('SET', KEYS[2], tostring(slot + chat_interval), 'PX', ttl)
+    wait = slot - now
+end
+
+return tostring(wait)
+"""
+
+# Push the bucket into debt so every worker pauses for `retry_after` seconds
+# and then resumes at the platform rate instead of all at once
+PENALIZE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local now = tonumber(ARGV[2])
+local debt = -tonumber(ARGV[3]) * rate
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or '0')
+redis.call('HSET', KEYS[1], 'tokens', tostring(math.min(tokens, debt)), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], 3600)
+return 1
+"""
+
+
+def parse_retry_after(value: Any, default: float = 1.0) -> float:
+    """
+    Seconds to back off from a 429's Retry-After (seconds or an HTTP-date)
+    or Telegram's retry_after; `default` if missing or unparseable
+    """
+    if value is None:
+        return default
+
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(str(value))
+    except (TypeError, ValueError):
+        return default
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass
+class PlatformLimit:
+    """Outbound message limits for one provider"""
+    rate: float  # Messages per second across all chats
+    chat_interval: float  # Minimum seconds between messages to one chat
+
+    @property
+    def capacity(self) -> float:
+        # Allow a burst of at most one second's worth of messages
+        return max(1.0, self.rate)
+
+
+class RateLimiter:
+    """
+    Token-bucket pacing for outbound bot messages
+
+    Limits are shared across worker processes through Redis and fall back to
+    in-process buckets when Redis is unavailable.
+    """
+
+    def __init__(self):
+        self.limits = {
+            PlatformType.telegram: PlatformLimit(
+                rate=settings.TELEGRAM_RATE_LIMIT_PER_SECOND,
+                chat_interval=settings.TELEGRAM_CHAT_INTERVAL_SECONDS
+            ),
+            PlatformType.whatsapp: PlatformLimit(
+                rate=settings.WHATSAPP_RATE_LIMIT_PER_SECOND,
+                chat_interval=settings.WHATSAPP_CHAT_INTERVAL_SECONDS
+            ),
+        }
+        self._lock = threading.Lock()
+        self._buckets: Dict[PlatformType, Dict[str, float]] = {}
+        self._chat_slots: Dict[str, float] = {}
+        self._sent: Dict[PlatformType, Dict[int, int]] = defaultdict(dict)
+        self._scripts: Dict[str, Any] = {}
+
+    def _script(self, client: redis.Redis, source: str):
+        """Lua script registered on `client`, run by EVALSHA (loaded again if Redis lost it)"""
+        script = self._scripts.get(source)
+        if script is None or script.registered_client is not client:
+            script = self._scripts[source] = client.register_script(source)
+        return script
+
+    def _bucket_key(self, platform: PlatformType) -> str:
+        return f"ratelimit:{platform.value}:bucket"
+
+    def _chat_key(self, platform: PlatformType, chat_id: str) -> str:
+        return f"ratelimit:{platform.value}:chat:{chat_id}"
+
+    def _sent_key(self, platform: PlatformType, second: int) -> str:
+        return f"ratelimit:{platform.value}:sent:{second}"
+
+    def reserve(self, platform: PlatformType, chat_id: Optional[str] = None) -> float:
+        """Book a send slot and return how many seconds to wait before using it"""
+        limit = self.limits[platform]
+        chat_interval = limit.chat_interval if chat_id else 0
+        now = time.time()
+
+        client = get_redis()
+        if client is not None:
+            try:
+                wait = self._script(client, RESERVE_SCRIPT)(
+                    keys=[self._bucket_key(platform), self._chat_key(platform, chat_id or "")],
+                    args=[limit.rate, limit.capacity, now, chat_interval]
+                )
+                return max(0.0, float(wait))
+            except redis.RedisError as e:
+                print(f"⚠️  Redis rate limiter error ({e}), using in-process bucket")
+
+        with self._lock:
+            bucket = self._buckets.setdefault(platform, {'tokens': limit.capacity, 'ts': now})
+            elapsed = max(0.0, now - bucket['ts'])
+            bucket['tokens'] = min(limit.capacity, bucket['tokens'] + elapsed * limit.rate) - 1
+            bucket['ts'] = now
+            wait = -bucket['tokens'] / limit.rate if bucket['tokens'] < 0 else 0.0
+
+            if chat_interval:
+                key = self._chat_key(platform, chat_id)
+                slot = max(now + wait, self._chat_slots.get(key, 0.0))
+                self._chat_slots[key] = slot + chat_interval
+                wait = slot - now
+
+                if len(self._chat_slots) > MAX_TRACKED_CHATS:
+                    self._chat_slots = {
+                        k: v for k, v in self._chat_slots.items() if v > now
+                    }
+
+            return wait
+
+    async def acquire(self, platform: PlatformType, chat_id: Optional[str] = None) -> None:
+        """
+        Wait until a message to `chat_id` may be sent
+
+        The reservation (a Redis round trip) runs on the default executor, so
+        concurrent sends on the event loop are not serialized behind it.
+        """
+        wait = await asyncio.get_running_loop().run_in_executor(None, self.reserve, platform, chat_id)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def wait(self, platform: PlatformType, chat_id: Optional[str] = None) -> None:
+        """Blocking `acquire` for sync senders (bot replies)"""
+        wait = self.reserve(platform, chat_id)
+        if wait > 0:
+            time.sleep(wait)
+
+    def penalize(self, platform: PlatformType, retry_after: float) -> None:
+        """Pause all sends on a platform after the provider asked us to back off"""
+        limit = self.limits[platform]
+        now = time.time()
+        print(f"⏳ {platform.value} rate limited, pausing sends for {retry_after}s")
+
+        client = get_redis()
+        if client is not None:
+            try:
+                self._script(client, PENALIZE_SCRIPT)(
+                    keys=[self._bucket_key(platform)],
+                    args=[limit.rate, now, retry_after]
+                )
+                return
+            except redis.RedisError as e:
+                print(f"⚠️  Redis rate limiter error ({e}), using in-process bucket")
+
+        with self._lock:
+            bucket = self._buckets.setdefault(platform, {'tokens': limit.capacity, 'ts': now})
+            bucket['tokens'] = min(bucket['tokens'], -retry_after * limit.rate)
+            bucket['ts'] = now
+
+    def record_sent(self, platform: PlatformType) -> None:
+        """Count a successful send for throughput reporting"""
+        second = int(time.time())
+
+        client = get_redis()
+        if client is not None:
+            try:
+                key = self._sent_key(platform, second)
+                pipe = client.pipeline()
+                pipe.incr(key)
+                pipe.expire(key, THROUGHPUT_WINDOW_SECONDS * 2)
+                pipe.execute()
+                return
+            except redis.RedisError:
+                pass
+
+        with self._lock:
+            counts = self._sent[platform]
+            counts[second] = counts.get(second, 0) + 1
+            if len(counts) > THROUGHPUT_WINDOW_SECONDS * 2:
+                for old in [s for s in counts if s <= second - THROUGHPUT_WINDOW_SECONDS]:
+                    del counts[old]
+
+    async def penalize_async(self, platform: PlatformType, retry_after: float) -> None:
+        """`penalize` off the event loop"""
+        await asyncio.get_running_loop().run_in_executor(None, self.penalize, platform, retry_after)
+
+    async def record_sent_async(self, platform: PlatformType) -> None:
+        """`record_sent` off the event loop"""
+        await asyncio.get_running_loop().run_in_executor(None, self.record_sent, platform)
+
+    def throughput(self, platform: PlatformType) -> float:
+        """Messages per second sent over the last few seconds"""
+        now = int(time.time())
+        # Skip the current, still-filling second
+        seconds = range(now - THROUGHPUT_WINDOW_SECONDS, now)
+
+        client = get_redis()
+        if client is not None:
+            try:
+                values = client.mget([self._sent_key(platform, s) for s in seconds])
+                return sum(int(v) for v in values if v) / THROUGHPUT_WINDOW_SECONDS
+            except redis.RedisError:
+                pass
+
+        with self._lock:
+            counts = self._sent[platform]
+            return sum(counts.get(s, 0) for s in seconds) / THROUGHPUT_WINDOW_SECONDS
+
+    def stats(self) -> Dict[str, Any]:
+        """Configured limits and current throughput per platform"""
+        return {
+            platform.value: {
+                "limit_per_second": limit.rate,
+                "chat_interval_seconds": limit.chat_interval,
+                "throughput_per_second": round(self.throughput(platform), 2)
+            }
+            for platform, limit in self.limits.items()
+        }
+
+
+# Global instance
+rate_limiter = RateLimiter()
@@ -0,0 +1,342 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+from sqlalchemy import DateTime, String, case, column, func, select, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.models import AlertRecipient, AlertDeadLetter
+
+settings = get_settings()
+
+# Updates kept for the next flush after a failed one, in multiples of the
+# buffer size; beyond that (e.g. the database is down for long) they are dropped
+MAX_RETAINED_BUFFERS = 10
+
+
+def _timestamp(value: Any) -> datetime:
+    """Status callback timestamp (unix seconds as a string) as an aware datetime"""
+    try:
+        return datetime.fromtimestamp(int(value), tz=timezone.utc)
+    except (TypeError, ValueError):
+        return datetime.now(timezone.utc)
+
+
+class StatusIngestor:
+    """
+    Buffers WhatsApp status callbacks and alert read receipts
+
+    Webhooks and the read API only record into in-memory buffers; a background
+    task applies everything received in the last flush interval with a few
+    set-based UPDATEs, instead of one transaction per callback. Repeated
+    callbacks for the same message collapse into one row of the flush.
+
+    A callback can arrive before its provider message id is recorded (ids
+    are written once the whole send batch is done). Statuses that match no
+    recipient are kept and retried on later flushes for up to
+    ALERT_STATUS_UNMATCHED_TTL_SECONDS, then dropped.
+    """
+
+    def __init__(self, flush_interval: Optional[float] = None, max_buffer: Optional[int] = None):
+        self.flush_interval = flush_interval or settings.ALERT_STATUS_FLUSH_INTERVAL_MS / 1000
+        self.max_buffer = max_buffer or settings.ALERT_STATUS_BUFFER_MAX
+        self.unmatched_ttl = settings.ALERT_STATUS_UNMATCHED_TTL_SECONDS
+        # provider message id -> when a flush first found no recipient for it
+        self._unmatched_since: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # provider message id -> [delivered at, read at]
+        self._statuses: Dict[str, List[Optional[datetime]]] = {}
+        # provider message id -> failed at (dropped once delivered/read is seen)
+        self._failed: Dict[str, datetime] = {}
+        # (alert_id, user_id) -> read at
+        self._reads: Dict[Tuple[str, str], datetime] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def add_whatsapp_statuses(self, statuses: List[Dict[str, Any]]) -> int:
+        """Buffer the `statuses` of a WhatsApp webhook payload, returning how many were kept"""
+        kept = 0
+        with self._lock:
+            for status in statuses:
+                message_id, state = status.get('id'), status.get('status')
+                if not message_id:
+                    continue
+
+                at = _timestamp(status.get('timestamp'))
+                if state == 'delivered':
+                    self._merge_status(message_id, [at, None])
+                elif state == 'read':
+                    self._merge_status(message_id, [None, at])
+                elif state == 'failed':
+                    self._merge_failure(message_id, at)
+                else:
+                    continue
+                kept += 1
+
+        self._maybe_wake()
+        return kept
+
+    def _merge_status(self, message_id: str, times: List[Optional[datetime]]) -> None:
+        """Keep the earliest delivered/read times; a delivery overrides a failure (lock held)"""
+        current = self._statuses.setdefault(message_id, [None, None])
+        for slot, at in enumerate(times):
+            if at is not None:
+                current[slot] = min(current[slot] or at, at)
+        self._failed.pop(message_id, None)
+
+    def _merge_failure(self, message_id: str, at: datetime) -> None:
+        """Record a failure unless the message was delivered or read (lock held)"""
+        if message_id not in self._statuses:
+            self._failed.setdefault(message_id, at)
+
+    def mark_read(self, alert_id: str, user_id: str) -> None:
+        """Buffer a read receipt from the app"""
+        with self._lock:
+            self._reads.setdefault((alert_id, user_id), datetime.now(timezone.utc))
+
+        self._maybe_wake()
+
+    def pending(self) -> int:
+        """Number of buffered updates not yet written"""
+        with self._lock:
+            return len(self._statuses) + len(self._failed) + len(self._reads)
+
+    def _maybe_wake(self) -> None:
+        """Flush early once the buffer is full"""
+        if self._loop is not None and self.pending() >= self.max_buffer:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _drain(self):
+        with self._lock:
+            drained = self._statuses, self._failed, self._reads
+            self._statuses, self._failed, self._reads = {}, {}, {}
+        return drained
+
+    def _restore(self, statuses, failed, reads) -> int:
+        """
+        Put a batch that failed to apply back into the buffers, merged with
+        what arrived since, up to MAX_RETAINED_BUFFERS times the buffer size.
+        Returns how many updates were dropped.
+        """
+        room = self.max_buffer * MAX_RETAINED_BUFFERS - self.pending()
+        dropped = 0
+        with self._lock:
+            for message_id, times in statuses.items():
+                if room <= 0 and message_id not in self._statuses:
+                    dropped += 1
+                    continue
+                room -= message_id not in self._statuses
+                self._merge_status(message_id, times)
+
+            for message_id, at in failed.items():
+                if room <= 0 and message_id not in self._failed:
+                    dropped += 1
+                    continue
+                room -= message_id not in self._failed and message_id not in self._statuses
+                self._merge_failure(message_id, at)
+
+            for key, at in reads.items():
+                if room <= 0 and key not in self._reads:
+                    dropped += 1
+                    continue
+                room -= key not in self._reads
+                self._reads[key] = min(self._reads.get(key, at), at)
+
+        return dropped
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """
+        Write every buffered update, returning how many were applied
+
+        If the write fails the batch is re-buffered for the next flush.
+        """
+        statuses, failed, reads = self._drain()
+        if not (statuses or failed or reads):
+            return 0
+
+        from app.database import SessionLocal
+        session = db or SessionLocal()
+        try:
+            matched = self._apply_statuses(session, statuses) | self._apply_failures(session, failed)
+            self._apply_reads(session, reads)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            dropped = self._restore(statuses, failed, reads)
+            print(
+                f"❌ Failed to apply {len(statuses) + len(failed) + len(reads)} alert status updates "
+                f"({dropped} dropped, rest retried next flush): {e}"
+            )
+            return 0
+        finally:
+            if db is None:
+                session.close()
+
+        retried = self._retry_unmatched(statuses, failed, matched)
+        return len(statuses) + len(failed) + len(reads) - retried
+
+    def _retry_unmatched(
+        self,
+        statuses: Dict[str, List[Optional[datetime]]],
+        failed: Dict[str, datetime],
+        matched: Set[str]
+    ) -> int:
+        """
+        Re-buffer the statuses that matched no recipient yet, unless they
+        have been unmatched for longer than the TTL. Returns how many were kept.
+        """
+        now = time.monotonic()
+        keep_statuses, keep_failed = {}, {}
+        expired = 0
+        with self._lock:
+            for message_id in matched:
+                self._unmatched_since.pop(message_id, None)
+
+            for updates, keep in ((statuses, keep_statuses), (failed, keep_failed)):
+                for message_id, update in updates.items():
+                    if message_id in matched:
+                        continue
+                    since = self._unmatched_since.setdefault(message_id, now)
+                    if now - since < self.unmatched_ttl:
+                        keep[message_id] = update
+                    else:
+                        del self._unmatched_since[message_id]
+                        expired += 1
+
+        if expired:
+            print(f"⚠️  Dropped {expired} status callbacks matching no alert recipient")
+        if not (keep_statuses or keep_failed):
+            return 0
+
+        dropped = self._restore(keep_statuses, keep_failed, {})
+        return len(keep_statuses) + len(keep_failed) - dropped
+
+    @staticmethod
+    def _apply_statuses(db: Session, statuses: Dict[str, List[Optional[datetime]]]) -> Set[str]:
+        """Apply deliveries and reads, returning the message ids that matched a recipient"""
+        if not statuses:
+            return set()
+
+        received = values(
+            column('message_id', String),
+            column('delivered_at', DateTime(timezone=True)),
+            column('read_at', DateTime(timezone=True)),
+            name='received'
+        ).data([(message_id, *times) for message_id, times in statuses.items()])
+
+        # Provider confirmation replaces the time the send was accepted
+        return set(db.execute(
+            update(AlertRecipient).where(
+                AlertRecipient.provider_message_id == received.c.message_id
+            ).values(
+                delivered=True,
+                delivered_at=func.coalesce(received.c.delivered_at, AlertRecipient.delivered_at, received.c.read_at),
+                read=AlertRecipient.read | received.c.read_at.isnot(None),
+                read_at=func.coalesce(AlertRecipient.read_at, received.c.read_at),
+                next_retry_at=None
+            ).returning(
+                AlertRecipient.provider_message_id
+            ).execution_options(synchronize_session=False)
+        ).scalars())
+
+    @staticmethod
+    def _apply_failures(db: Session, failed: Dict[str, datetime]) -> Set[str]:
+        """
+        Send failed messages back to the retry queue, or dead-letter them,
+        returning the message ids that matched a recipient
+        """
+        if not failed:
+            return set()
+
+        message_ids = list(failed)
+        exhausted = AlertRecipient.attempts >= settings.ALERT_RETRY_MAX_ATTEMPTS
+        db.execute(
+            update(AlertRecipient).where(
+                AlertRecipient.provider_message_id.in_(message_ids),
+                AlertRecipient.read == False
+            ).values(
+                delivered=False,
+                delivered_at=None,
+                next_retry_at=case((exhausted, None), else_=func.now())
+            ).execution_options(synchronize_session=False)
+        )
+
+        db.execute(
+            insert(AlertDeadLetter).from_select(
+                ['alert_id', 'user_id', 'attempts'],
+                select(AlertRecipient.alert_id, AlertRecipient.user_id, AlertRecipient.attempts).where(
+                    AlertRecipient.provider_message_id.in_(message_ids),
+                    AlertRecipient.delivered == False,
+                    exhausted
+                )
+            ).on_conflict_do_nothing()
+        )
+
+        # Including messages already read, which a failure no longer changes
+        return set(db.execute(
+            select(AlertRecipient.provider_message_id).where(
+                AlertRecipient.provider_message_id.in_(message_ids)
+            )
+        ).scalars())
+
+    @staticmethod
+    def _apply_reads(db: Session, reads: Dict[Tuple[str, str], datetime]) -> None:
+        if not reads:
+            return
+
+        received = values(
+            column('alert_id', String),
+            column('user_id', String),
+            column('read_at', DateTime(timezone=True)),
+            name='received'
+        ).data([(alert_id, user_id, at) for (alert_id, user_id), at in reads.items()])
+
+        db.execute(
+            update(AlertRecipient).where(
+                AlertRecipient.alert_id == received.c.alert_id,
+                AlertRecipient.user_id == received.c.user_id
+            ).values(
+                read=True,
+                read_at=func.coalesce(AlertRecipient.read_at, received.c.read_at)
+            ).execution_options(synchronize_session=False)
+        )
+
+    async def run(self) -> None:
+        """Flush the buffers every flush interval, or sooner when full"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await loop.run_in_executor(None, self.flush)
+
+    def start(self) -> None:
+        """Start the background flush task on the running event loop"""
+        if self._task is not None:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self.run())
+        print(f"✅ Alert status ingestor flushing every {self.flush_interval * 1000:.0f} ms")
+
+    async def stop(self) -> None:
+        """Stop the background task and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task, self._loop, self._wake = None, None, None
+
+        await asyncio.get_running_loop().run_in_executor(None, self.flush)
+
+
+# Global instance
+status_ingestor = StatusIngestor()
@@ -0,0 +1,262 @@
+import uuid
+from collections import defaultdict
+from typing import Iterator, Optional, List
+import numpy as np
+import redis
+from sqlalchemy import cast, func, select
+from sqlalchemy.orm import Session
+from geoalchemy2 import Geometry
+from app.config import get_settings
+from app.models import User
+from app.redis_client import get_redis
+from app.services.target_area import bounding_box_km, covers_points
+
+settings = get_settings()
+
+# Stored search results outlive an abandoned search by at most this long
+RESULT_TTL_SECONDS = 600
+
+
+def radius_class(alert_radius_km: Optional[float]) -> int:
+    """
+    Index bucket for a user's personal alert radius
+
+    Radii are whole kilometres (1-20 from the bots), so every class is exact;
+    larger values set through the API are capped at ALERT_MAX_USER_RADIUS_KM.
+    """
+    radius = int(alert_radius_km or 0)
+    return max(0, min(radius, settings.ALERT_MAX_USER_RADIUS_KM))
+
+
+class SubscriberIndex:
+    """
+    In-memory geofencing index of alert subscribers
+
+    Kept up to date as users change their location, radius or subscription,
+    so alert recipients can be resolved without an ST_DWithin scan of the
+    users table. Users are stored in one Redis GEO set per radius class, so a
+    single pipelined round trip matches an incident against each user's own
+    alert radius. Any failed update marks the index stale and callers fall
+    back to PostGIS until it is rebuilt.
+    """
+
+    def __init__(self, prefix: str = "subscribers"):
+        self.prefix = prefix
+        # Radius classes that currently have a GEO set
+        self.radii_key = f"{prefix}:radii"
+        # Present only while the GEO sets are a complete copy of the users table
+        self.ready_key = f"{prefix}:ready"
+
+    def _geo_key(self, radius: int) -> str:
+        return f"{self.prefix}:geo:r{radius}"
+
+    def sync_user(self, user: User) -> None:
+        """Add, move or remove a user after their location, radius or subscription changed"""
+        client = get_redis()
+        if client is None:
+            return
+
+        try:
+            # The user's previous radius class is unknown, so clear every class
+            pipe = client.pipeline()
+            for radius in client.smembers(self.radii_key):
+                pipe.zrem(self._geo_key(int(radius)), user.id)
+
+            if user.alert_subscribed and user.location is not None:
+                from geoalchemy2.shape import to_shape
+                point = to_shape(user.location)
+                radius = radius_class(user.alert_radius_km)
+                pipe.sadd(self.radii_key, radius)
+                pipe.geoadd(self._geo_key(radius), (point.x, point.y, user.id))
+
+            pipe.execute()
+        except Exception as e:
+            print(f"⚠️  Subscriber index update failed for user {user.id} ({e}), marking stale")
+            self._invalidate(client)
+
+    def search(
+        self,
+        lat: float,
+        lon: float,
+        radius_km: float,
+        honor_user_radius: bool = True,
+        batch_size: int = 1000
+    ) -> Optional[Iterator[List[str]]]:
+        """
+        Batches of ids of subscribed users to alert about a point
+
+        A user matches if they are within `radius_km`, or (with
+        `honor_user_radius`) within their own alert radius. Matches are
+        stored server-side and read back `batch_size` at a time, so memory
+        stays flat however many users match. Returns None if the index is
+        unavailable or stale, in which case the caller must query PostGIS
+        instead.
+        """
+        client = get_redis()
+        if client is None:
+            return None
+
+        try:
+            if not client.exists(self.ready_key):
+                return None
+
+            radii = [int(radius) for radius in client.smembers(self.radii_key)]
+            keys = self._result_keys(radii)
+            pipe = client.pipeline()
+            for radius, key in zip(radii, keys):
+                pipe.geosearchstore(
+                    key,
+                    self._geo_key(radius),
+                    longitude=lon,
+                    latitude=lat,
+                    radius=max(radius_km, radius) if honor_user_radius else radius_km,
+                    unit="km"
+                )
+                pipe.expire(key, RESULT_TTL_SECONDS)
+            pipe.execute()
+        except redis.RedisError as e:
+            print(f"⚠️  Subscriber index search failed ({e}), using PostGIS")
+            return None
+
+        return self._read_results(client, keys, batch_size)
+
+    def search_area(self, area, batch_size: int = 1000) -> Optional[Iterator[List[str]]]:
+        """
+        Batches of ids of subscribed users inside a polygon target area
+        (shapely, lon/lat)
+
+        A box search around the area narrows the candidates, then an exact
+        point-in-polygon test on the prepared area keeps those covered by it,
+        one page of `batch_size` candidates at a time. Personal alert radii
+        do not apply. Returns None if the index is unavailable or stale.
+        """
+        client = get_redis()
+        if client is None:
+            return None
+
+        try:
+            if not client.exists(self.ready_key):
+                return None
+
+            lon, lat, width_km, height_km = bounding_box_km(area)
+            radii = [int(radius) for radius in client.smembers(self.radii_key)]
+            keys = self._result_keys(radii)
+            pipe = client.pipeline()
+            for radius, key in zip(radii, keys):
+                pipe.geosearchstore(
+                    key,
+                    self._geo_key(radius),
+                    longitude=lon,
+                    latitude=lat,
+                    width=width_km,
+                    height=height_km,
+                    unit="km"
+                )
+                pipe.expire(key, RESULT_TTL_SECONDS)
+            pipe.execute()
+        except redis.RedisError as e:
+            print(f"⚠️  Subscriber index area search failed ({e}), using PostGIS")
+            return None
+
+        return self._read_results(client, keys, batch_size, area)
+
+    def _result_keys(self, radii: List[int]) -> List[str]:
+        search_id = uuid.uuid4().hex
+        return [f"{self.prefix}:results:{search_id}:r{radius}" for radius in radii]
+
+    def _read_results(
+        self,
+        client: redis.Redis,
+        keys: List[str],
+        batch_size: int,
+        area=None
+    ) -> Iterator[List[str]]:
+        """
+        Page through stored search results, deleting them once read
+
+        With an `area`, each page is narrowed to the members it covers.
+        Each user is in exactly one radius class, so pages never overlap.
+        Results left behind by an abandoned search expire on their own.
+        """
+        try:
+            for key in keys:
+                start = 0
+                while True:
+                    user_ids = client.zrange(key, start, start + batch_size - 1)
+                    if not user_ids:
+                        break
+                    start += batch_size
+
+                    if area is not None:
+                        coords = np.array(client.geopos(key, *user_ids), dtype=float)
+                        covered = covers_points(area, coords[:, 0], coords[:, 1])
+                        user_ids = [user_ids[i] for i in np.flatnonzero(covered)]
+
+                    if user_ids:
+                        yield user_ids
+        finally:
+            if keys:
+                client.delete(*keys)
+
+    def rebuild(self, db: Session, batch_size: int = 5000) -> int:
+        """Repopulate the index from Postgres, returning the number of subscribers"""
+        client = get_redis()
+        if client is None:
+            raise RuntimeError("Redis is not available")
+
+        # Searches use PostGIS until the rebuild completes; updates made
+        # meanwhile go straight into the new sets
+        self._invalidate(client)
+        self.clear(client)
+
+        query = select(
+            User.id,
+            func.ST_X(cast(User.location, Geometry)),
+            func.ST_Y(cast(User.location, Geometry)),
+            User.alert_radius_km
+        ).where(
+            User.alert_subscribed == True,
+            User.location.isnot(None)
+        )
+
+        count = 0
+        with db.get_bind().connect() as connection:
+            result = connection.execution_options(
+                stream_results=True,
+                yield_per=batch_size
+            ).execute(query)
+
+            for rows in result.partitions():
+                self.add_many(client, rows)
+                count += len(rows)
+
+        client.set(self.ready_key, 1)
+        print(f"✅ Subscriber index rebuilt with {count} users")
+        return count
+
+    def add_many(self, client: redis.Redis, rows) -> None:
+        """Bulk-add (user_id, lon, lat, alert_radius_km) rows in one pipeline"""
+        by_radius = defaultdict(list)
+        for user_id, lon, lat, alert_radius_km in rows:
+            by_radius[radius_class(alert_radius_km)].extend((lon, lat, user_id))
+
+        pipe = client.pipeline()
+        for radius, values in by_radius.items():
+            pipe.sadd(self.radii_key, radius)
+            pipe.geoadd(self._geo_key(radius), values)
+        pipe.execute()
+
+    def clear(self, client: redis.Redis) -> None:
+        """Delete every radius class set"""
+        keys = [self._geo_key(int(radius)) for radius in client.smembers(self.radii_key)]
+        client.delete(self.radii_key, *keys)
+
+    def _invalidate(self, client: redis.Redis) -> None:
+        try:
+            client.delete(self.ready_key)
+        except redis.RedisError:
+            pass
+
+
+# Global instance
+subscriber_index = SubscriberIndex()
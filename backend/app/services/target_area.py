@@ -0,0 +1,85 @@
+import math
+from typing import Any, Dict, Tuple
+import numpy as np
+import shapely
+from shapely.geometry import MultiPolygon, Polygon, shape
+from shapely.geometry.base import BaseGeometry
+
+# Approximate length of one degree, used to size search boxes (with a margin)
+KM_PER_DEGREE_LAT = 110.574
+KM_PER_DEGREE_LON_AT_EQUATOR = 111.320
+
+
+def parse_target_area(geojson: Dict[str, Any]) -> MultiPolygon:
+    """
+    Validate a GeoJSON Polygon/MultiPolygon (lon/lat) as an alert target area
+
+    Invalid rings (e.g. self-intersections from hand-drawn wards) are
+    repaired; raises ValueError if no polygon area is left.
+    """
+    try:
+        area = shape(geojson)
+    except Exception as e:
+        raise ValueError(f"Invalid GeoJSON geometry: {e}")
+
+    if not isinstance(area, (Polygon, MultiPolygon)):
+        raise ValueError("Target area must be a Polygon or MultiPolygon")
+
+    if not area.is_valid:
+        area = shapely.make_valid(area)
+
+    polygons = [
+        polygon
+        for part in shapely.get_parts(area)
+        for polygon in shapely.get_parts(part)
+        if isinstance(polygon, Polygon) and not polygon.is_empty
+    ]
+    if not polygons:
+        raise ValueError("Target area is empty")
+
+    min_lon, min_lat, max_lon, max_lat = shapely.bounds(MultiPolygon(polygons))
+    if min_lon < -180 or max_lon > 180 or min_lat < -90 or max_lat > 90:
+        raise ValueError("Target area coordinates must be longitude/latitude")
+
+    return MultiPolygon(polygons)
+
+
+def bounding_box_km(area: BaseGeometry) -> Tuple[float, float, float, float]:
+    """
+    (center lon, center lat, width km, height km) of a box around the area,
+    large enough to hold it wherever the box's width is measured
+    """
+    min_lon, min_lat, max_lon, max_lat = area.bounds
+    # Degrees of longitude are longest at the latitude closest to the equator
+    widest_lat = 0.0 if min_lat <= 0 <= max_lat else min(abs(min_lat), abs(max_lat))
+    km_per_degree_lon = KM_PER_DEGREE_LON_AT_EQUATOR * math.cos(math.radians(widest_lat))
+
+    return (
+        (min_lon + max_lon) / 2,
+        (min_lat + max_lat) / 2,
+        (max_lon - min_lon) * km_per_degree_lon * 1.01 + 1,
+        (max_lat - min_lat) * KM_PER_DEGREE_LAT * 1.01 + 1
+    )
+
+
+def covers_points(area: BaseGeometry, lons: np.ndarray, lats: np.ndarray) -> np.ndarray:
+    """
+    Mask of the points inside or on the boundary of the area (ST_Covers)
+
+    Each polygon of the area is prepared (a spatial index over its edges,
+    so a point test is logarithmic in its vertex count) and only tested
+    against the points inside its bounding box.
+    """
+    covered = np.zeros(len(lons), dtype=bool)
+    for polygon in shapely.get_parts(area):
+        min_lon, min_lat, max_lon, max_lat = polygon.bounds
+        candidates = np.flatnonzero(
+            (lons >= min_lon) & (lons <= max_lon) & (lats >= min_lat) & (lats <= max_lat)
+        )
+        if not len(candidates):
+            continue
+
+        shapely.prepare(polygon)
+        covered[candidates] |= shapely.intersects_xy(polygon, lons[candidates], lats[candidates])
+
+    return covered
@@ -1,10 +1,19 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import Optional, List
+from sqlalchemy import and_, cast, func, select
+from sqlalchemy.engine import Row
+from typing import Optional, List, Iterator, Sequence
 from datetime import datetime
+from geoalchemy2 import Geography
 from geoalchemy2.functions import ST_GeogFromText, ST_DWithin, ST_Distance
 from app.models import User, PlatformType
 from app.schemas import UserCreate, UserUpdate
+from app.services.subscriber_index import subscriber_index
+from app.config import get_settings
+
+settings = get_settings()
+
+# Platforms alerts can be sent on; web users have no channel to push to
+ALERT_PLATFORMS = (PlatformType.whatsapp, PlatformType.telegram, PlatformType.sms)
 
 
 class UserService:
@@ -32,6 +41,7 @@ class UserService:
         db.add(user)
         db.commit()
         db.refresh(user)
+        subscriber_index.sync_user(user)
         return user
     
     @staticmethod
@@ -73,6 +83,10 @@ class UserService:
         user.last_active = datetime.utcnow()
         db.commit()
         db.refresh(user)
+        
+        if update_data.keys() & {'location', 'alert_subscribed', 'alert_radius_km'}:
+            subscriber_index.sync_user(user)
+        
         return user
     
     @staticmethod
@@ -93,24 +107,201 @@ class UserService:
         lat: float,
         lon: float,
         radius_km: float,
-        alert_subscribed_only: bool = True
+        alert_subscribed_only: bool = True,
+        honor_user_radius: bool = False
     ) -> List[User]:
-        """Get all users within a radius of a point"""
+        """
+        Get all users within a radius of a point
+        
+        With `honor_user_radius`, users whose own alert_radius_km reaches the
+        point are included as well.
+        """
+        if alert_subscribed_only:
+            batches = subscriber_index.search(lat, lon, radius_km, honor_user_radius)
+            if batches is not None:
+                return [
+                    user
+                    for user_ids in batches
+                    for user in db.query(User).filter(User.id.in_(user_ids))
+                ]
+        
         point_wkt = f'POINT({lon} {lat})'
         
-        query = db.query(User).filter(
-            ST_DWithin(
-                User.location,
-                ST_GeogFromText(point_wkt),
-                radius_km * 1000  # Convert km to meters
+        if honor_user_radius:
+            query = db.query(User).filter(*UserService._within_alert_radius(point_wkt, radius_km))
+        else:
+            query = db.query(User).filter(
+                ST_DWithin(
+                    User.location,
+                    ST_GeogFromText(point_wkt),
+                    radius_km * 1000  # Convert km to meters
+                )
             )
-        )
         
         if alert_subscribed_only:
             query = query.filter(User.alert_subscribed == True)
         
         return query.all()
     
+    @staticmethod
+    def _within_alert_radius(point_wkt: str, radius_km: float) -> tuple:
+        """
+        Filters matching users within `radius_km` or their own alert radius
+        
+        The first filter has a constant distance so it can use the spatial
+        index; the second applies each user's radius to what it returns.
+        """
+        point = ST_GeogFromText(point_wkt)
+        outer_km = max(radius_km, settings.ALERT_MAX_USER_RADIUS_KM)
+        user_radius_km = func.least(
+            func.coalesce(User.alert_radius_km, 0),
+            settings.ALERT_MAX_USER_RADIUS_KM
+        )
+        
+        return (
+            ST_DWithin(User.location, point, outer_km * 1000),
+            ST_DWithin(User.location, point, func.greatest(radius_km, user_radius_km) * 1000)
+        )
+    
+    @staticmethod
+    def stream_alert_recipients(
+        db: Session,
+        lat: float,
+        lon: float,
+        radius_km: float,
+        batch_size: int = 1000
+    ) -> Iterator[Row]:
+        """
+        Stream subscribed users to alert about a point, projected to the
+        columns needed for delivery (id, platform, platform_id, language_code)
+        
+        Only users on a platform alerts can be sent on (ALERT_PLATFORMS)
+        are streamed, so web-only users are never recorded as recipients.
+        
+        A user matches if they are within `radius_km` or within their own
+        alert_radius_km of the point.
+        
+        Matching ids come from the subscriber index when it is available, a
+        page at a time, and each page is then looked up by primary key.
+        Otherwise rows are fetched `batch_size` at a time through a
+        server-side cursor on a dedicated connection. Either way memory stays flat however many users match and
+        callers can keep committing on `db` while iterating.
+        """
+        columns = (User.id, User.platform, User.platform_id, User.language_code)
+        
+        batches = subscriber_index.search(
+            lat, lon, radius_km, honor_user_radius=True, batch_size=batch_size
+        )
+        if batches is not None:
+            for user_ids in batches:
+                yield from db.execute(
+                    select(*columns).where(
+                        User.id.in_(user_ids),
+                        User.platform.in_(ALERT_PLATFORMS)
+                    )
+                )
+            return
+        
+        point_wkt = f'POINT({lon} {lat})'
+        
+        query = select(*columns).where(
+            *UserService._within_alert_radius(point_wkt, radius_km),
+            User.alert_subscribed == True,
+            User.platform.in_(ALERT_PLATFORMS)
+        )
+        
+        with db.get_bind().connect() as connection:
+            result = connection.execution_options(
+                stream_results=True,
+                yield_per=batch_size
+            ).execute(query)
+            
+            for row in result:
+                yield row
+    
+    @staticmethod
+    def stream_area_recipients(
+        db: Session,
+        area,
+        batch_size: int = 1000
+    ) -> Iterator[Row]:
+        """
+        Stream subscribed users inside a polygon target area (shapely, lon/lat),
+        projected like stream_alert_recipients
+        
+        Uses the subscriber index and a prepared-geometry point-in-polygon
+        test when available. Otherwise the area is split with ST_Subdivide
+        into small pieces, each matched with ST_Covers on the users' spatial
+        index, so complex basins and wards never get tested vertex by vertex
+        against every user.
+        """
+        columns = (User.id, User.platform, User.platform_id, User.language_code)
+        
+        batches = subscriber_index.search_area(area, batch_size=batch_size)
+        if batches is not None:
+            for user_ids in batches:
+                yield from db.execute(
+                    select(*columns).where(
+                        User.id.in_(user_ids),
+                        User.platform.in_(ALERT_PLATFORMS)
+                    )
+                )
+            return
+        
+        pieces = select(
+            func.ST_Subdivide(
+                func.ST_GeomFromWKB(area.wkb, 4326),
+                settings.ALERT_AREA_SUBDIVIDE_MAX_VERTICES
+            ).label('geom')
+        ).subquery()
+        
+        # A user on the edge between two pieces matches both
+        query = select(*columns).distinct().join(
+            pieces, func.ST_Covers(cast(pieces.c.geom, Geography(srid=4326)), User.location)
+        ).where(
+            User.alert_subscribed == True,
+            User.platform.in_(ALERT_PLATFORMS)
+        )
+        
+        with db.get_bind().connect() as connection:
+            result = connection.execution_options(
+                stream_results=True,
+                yield_per=batch_size
+            ).execute(query)
+            
+            for row in result:
+                yield row
+    
+    @staticmethod
+    def count_alert_recipients(
+        db: Session,
+        lat: float,
+        lon: float,
+        radius_km: float,
+        filters: Sequence = (),
+        group_by: Sequence = ()
+    ) -> List[Row]:
+        """
+        Count the users stream_alert_recipients would yield for a point,
+        as (platform, language_code, *group_by, count) rows from one GROUP BY
+        
+        Runs entirely in Postgres on the spatial index; no user rows are
+        loaded. Users without a language are counted as 'en', the language
+        they are sent. `filters` narrows the users counted and `group_by`
+        splits the counts further.
+        """
+        point_wkt = f'POINT({lon} {lat})'
+        language = func.coalesce(User.language_code, 'en')
+        
+        return db.execute(
+            select(User.platform, language, *group_by, func.count()).where(
+                *UserService._within_alert_radius(point_wkt, radius_km),
+                User.alert_subscribed == True,
+                User.platform.in_(ALERT_PLATFORMS),
+                *filters
+            ).group_by(User.platform, language, *group_by)
+        ).all()
+    
     @staticmethod
     def update_last_active(db: Session, user_id: str) -> None:
         """Update user's last active timestamp"""
@@ -0,0 +1 @@
+# Workers package - standalone background worker processes
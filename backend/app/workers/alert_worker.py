@@ -0,0 +1,148 @@
+"""
+Alert delivery worker
+
+Consumes alert delivery jobs from RabbitMQ. Run as many copies as needed:
+
+    python -m app.workers.alert_worker
+
+Each job is acked only after its database changes are committed, so a
+worker that dies mid-job leaves the job on the queue for another worker.
+The channel uses publisher confirms, so an alert job is acked only after
+the broker has confirmed every batch job split from it. A job that fails
+is republished to its lane's retry queue and comes back after
+ALERT_JOB_RETRY_DELAY_SECONDS; after ALERT_JOB_MAX_ATTEMPTS it is parked
+in the alert_delivery.failed queue rather than dropped.
+
+Alerts are sent over provider connections kept open for the life of the
+worker (see AlertDispatcher), so batch jobs do not repeat TCP and TLS
+handshakes.
+
+Jobs are taken one at a time from the per-level lanes: emergency jobs
+first, the other lanes by weighted fair share (see LaneScheduler). Large
+alerts are split into batch jobs, so an emergency preempts a large
+advisory at the next batch boundary.
+
+The lanes are polled (basic_get) rather than consumed, since a consumer's
+prefetched messages would bypass the scheduler. An idle worker checks the
+lanes every ALERT_LANE_POLL_INTERVAL_SECONDS, which bounds the extra
+latency of a new job and the idle load (one passive declare per lane) on
+the broker.
+"""
+import json
+import time
+import pika
+from app.config import get_settings
+from app.database import SessionLocal
+from app.services.alert_dispatcher import alert_dispatcher
+from app.services.alert_queue import alert_queue, lane_queue, LaneScheduler
+from app.services.alert_service import AlertService
+
+settings = get_settings()
+
+RECONNECT_DELAY_SECONDS = 5
+
+
+def handle_job(channel, job: dict) -> None:
+    """
+    Process one delivery job on a session owned by this worker
+    
+    `channel` is in confirm mode and batches are published as mandatory:
+    each publish returns once the broker has confirmed it, and raises if it
+    was nacked or unroutable, so the alert job fails (and is retried)
+    instead of being acked with batches lost.
+    """
+    db = SessionLocal()
+    try:
+        if job["type"] == "alert":
+            AlertService.prepare_delivery(db, job["alert_id"])
+            batches = AlertService.iter_pending_batches(
+                db,
+                job["alert_id"],
+                batch_size=settings.ALERT_DELIVERY_BATCH_SIZE
+            )
+            count = alert_queue.publish_batches(channel, job["alert_id"], job["level"], batches)
+            print(f"📦 Alert {job['alert_id']} split into {count} batches")
+        
+        elif job["type"] == "batch":
+            stats = AlertService.deliver_batch(db, job["alert_id"], job["user_ids"])
+            print(f"✅ Alert {job['alert_id']} batch delivered: {stats}")
+        
+        else:
+            print(f"⚠️  Unknown job type: {job['type']}")
+    
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def on_message(channel, method, properties, body) -> None:
+    """
+    Ack after a job succeeds; a failed job is republished for a retry after
+    a delay (or parked once out of attempts) and then acked
+    """
+    try:
+        handle_job(channel, json.loads(body))
+    except Exception as e:
+        attempts = alert_queue.attempts(properties) + 1
+        print(f"❌ Alert job failed (attempt {attempts}, {e}): {body[:200]}")
+        try:
+            if not alert_queue.retry(channel, body, attempts):
+                print(f"🪦 Alert job parked after {attempts} attempts")
+        except pika.exceptions.AMQPError:
+            # Not republished: left unacked, so the broker requeues it on reconnect
+            raise
+    channel.basic_ack(delivery_tag=method.delivery_tag)
+
+
+def take_job(channel, scheduler: LaneScheduler):
+    """Fetch the next job from the lane chosen by the scheduler, or None if all are empty"""
+    level = scheduler.pick(alert_queue.ready_lanes(channel))
+    if level is None:
+        return None
+    
+    method, properties, body = channel.basic_get(queue=lane_queue(level))
+    if method is None:
+        # Another worker took it first
+        return None
+    return method, properties, body
+
+
+def main() -> None:
+    scheduler = LaneScheduler()
+    
+    while True:
+        connection = None
+        try:
+            connection = alert_queue.connect()
+            channel = connection.channel()
+            channel.confirm_delivery()
+            alert_queue.declare(channel)
+            
+            print("🚀 Alert worker consuming from the priority lanes")
+            while True:
+                job = take_job(channel, scheduler)
+                if job is None:
+                    # Keeps the connection's heartbeats going while idle
+                    connection.sleep(settings.ALERT_LANE_POLL_INTERVAL_SECONDS)
+                    continue
+                on_message(channel, *job)
+        
+        except (pika.exceptions.AMQPConnectionError, pika.exceptions.AMQPChannelError) as e:
+            print(f"⚠️  RabbitMQ connection lost ({e}), reconnecting in {RECONNECT_DELAY_SECONDS}s")
+            try:
+                if connection is not None and connection.is_open:
+                    connection.close()
+            except pika.exceptions.AMQPError:
+                pass
+            time.sleep(RECONNECT_DELAY_SECONDS)
+        
+        except KeyboardInterrupt:
+            break
+    
+    alert_dispatcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Alert retry worker
+
+Drains failed alert deliveries whose backoff has elapsed, one batch at a
+time, and sends coalesced follow-up alerts whose window has ended. Safe to
+run several copies:
+
+    python -m app.workers.retry_worker
+"""
+import time
+from app.config import get_settings
+from app.database import SessionLocal
+from app.services.alert_service import AlertService
+
+settings = get_settings()
+
+
+def drain_once() -> int:
+    """Retry one batch of due recipients, returning how many were attempted"""
+    db = SessionLocal()
+    try:
+        stats = AlertService.deliver_due_retries(db, settings.ALERT_DELIVERY_BATCH_SIZE)
+        if stats['total']:
+            print(f"🔁 Retried {stats['total']} alert recipients: {stats}")
+        return stats['total']
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Alert retry batch failed: {e}")
+        return 0
+    finally:
+        db.close()
+
+
+def fire_due_alerts() -> None:
+    """Send follow-up alerts whose coalesce window has ended"""
+    db = SessionLocal()
+    try:
+        AlertService.fire_due_alerts(db)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Coalesced alert dispatch failed: {e}")
+    finally:
+        db.close()
+
+
+def main() -> None:
+    print("🚀 Alert retry worker started")
+    while True:
+        try:
+            fire_due_alerts()
+            
+            # Keep draining while there is a backlog, otherwise poll
+            if drain_once() < settings.ALERT_DELIVERY_BATCH_SIZE:
+                time.sleep(settings.ALERT_RETRY_POLL_INTERVAL_SECONDS)
+        except KeyboardInterrupt:
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark alert fan-out against a local mock Telegram/WhatsApp server
+
+Compares the old one-request-at-a-time delivery loop with the async
+AlertDispatcher. The mock server answers every request after a fixed
+latency to simulate the round trip to the provider.
+
+Usage (from backend/):
+    python -m benchmarks.alert_fanout_benchmark --recipients 20000 --latency-ms 80
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DEBUG", "false")
+
+from app.models import PlatformType  # noqa: E402
+from app.bots.telegram_api import telegram  # noqa: E402
+from app.bots.whatsapp_api import whatsapp  # noqa: E402
+from app.services.alert_dispatcher import AlertDispatcher  # noqa: E402
+from app.services.rate_limiter import rate_limiter  # noqa: E402
+
+
+class MockProviderServer:
+    """
+    Minimal HTTP/1.1 keep-alive server that accepts any POST
+
+    Runs in its own process so it does not compete with the code under test
+    for the GIL.
+    """
+
+    def __init__(self, latency_ms: float, host: str = "127.0.0.1"):
+        self.latency = latency_ms / 1000
+        self.host = host
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        body = json.dumps({
+            "ok": True,
+            "result": {"message_id": 1},
+            "messages": [{"id": "wamid.benchmark"}]
+        }).encode()
+        try:
+            while True:
+                headers = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in headers.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+
+                await asyncio.sleep(self.latency)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+                    b"Connection: keep-alive\r\n\r\n" + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _serve(self, ports: multiprocessing.Queue):
+        loop = asyncio.new_event_loop()
+        server = loop.run_until_complete(
+            asyncio.start_server(self._handle, self.host, 0, backlog=1024)
+        )
+        ports.put(server.sockets[0].getsockname()[1])
+        loop.run_forever()
+
+    def start(self) -> str:
+        ports = multiprocessing.Queue()
+        process = multiprocessing.Process(target=self._serve, args=(ports,), daemon=True)
+        process.start()
+        return f"http://{self.host}:{ports.get()}"
+
+
+def make_recipients(count: int):
+    platforms = [PlatformType.telegram, PlatformType.whatsapp]
+    return [
+        SimpleNamespace(
+            id=str(i),
+            platform=platforms[i % 2],
+            platform_id=str(100000 + i),
+            language_code="en" if i % 3 else "sw"
+        )
+        for i in range(count)
+    ]
+
+
+def run_sequential(recipients) -> float:
+    """The previous delivery loop: one blocking request per recipient"""
+    start = time.perf_counter()
+    for recipient in recipients:
+        if recipient.platform == PlatformType.whatsapp:
+            whatsapp.send_message(recipient.platform_id, "benchmark")
+        else:
+            telegram.send_message(recipient.platform_id, "benchmark")
+    return time.perf_counter() - start
+
+
+def run_dispatcher(recipients, concurrency: int) -> float:
+    dispatcher = AlertDispatcher(concurrency={
+        PlatformType.telegram: concurrency,
+        PlatformType.whatsapp: concurrency,
+    })
+    start = time.perf_counter()
+    stats = dispatcher.run(recipients, lambda language: "benchmark")
+    elapsed = time.perf_counter() - start
+    assert stats['failed'] == 0, stats
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipients", type=int, default=20000)
+    parser.add_argument("--sequential-sample", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--concurrency", type=int, default=50, help="Per-platform limit")
+    parser.add_argument("--rate-limit", type=float, default=0,
+                        help="Per-platform messages/s (0 = unlimited, to measure the engine itself)")
+    args = parser.parse_args()
+
+    for limit in rate_limiter.limits.values():
+        limit.rate = args.rate_limit or 1e9
+        limit.chat_interval = 0
+
+    base_url = MockProviderServer(args.latency_ms).start()
+    telegram.base_url = f"{base_url}/bot"
+    telegram.enabled = True
+    whatsapp.api_url = base_url
+    whatsapp.api_key = "benchmark"
+    whatsapp.enabled = True
+
+    recipients = make_recipients(args.recipients)
+
+    sample = recipients[:args.sequential_sample]
+    sequential = run_sequential(sample)
+    sequential_rate = len(sample) / sequential
+    print(f"Sequential:  {sequential_rate:8.1f} msg/s "
+          f"(projected {args.recipients / sequential_rate / 60:.1f} min for {args.recipients})")
+
+    concurrent = run_dispatcher(recipients, args.concurrency)
+    concurrent_rate = args.recipients / concurrent
+    print(f"Dispatcher:  {concurrent_rate:8.1f} msg/s "
+          f"({concurrent:.1f} s for {args.recipients})")
+    print(f"Speed-up:    {concurrent_rate / sequential_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
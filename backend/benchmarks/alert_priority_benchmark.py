@@ -0,0 +1,169 @@
+"""
+Benchmark time-to-first-send per alert level under mixed alert traffic
+
+Simulates the alert workers in virtual time: alerts of every level arrive at
+random, each is expanded into batch jobs of ALERT_DELIVERY_BATCH_SIZE
+recipients, and a fixed pool of workers takes one job at a time. The same
+workload is run against:
+
+- FIFO: the previous single delivery queue
+- Lanes: one queue per alert level, scheduled by LaneScheduler (the code the
+  workers run)
+
+Time-to-first-send is the delay from an alert being queued to a worker
+starting its first batch. Provider latency and rate limits are folded into a
+fixed time per batch.
+
+Usage (from backend/):
+    python -m benchmarks.alert_priority_benchmark --workers 8 --utilization 0.9
+"""
+import argparse
+import heapq
+import os
+import random
+import statistics
+from collections import deque
+from dataclasses import dataclass
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DEBUG", "false")
+
+from app.config import get_settings  # noqa: E402
+from app.models import AlertLevel  # noqa: E402
+from app.services.alert_queue import ALERT_LANES, LaneScheduler  # noqa: E402
+
+settings = get_settings()
+
+# Share of alerts and typical recipient count per level: advisories are
+# common and cover wide areas, emergencies are rare and local
+LEVEL_MIX = {
+    AlertLevel.ADVISORY: (0.55, 50000),
+    AlertLevel.WATCH: (0.25, 10000),
+    AlertLevel.WARNING: (0.15, 5000),
+    AlertLevel.EMERGENCY: (0.05, 2000),
+}
+
+
+@dataclass
+class SimAlert:
+    id: int
+    level: AlertLevel
+    recipients: int
+    queued_at: float
+
+
+def make_alerts(count: int, rate: float, seed: int = 11):
+    rng = random.Random(seed)
+    levels = list(LEVEL_MIX)
+    weights = [LEVEL_MIX[level][0] for level in levels]
+    alerts, now = [], 0.0
+    for i in range(count):
+        now += rng.expovariate(rate)
+        level = rng.choices(levels, weights)[0]
+        recipients = max(1, int(rng.expovariate(1 / LEVEL_MIX[level][1])))
+        alerts.append(SimAlert(i, level, recipients, now))
+    return alerts
+
+
+class FifoQueue:
+    def __init__(self):
+        self.jobs = deque()
+
+    def put(self, level, job):
+        self.jobs.append(job)
+
+    def take(self):
+        return self.jobs.popleft() if self.jobs else None
+
+
+class LaneQueues:
+    def __init__(self):
+        self.lanes = {level: deque() for level in ALERT_LANES}
+        self.scheduler = LaneScheduler()
+
+    def put(self, level, job):
+        self.lanes[level].append(job)
+
+    def take(self):
+        level = self.scheduler.pick({level for level, jobs in self.lanes.items() if jobs})
+        return self.lanes[level].popleft() if level else None
+
+
+def simulate(alerts, queue, workers: int, batch_seconds: float, expand_seconds: float):
+    """Run the workload and return {level: [time-to-first-send, ...]}"""
+    batch_size = settings.ALERT_DELIVERY_BATCH_SIZE
+    events = [(alert.queued_at, alert.id, "queued", ("alert", alert)) for alert in alerts]
+    heapq.heapify(events)
+    seq, idle = len(alerts), workers
+    first_send = {}
+
+    while events:
+        now, _, kind, job = heapq.heappop(events)
+        if kind == "queued":
+            queue.put(job[1].level, job)
+        else:
+            idle += 1
+            if job[0] == "alert":
+                alert = job[1]
+                for _ in range(-(-alert.recipients // batch_size)):
+                    queue.put(alert.level, ("batch", alert))
+
+        while idle:
+            job = queue.take()
+            if job is None:
+                break
+            idle -= 1
+            kind, alert = job
+            if kind == "batch" and alert.id not in first_send:
+                first_send[alert.id] = now - alert.queued_at
+            duration = expand_seconds if kind == "alert" else batch_seconds
+            seq += 1
+            heapq.heappush(events, (now + duration, seq, "done", job))
+
+    waits = {level: [] for level in ALERT_LANES}
+    for alert in alerts:
+        waits[alert.level].append(first_send[alert.id])
+    return waits
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--alerts", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--batch-seconds", type=float, default=6.0,
+                        help="Time to send one batch (batch size / per-worker send rate)")
+    parser.add_argument("--expand-seconds", type=float, default=0.5)
+    parser.add_argument("--utilization", type=float, default=0.9,
+                        help="Average share of worker time the workload needs")
+    args = parser.parse_args()
+
+    batch_size = settings.ALERT_DELIVERY_BATCH_SIZE
+    mean_seconds = sum(
+        share * (args.expand_seconds + args.batch_seconds * size / batch_size)
+        for share, size in LEVEL_MIX.values()
+    )
+    rate = args.utilization * args.workers / mean_seconds
+    alerts = make_alerts(args.alerts, rate)
+
+    results = {
+        "FIFO": simulate(alerts, FifoQueue(), args.workers, args.batch_seconds, args.expand_seconds),
+        "Lanes": simulate(alerts, LaneQueues(), args.workers, args.batch_seconds, args.expand_seconds),
+    }
+
+    print(f"{args.alerts} alerts, {args.workers} workers, {args.utilization:.0%} utilization, "
+          f"{args.batch_seconds}s per batch of {batch_size}")
+    print(f"{'Level':<10} {'FIFO p50':>10} {'FIFO p99':>10} {'Lanes p50':>10} {'Lanes p99':>10}")
+    for level in ALERT_LANES:
+        fifo, lanes = results["FIFO"][level], results["Lanes"][level]
+        print(f"{level.value:<10} {statistics.median(fifo):9.1f}s {percentile(fifo, 0.99):9.1f}s "
+              f"{statistics.median(lanes):9.1f}s {percentile(lanes, 0.99):9.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark SMS fallback throughput: bulk requests vs one request per number
+
+Sends an alert to SMS recipients through the AlertDispatcher using the local
+stub SMS provider, which answers every request after a fixed latency. Runs
+once with one number per request (the Twilio model) and once with up to
+SMS_BULK_BATCH_SIZE numbers per request (the Africa's Talking model).
+
+Usage (from backend/):
+    python -m benchmarks.sms_bulk_benchmark --recipients 20000 --latency-ms 300
+"""
+import argparse
+import os
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DEBUG", "false")
+
+from app.models import PlatformType  # noqa: E402
+from app.integrations.sms import sms, StubSMSProvider  # noqa: E402
+from app.services.alert_dispatcher import AlertDispatcher  # noqa: E402
+
+
+def make_recipients(count: int):
+    return [
+        SimpleNamespace(
+            id=str(i),
+            platform=PlatformType.sms,
+            platform_id=str(i),
+            phone_number=f"+2547{i:08d}",
+            language_code="en" if i % 3 else "sw"
+        )
+        for i in range(count)
+    ]
+
+
+def run(recipients, provider: StubSMSProvider, concurrency: int):
+    sms.provider, sms.enabled = provider, True
+    dispatcher = AlertDispatcher(concurrency={
+        PlatformType.telegram: 1,
+        PlatformType.whatsapp: 1,
+        PlatformType.sms: concurrency,
+    })
+    start = time.perf_counter()
+    stats = dispatcher.run(recipients, lambda language: f"benchmark {language}")
+    elapsed = time.perf_counter() - start
+    assert stats['sms'] == len(recipients), stats
+    return elapsed, len(provider.requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipients", type=int, default=20000)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--concurrency", type=int, default=5, help="Parallel SMS requests")
+    parser.add_argument("--bulk-size", type=int, default=500)
+    args = parser.parse_args()
+
+    recipients = make_recipients(args.recipients)
+
+    for name, max_recipients in [("Per number", 1), ("Bulk", args.bulk_size)]:
+        elapsed, requests = run(
+            recipients,
+            StubSMSProvider(max_recipients=max_recipients, latency_ms=args.latency_ms),
+            args.concurrency
+        )
+        print(f"{name:<11} {args.recipients / elapsed:9.1f} SMS/s  "
+              f"({requests} requests, {elapsed:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
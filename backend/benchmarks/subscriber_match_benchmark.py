@@ -0,0 +1,178 @@
+"""
+Benchmark matching incidents against each subscriber's own alert radius
+
+Loads synthetic subscribers into a separate Redis subscriber index (radius
+classes of 1 km) and times recipient matching for random incidents against:
+
+- Single set: one GEOSEARCH at the largest possible radius, then a Python
+  filter on each candidate's personal radius
+- Brute force: numpy haversine over every subscriber (also the reference
+  result used to check the index)
+
+Needs a reachable Redis (REDIS_URL). Keys use the "benchmark:subscribers"
+prefix and are deleted afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.subscriber_match_benchmark --users 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DEBUG", "false")
+
+import numpy as np  # noqa: E402
+from app.redis_client import get_redis  # noqa: E402
+from app.services.subscriber_index import SubscriberIndex  # noqa: E402
+
+# Earth radius used by Redis GEO commands, so the reference matches exactly
+EARTH_RADIUS_KM = 6372.7976
+
+# Roughly the Nairobi metropolitan area
+CENTER_LAT, CENTER_LON, SPREAD_DEG = -1.29, 36.82, 0.6
+
+
+def make_subscribers(count: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    lats = CENTER_LAT + rng.uniform(-SPREAD_DEG, SPREAD_DEG, count)
+    lons = CENTER_LON + rng.uniform(-SPREAD_DEG, SPREAD_DEG, count)
+    # Bot users pick 1-20 km; most keep small radii
+    radii = np.minimum(20, rng.geometric(0.15, count))
+    return lats, lons, radii
+
+
+def haversine_km(lat, lon, lats, lons):
+    lat, lon, lats, lons = map(np.radians, (lat, lon, lats, lons))
+    a = (np.sin((lats - lat) / 2) ** 2
+         + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def load_index(index: SubscriberIndex, client, lats, lons, radii, chunk: int = 20000) -> float:
+    start = time.perf_counter()
+    index.clear(client)
+    for offset in range(0, len(lats), chunk):
+        index.add_many(client, [
+            (str(i), float(lons[i]), float(lats[i]), int(radii[i]))
+            for i in range(offset, min(offset + chunk, len(lats)))
+        ])
+    client.set(index.ready_key, 1)
+    return time.perf_counter() - start
+
+
+def single_set_search(client, key, radii, lat, lon, alert_radius_km, max_user_radius):
+    """One GEOSEARCH at the widest radius, then filter on each user's radius"""
+    matches = client.geosearch(
+        key,
+        longitude=lon,
+        latitude=lat,
+        radius=max(alert_radius_km, max_user_radius),
+        unit="km",
+        withdist=True
+    )
+    return [
+        user_id for user_id, distance in matches
+        if distance <= max(alert_radius_km, radii[int(user_id)])
+    ]
+
+
+def timed(fn, runs):
+    times, result = [], None
+    for args in runs:
+        start = time.perf_counter()
+        result = fn(*args)
+        times.append((time.perf_counter() - start) * 1000)
+    return times, result
+
+
+def report(name, times):
+    times = sorted(times)
+    p95 = times[int(len(times) * 0.95) - 1]
+    print(f"{name:<14} median {statistics.median(times):8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--incidents", type=int, default=50)
+    parser.add_argument("--alert-radius-km", type=float, default=5.0)
+    args = parser.parse_args()
+
+    client = get_redis()
+    if client is None:
+        raise SystemExit("Redis is not available (set REDIS_URL)")
+
+    lats, lons, radii = make_subscribers(args.users)
+    max_user_radius = int(radii.max())
+
+    index = SubscriberIndex(prefix="benchmark:subscribers")
+    single_key = "benchmark:subscribers:single"
+
+    try:
+        elapsed = load_index(index, client, lats, lons, radii)
+        print(f"Loaded {args.users} subscribers into radius classes in {elapsed:.1f} s")
+
+        client.delete(single_key)
+        for offset in range(0, args.users, 20000):
+            values = []
+            for i in range(offset, min(offset + 20000, args.users)):
+                values.extend((float(lons[i]), float(lats[i]), str(i)))
+            client.geoadd(single_key, values)
+
+        rng = random.Random(7)
+        incidents = [
+            (CENTER_LAT + rng.uniform(-SPREAD_DEG, SPREAD_DEG),
+             CENTER_LON + rng.uniform(-SPREAD_DEG, SPREAD_DEG))
+            for _ in range(args.incidents)
+        ]
+
+        bucket_times, _ = timed(
+            lambda lat, lon: list(index.search(lat, lon, args.alert_radius_km)),
+            incidents
+        )
+        single_times, _ = timed(
+            lambda lat, lon: single_set_search(
+                client, single_key, radii, lat, lon, args.alert_radius_km, max_user_radius
+            ),
+            incidents
+        )
+        brute_times, _ = timed(
+            lambda lat, lon: np.nonzero(
+                haversine_km(lat, lon, lats, lons) <= np.maximum(args.alert_radius_km, radii)
+            )[0],
+            incidents
+        )
+
+        # Check the index against the brute-force reference. Redis stores
+        # positions as 52-bit geohashes, so users within a metre of their
+        # radius may land on either side
+        mismatched, matched = 0, 0
+        for lat, lon in incidents:
+            expected = set(map(str, np.nonzero(
+                haversine_km(lat, lon, lats, lons) <= np.maximum(args.alert_radius_km, radii)
+            )[0]))
+            found = {
+                user_id
+                for user_ids in index.search(lat, lon, args.alert_radius_km)
+                for user_id in user_ids
+            }
+            mismatched += len(expected ^ found)
+            matched += len(expected)
+
+        print(f"Average recipients per incident: {matched / len(incidents):.0f} "
+              f"({mismatched} boundary mismatches in total)")
+        report("Radius classes", bucket_times)
+        report("Single set", single_times)
+        report("Brute force", brute_times)
+
+    finally:
+        index.clear(client)
+        client.delete(index.ready_key, single_key)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+-- Migration: Track send attempts per alert recipient
+-- Lets queue workers skip recipients that were already sent to when a
+-- delivery batch is redelivered after a worker restart
+
+ALTER TABLE alert_recipients ADD COLUMN IF NOT EXISTS attempts INTEGER DEFAULT 0;
+
+-- Existing rows were all sent by the in-process delivery loop
+UPDATE alert_recipients SET attempts = 1 WHERE attempts = 0;
+
+COMMENT ON COLUMN alert_recipients.attempts IS 'Number of send attempts made for this recipient';
@@ -0,0 +1,7 @@
+-- Migration: Per-user alert frequency cap
+-- Recipients over their cap are held back and sent one digest message
+-- covering all their held-back alerts when the cap window rolls over
+
+ALTER TABLE alert_recipients ADD COLUMN IF NOT EXISTS digest BOOLEAN DEFAULT FALSE;
+
+COMMENT ON COLUMN alert_recipients.digest IS 'Held back by the frequency cap, waiting to be sent in a digest';
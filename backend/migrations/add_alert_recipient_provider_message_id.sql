@@ -0,0 +1,11 @@
+-- Migration: Track provider message ids for alert recipients
+-- WhatsApp status callbacks (delivered/read/failed) refer to the message id
+-- returned when the alert was sent, so keep it on the recipient row
+
+ALTER TABLE alert_recipients ADD COLUMN IF NOT EXISTS provider_message_id VARCHAR(128);
+
+CREATE INDEX IF NOT EXISTS idx_alert_recipients_provider_message_id
+    ON alert_recipients (provider_message_id)
+    WHERE provider_message_id IS NOT NULL;
+
+COMMENT ON COLUMN alert_recipients.provider_message_id IS 'Provider message id of the last send, matched against delivery/read status callbacks';
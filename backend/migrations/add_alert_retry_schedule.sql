@@ -0,0 +1,22 @@
+-- Migration: Automatic retries for failed alert deliveries
+-- Failed recipients get a next_retry_at with exponential backoff; after the
+-- maximum number of attempts they are copied to alert_dead_letters
+
+ALTER TABLE alert_recipients ADD COLUMN IF NOT EXISTS next_retry_at TIMESTAMP WITH TIME ZONE;
+
+-- Only scheduled retries are indexed, delivered rows never have a value
+CREATE INDEX IF NOT EXISTS idx_alert_recipients_next_retry_at
+    ON alert_recipients(next_retry_at) WHERE next_retry_at IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS alert_dead_letters (
+    alert_id VARCHAR(36) NOT NULL REFERENCES alerts(id),
+    user_id VARCHAR(36) NOT NULL REFERENCES users(id),
+    attempts INTEGER NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (alert_id, user_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_alert_dead_letters_created_at ON alert_dead_letters(created_at);
+
+COMMENT ON COLUMN alert_recipients.next_retry_at IS 'When the next delivery retry is due (NULL if delivered or dead-lettered)';
+COMMENT ON TABLE alert_dead_letters IS 'Alert recipients that failed every retry attempt';
@@ -0,0 +1,7 @@
+-- Migration: Polygon alert targeting
+-- Alerts can target an arbitrary area (river basin, ward) instead of a
+-- circle around the incident; recipients are the subscribers inside it
+
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS target_area GEOGRAPHY(MULTIPOLYGON, 4326);
+
+COMMENT ON COLUMN alerts.target_area IS 'Polygon target area; when set, replaces affected_radius_km for recipient matching';
@@ -0,0 +1,25 @@
+-- Migration: Track which users each incident has alerted, and at what level
+-- Follow-up alerts for an incident only go to newly covered users or users
+-- whose alert level escalated
+
+CREATE TABLE IF NOT EXISTS incident_coverage (
+    incident_id VARCHAR(36) NOT NULL REFERENCES incidents(id),
+    user_id VARCHAR(36) NOT NULL REFERENCES users(id),
+    alert_id VARCHAR(36) NOT NULL REFERENCES alerts(id),
+    alert_level alertlevel NOT NULL,
+    alerted_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (incident_id, user_id)
+);
+
+-- Backfill from alerts already sent, keeping each user's highest level
+-- (alertlevel values are declared in escalation order)
+INSERT INTO incident_coverage (incident_id, user_id, alert_id, alert_level, alerted_at)
+SELECT DISTINCT ON (a.incident_id, ar.user_id)
+    a.incident_id, ar.user_id, a.id, a.severity, a.created_at
+FROM alert_recipients ar
+JOIN alerts a ON a.id = ar.alert_id
+WHERE a.incident_id IS NOT NULL
+ORDER BY a.incident_id, ar.user_id, a.severity DESC, a.created_at DESC
+ON CONFLICT DO NOTHING;
+
+COMMENT ON TABLE incident_coverage IS 'Users alerted about each incident and the highest alert level they received';
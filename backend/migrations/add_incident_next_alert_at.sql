@@ -0,0 +1,10 @@
+-- Migration: Coalesced follow-up alerts per incident
+-- Changes at an incident's current alert level are folded into one
+-- follow-up alert, due at next_alert_at
+
+ALTER TABLE incidents ADD COLUMN IF NOT EXISTS next_alert_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS idx_incidents_next_alert_at
+    ON incidents(next_alert_at) WHERE next_alert_at IS NOT NULL;
+
+COMMENT ON COLUMN incidents.next_alert_at IS 'When the pending coalesced follow-up alert is due (NULL if none)';
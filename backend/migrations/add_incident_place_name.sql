@@ -0,0 +1,6 @@
+-- Migration: Store the reverse-geocoded place name on incidents
+-- Alert messages read it instead of geocoding for every delivery
+
+ALTER TABLE incidents ADD COLUMN IF NOT EXISTS place_name VARCHAR(255);
+
+COMMENT ON COLUMN incidents.place_name IS 'Human-readable location, reverse-geocoded once from the incident point';
@@ -0,0 +1,22 @@
+"""
+Rebuild the Redis subscriber index from the users table
+
+Run after restoring Redis, after bulk user imports, or whenever the index
+has been marked stale:
+
+    python rebuild_subscriber_index.py
+"""
+from app.database import SessionLocal
+from app.services.subscriber_index import subscriber_index
+
+
+def rebuild():
+    db = SessionLocal()
+    try:
+        subscriber_index.rebuild(db)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rebuild()
@@ -0,0 +1,53 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from app.models import AlertLevel
+from app.services.alert_policy import AlertPolicy, AlertAction
+
+
+@pytest.fixture
+def policy():
+    return AlertPolicy(coalesce_window=timedelta(minutes=15))
+
+
+@pytest.fixture
+def now():
+    return datetime(2024, 4, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.mark.unit
+class TestAlertPolicy:
+    """Unit tests for the incident alert debounce/escalation policy"""
+
+    def test_first_alert_sends(self, policy, now):
+        """Test an incident that never alerted alerts immediately"""
+        decision = policy.decide(AlertLevel.ADVISORY, None, None, now)
+        assert decision.action == AlertAction.SEND
+
+    def test_escalation_sends_immediately(self, policy, now):
+        """Test escalation bypasses the coalesce window"""
+        decision = policy.decide(
+            AlertLevel.EMERGENCY, AlertLevel.WARNING, now - timedelta(minutes=1), now
+        )
+        assert decision.action == AlertAction.SEND
+
+    def test_same_level_is_coalesced(self, policy, now):
+        """Test same-level changes inside the window defer to its end"""
+        last_alert_at = now - timedelta(minutes=5)
+        decision = policy.decide(AlertLevel.WARNING, "warning", last_alert_at, now)
+
+        assert decision.action == AlertAction.DEFER
+        assert decision.due_at == last_alert_at + timedelta(minutes=15)
+
+    def test_same_level_after_window_sends(self, policy, now):
+        """Test a same-level follow-up is allowed once the window has passed"""
+        decision = policy.decide(
+            AlertLevel.WARNING, AlertLevel.WARNING, now - timedelta(minutes=20), now
+        )
+        assert decision.action == AlertAction.SEND
+
+    def test_lower_level_is_suppressed(self, policy, now):
+        """Test de-escalation does not alert"""
+        decision = policy.decide(
+            AlertLevel.WATCH, AlertLevel.EMERGENCY, now - timedelta(hours=2), now
+        )
+        assert decision.action == AlertAction.SUPPRESS
@@ -0,0 +1,44 @@
+import pytest
+from types import SimpleNamespace
+from app.models import AlertLevel
+from app.services.alert_queue import alert_queue, retry_queue, ALERT_FAILED_QUEUE
+from app.workers import alert_worker
+
+
+class FakeChannel:
+    """Records publishes, acks and nacks"""
+
+    def __init__(self):
+        self.published = []
+        self.acked = []
+
+    def basic_publish(self, exchange, routing_key, body, properties, mandatory=False):
+        self.published.append((routing_key, body, properties.headers["x-attempts"]))
+
+    def basic_ack(self, delivery_tag):
+        self.acked.append(delivery_tag)
+
+
+@pytest.mark.unit
+class TestAlertJobRetry:
+    """Unit tests for retrying failed alert delivery jobs"""
+
+    def test_failed_job_retried_then_parked(self, monkeypatch):
+        """Test a failing job goes to its lane's retry queue until out of attempts, then is parked"""
+        def fail(channel, job):
+            raise RuntimeError("database unavailable")
+
+        monkeypatch.setattr(alert_worker, "handle_job", fail)
+        monkeypatch.setattr(alert_queue, "max_attempts", 2)
+        channel = FakeChannel()
+        body = b'{"type": "batch", "alert_id": "a1", "level": "watch", "user_ids": []}'
+        method = SimpleNamespace(delivery_tag=1)
+
+        alert_worker.on_message(channel, method, SimpleNamespace(headers=None), body)
+        alert_worker.on_message(channel, method, SimpleNamespace(headers={"x-attempts": 1}), body)
+
+        assert channel.published == [
+            (retry_queue(AlertLevel.WATCH), body, 1),
+            (ALERT_FAILED_QUEUE, body, 2),
+        ]
+        assert channel.acked == [1, 1]
@@ -0,0 +1,159 @@
+import pytest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from app.models import AlertLevel
+from app.services import alert_service as alert_service_module
+from app.services import frequency_cap as frequency_cap_module
+from app.services.alert_service import AlertService
+from app.services.frequency_cap import FrequencyCap
+
+
+class FakePipeline:
+    """INCR/EXPIRE pipeline over a dict"""
+
+    def __init__(self, counts, sets):
+        self.counts = counts
+        self.sets = sets
+        self.results = []
+
+    def incr(self, key):
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.results.append(self.counts[key])
+
+    def expire(self, key, seconds):
+        self.results.append(True)
+
+    def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+        self.results.append(len(members))
+
+    def execute(self):
+        results, self.results = self.results, []
+        return results
+
+
+class FakeRedis:
+    def __init__(self):
+        self.counts = {}
+        self.sets = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self.counts, self.sets)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, ()))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time for the cap windows"""
+    clock = SimpleNamespace(now=datetime(2024, 4, 1, 12, 10, tzinfo=timezone.utc).timestamp())
+    monkeypatch.setattr(frequency_cap_module.time, "time", lambda: clock.now)
+    return clock
+
+
+@pytest.fixture
+def cap(monkeypatch, clock):
+    """Cap of 2 alerts per 30 minutes, counted in a fake Redis"""
+    client = FakeRedis()
+    monkeypatch.setattr(frequency_cap_module, "get_redis", lambda: client)
+    return FrequencyCap(limit=2, window_seconds=1800)
+
+
+def make_alert(level, place_name="Lagos Island", incident_id="incident-1"):
+    return SimpleNamespace(
+        id=f"alert-{level.value}-{incident_id}",
+        severity=level,
+        incident_id=incident_id,
+        incident=SimpleNamespace(place_name=place_name, report_count=3)
+    )
+
+
+@pytest.mark.unit
+class TestFrequencyCap:
+    """Unit tests for the per-user alert frequency cap"""
+
+    def test_next_window_start(self):
+        """Test capped users are released at the end of the fixed window"""
+        cap = FrequencyCap(limit=3, window_seconds=1800)
+        now = datetime(2024, 4, 1, 12, 10, tzinfo=timezone.utc).timestamp()
+
+        assert cap.next_window_start(now) == datetime(2024, 4, 1, 12, 30, tzinfo=timezone.utc)
+
+    def test_fails_open_without_redis(self, monkeypatch):
+        """Test nobody is capped when Redis is unavailable"""
+        monkeypatch.setattr(frequency_cap_module, "get_redis", lambda: None)
+        cap = FrequencyCap(limit=1, window_seconds=60)
+
+        assert cap.over_cap(["user1"] * 5) == set()
+
+    def test_caps_sends_inside_window(self, cap, clock):
+        """Test a user is capped once their alerts in the window exceed the limit, and released in the next"""
+        assert cap.over_cap(["user1", "user2"]) == set()
+        assert cap.over_cap(["user1"]) == set()
+        assert cap.over_cap(["user1", "user2"]) == {"user1"}
+
+        clock.now += 1800
+        assert cap.over_cap(["user1"]) == set()
+
+    def test_exempt_counts_but_never_caps(self, cap):
+        """Test exempt alerts (emergencies, digests) are not held back but use up the cap"""
+        assert cap.over_cap(["user1"] * 3, exempt=True) == set()
+        assert cap.over_cap(["user1"]) == {"user1"}
+
+    def test_over_cap_recipients_deferred_to_digest(self, cap, monkeypatch):
+        """Test deliver_batch's cap step holds back capped users for the digest and sends to the rest"""
+        monkeypatch.setattr(alert_service_module, "frequency_cap", cap)
+        deferred = []
+        monkeypatch.setattr(
+            AlertService, "_defer_to_digest",
+            staticmethod(lambda db, alert_id, user_ids: deferred.append((alert_id, sorted(user_ids))))
+        )
+        cap.over_cap(["user1", "user1"], exempt=True)
+        recipients = [SimpleNamespace(id="user1"), SimpleNamespace(id="user2")]
+        alert = make_alert(AlertLevel.WARNING)
+
+        sent = AlertService._hold_back_capped(None, alert, recipients)
+
+        assert [recipient.id for recipient in sent] == ["user2"]
+        assert deferred == [(alert.id, ["user1"])]
+
+    def test_emergency_never_deferred(self, cap, monkeypatch):
+        """Test capped users still get emergencies"""
+        monkeypatch.setattr(alert_service_module, "frequency_cap", cap)
+        monkeypatch.setattr(
+            AlertService, "_defer_to_digest",
+            staticmethod(lambda db, alert_id, user_ids: pytest.fail("emergency deferred"))
+        )
+        cap.over_cap(["user1", "user1"], exempt=True)
+        recipients = [SimpleNamespace(id="user1")]
+
+        assert AlertService._hold_back_capped(None, make_alert(AlertLevel.EMERGENCY), recipients) == recipients
+
+    def test_digest_lists_highest_level_per_incident(self):
+        """Test the digest shows each incident once, at its highest level, most severe first"""
+        alerts = [
+            make_alert(AlertLevel.WATCH, "Ikeja", "incident-2"),
+            make_alert(AlertLevel.WARNING, "Lagos Island", "incident-1"),
+            make_alert(AlertLevel.EMERGENCY, "Lagos Island", "incident-1"),
+            make_alert(AlertLevel.ADVISORY, None, "incident-3"),
+        ]
+
+        assert AlertService._render_digest(alerts, "en").split("\n") == [
+            "📋 FLOOD ALERT SUMMARY",
+            "",
+            "3 flood alerts near you:",
+            "• EMERGENCY: Lagos Island",
+            "• WATCH: Ikeja",
+            "• ADVISORY: affected area",
+            "",
+            "Stay alert and avoid flooded areas.",
+        ]
+
+    def test_capped_users_does_not_count(self, cap, monkeypatch):
+        """Test the dry-run lookup finds users at the cap without adding to their count"""
+        cap.over_cap(["user1", "user1", "user2"])
+
+        assert cap.capped_users() == {"user1"}
+        assert cap.capped_users() == {"user1"}
+        assert cap.over_cap(["user2"]) == set()
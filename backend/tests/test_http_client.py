@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+from app.bots.http_client import PooledHTTPClient
+
+
+@pytest.mark.unit
+class TestPooledHTTPClient:
+    """Unit tests for the bots' shared keep-alive HTTP clients"""
+
+    def test_session_is_shared(self):
+        """Test every sync call reuses one pooled session with the default headers"""
+        http = PooledHTTPClient(headers={"D360-API-KEY": "key"})
+
+        assert http.session is http.session
+        assert http.session.headers["D360-API-KEY"] == "key"
+        assert http.session.get_adapter("https://example.com")._pool_maxsize == http.pool_size
+
+    def test_async_client_pooled_on_application_loop(self):
+        """Test the application loop reuses one async client until it is closed"""
+        http = PooledHTTPClient()
+
+        async def clients():
+            http.start()
+            async with http.async_client() as first:
+                pass
+            async with http.async_client() as second:
+                pass
+            await http.aclose()
+            return first, second
+
+        first, second = asyncio.run(clients())
+        assert first is second and first.is_closed
+
+    def test_async_client_closed_on_other_loops(self):
+        """Test a loop other than the application's gets a client closed after use"""
+        http = PooledHTTPClient()
+
+        async def client():
+            async with http.async_client() as client:
+                assert not client.is_closed
+            return client
+
+        assert asyncio.run(client()).is_closed
+        assert http._pooled is None
+
+    def test_caller_client_left_open(self):
+        """Test a client passed in by the caller is used as is and not closed"""
+        http = PooledHTTPClient()
+
+        async def use(own):
+            async with http.async_client(own) as client:
+                assert client is own
+            return own
+
+        async def run():
+            import httpx
+            async with httpx.AsyncClient() as own:
+                return (await use(own)).is_closed
+
+        assert asyncio.run(run()) is False
@@ -0,0 +1,58 @@
+import pytest
+from types import SimpleNamespace
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point
+from app.services import incident_service as incident_service_module
+from app.services.incident_service import IncidentService
+
+
+class FakeSession:
+    """Records flushes and commits"""
+
+    def __init__(self):
+        self.flushes = 0
+        self.commits = 0
+
+    def flush(self):
+        self.flushes += 1
+
+    def commit(self):
+        self.commits += 1
+
+
+def make_incident():
+    return SimpleNamespace(id="incident-1", place_name=None, location=from_shape(Point(3.5, 6.25), srid=4326))
+
+
+@pytest.mark.unit
+class TestIncidentPlaceName:
+    """Unit tests for storing an incident's reverse-geocoded place name"""
+
+    def test_place_name_flushed_not_committed(self, monkeypatch):
+        """Test the place name is stored without ending the caller's transaction"""
+        monkeypatch.setattr(incident_service_module.geocoding, "reverse_geocode", lambda lat, lon: "Lagos Island")
+        db, incident = FakeSession(), make_incident()
+
+        assert IncidentService.ensure_place_name(db, incident) == "Lagos Island"
+        assert incident.place_name == "Lagos Island"
+        assert (db.flushes, db.commits) == (1, 0)
+
+    def test_coordinate_fallback_not_stored(self, monkeypatch):
+        """Test a failed lookup (coordinates returned) leaves the place name unset for a retry"""
+        monkeypatch.setattr(incident_service_module.geocoding, "reverse_geocode", lambda lat, lon: f"{lat}, {lon}")
+        db, incident = FakeSession(), make_incident()
+
+        assert IncidentService.ensure_place_name(db, incident) is None
+        assert incident.place_name is None
+        assert db.flushes == 0
+
+    def test_no_lookup_under_lock(self, monkeypatch):
+        """Test lookup=False stores an already resolved name without geocoding"""
+        def fail(lat, lon):
+            raise AssertionError("geocoded under lock")
+
+        monkeypatch.setattr(incident_service_module.geocoding, "reverse_geocode", fail)
+        db, incident = FakeSession(), make_incident()
+
+        assert IncidentService.ensure_place_name(db, incident, "Ikeja", lookup=False) == "Ikeja"
+        assert IncidentService.ensure_place_name(db, make_incident(), lookup=False) is None
@@ -0,0 +1,34 @@
+import pytest
+from collections import Counter
+from app.models import AlertLevel
+from app.services.alert_queue import LaneScheduler, ALERT_LANES
+
+
+@pytest.fixture
+def scheduler():
+    return LaneScheduler(weights={
+        AlertLevel.WARNING: 8,
+        AlertLevel.WATCH: 4,
+        AlertLevel.ADVISORY: 1,
+    })
+
+
+@pytest.mark.unit
+class TestLaneScheduler:
+    """Unit tests for priority lane scheduling of alert delivery jobs"""
+
+    def test_emergency_preempts(self, scheduler):
+        """Test the emergency lane is always served first when it has jobs"""
+        assert scheduler.pick(set(ALERT_LANES)) == AlertLevel.EMERGENCY
+        assert scheduler.pick({AlertLevel.EMERGENCY, AlertLevel.ADVISORY}) == AlertLevel.EMERGENCY
+
+    def test_weighted_fair_share(self, scheduler):
+        """Test busy lanes share workers by weight without starving advisories"""
+        ready = {AlertLevel.WARNING, AlertLevel.WATCH, AlertLevel.ADVISORY}
+        picks = Counter(scheduler.pick(ready) for _ in range(130))
+
+        assert picks == {AlertLevel.WARNING: 80, AlertLevel.WATCH: 40, AlertLevel.ADVISORY: 10}
+
+    def test_nothing_ready(self, scheduler):
+        """Test no lane is picked when every queue is empty"""
+        assert scheduler.pick(set()) is None
@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import pytest
+from app.services import rate_limiter as rate_limiter_module
+from app.services.rate_limiter import RateLimiter, PlatformLimit
+from app.models import PlatformType
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    """Rate limiter using in-process buckets only"""
+    monkeypatch.setattr(rate_limiter_module, "get_redis", lambda: None)
+    limiter = RateLimiter()
+    limiter.limits[PlatformType.telegram] = PlatformLimit(rate=10, chat_interval=1.0)
+    return limiter
+
+
+@pytest.mark.unit
+class TestRateLimiter:
+    """Unit tests for the outbound token-bucket rate limiter"""
+
+    def test_burst_then_paced(self, limiter):
+        """Test a full bucket allows a burst, then queues at the platform rate"""
+        waits = [limiter.reserve(PlatformType.telegram, f"chat{i}") for i in range(20)]
+
+        assert all(wait == 0 for wait in waits[:10])
+        assert waits[10] == pytest.approx(0.1, abs=0.02)
+        assert waits[19] == pytest.approx(1.0, abs=0.02)
+
+    def test_per_chat_interval(self, limiter):
+        """Test messages to the same chat are spaced by the chat interval"""
+        first = limiter.reserve(PlatformType.telegram, "chat1")
+        second = limiter.reserve(PlatformType.telegram, "chat1")
+
+        assert first == 0
+        assert second == pytest.approx(1.0, abs=0.02)
+
+    def test_penalize_pauses_platform(self, limiter):
+        """Test retry_after from the provider delays every following send"""
+        limiter.penalize(PlatformType.telegram, 5)
+
+        wait = limiter.reserve(PlatformType.telegram, "chat1")
+        assert wait == pytest.approx(5.1, abs=0.02)
+
+    def test_throughput_counts_recent_sends(self, limiter, monkeypatch):
+        """Test throughput reflects sends in the last window"""
+        now = 1_000_000
+        monkeypatch.setattr(rate_limiter_module.time, "time", lambda: now)
+        for _ in range(50):
+            limiter.record_sent(PlatformType.telegram)
+
+        now += 1
+        assert limiter.throughput(PlatformType.telegram) == pytest.approx(5.0)
+        assert limiter.stats()["telegram"]["limit_per_second"] == 10
+
+    def test_redis_scripts_registered_once(self, limiter, monkeypatch):
+        """Test reservations run the registered script (EVALSHA), not the script body each call"""
+        class FakeScript:
+            def __init__(self, client):
+                self.registered_client = client
+                self.calls = 0
+
+            def __call__(self, keys, args):
+                self.calls += 1
+                return "0"
+
+        class FakeRedis:
+            def __init__(self):
+                self.registered = []
+
+            def register_script(self, source):
+                self.registered.append(FakeScript(self))
+                return self.registered[-1]
+
+        client = FakeRedis()
+        monkeypatch.setattr(rate_limiter_module, "get_redis", lambda: client)
+        for i in range(3):
+            limiter.reserve(PlatformType.telegram, f"chat{i}")
+
+        assert len(client.registered) == 1
+        assert client.registered[0].calls == 3
+
+    def test_acquire_reserves_off_the_event_loop(self, limiter, monkeypatch):
+        """Test the async acquire does not make its Redis round trip on the event loop thread"""
+        threads = []
+        monkeypatch.setattr(limiter, "reserve", lambda platform, chat_id: threads.append(threading.get_ident()) or 0)
+
+        asyncio.run(limiter.acquire(PlatformType.telegram, "chat1"))
+
+        assert threads and threads[0] != threading.get_ident()
+
+    def test_sync_send_is_paced(self, limiter, monkeypatch):
+        """Test sync bot replies wait for the limiter before going out"""
+        from app.bots import telegram_api as telegram_api_module
+
+        class Response:
+            status_code = 200
+
+        api = telegram_api_module.TelegramAPI()
+        api.enabled, api.base_url = True, "https://api.telegram.invalid/bot"
+        reserved = []
+        monkeypatch.setattr(rate_limiter_module, "rate_limiter", limiter)
+        monkeypatch.setattr(limiter, "wait", lambda platform, chat_id: reserved.append((platform, chat_id)))
+        monkeypatch.setattr(api.http, "request", lambda method, url, **kwargs: Response())
+
+        assert api.send_message("chat1", "hello")
+        assert reserved == [(PlatformType.telegram, "chat1")]
+
+    def test_parse_retry_after(self):
+        """Test Retry-After is read as seconds or an HTTP-date, falling back to the default"""
+        from datetime import datetime, timedelta, timezone
+        from email.utils import format_datetime
+        from app.services.rate_limiter import parse_retry_after
+
+        retry_at = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+
+        assert parse_retry_after("5") == 5
+        assert parse_retry_after(3) == 3
+        assert parse_retry_after(retry_at) == pytest.approx(30, abs=2)
+        assert parse_retry_after("soon") == 1.0
+        assert parse_retry_after(None) == 1.0
@@ -0,0 +1,105 @@
+import pytest
+import redis
+from app.bots import session_manager as session_manager_module
+from app.bots.command_handlers import CommandHandler
+from app.bots.session_manager import MemorySessionStore, SessionManager
+
+
+class BrokenRedis:
+    """A Redis client whose server went away"""
+
+    def ping(self):
+        raise redis.ConnectionError("connection refused")
+
+    def hmget(self, key, names):
+        raise redis.ConnectionError("connection refused")
+
+
+@pytest.mark.unit
+class TestSessionManager:
+    """Unit tests for the process-wide bot session store"""
+
+    def test_shared_by_handlers(self):
+        """Test every command handler uses the one process-wide session manager"""
+        assert CommandHandler(db=None).session_manager is CommandHandler(db=None).session_manager
+
+    def test_memory_fallback_until_healthy(self, monkeypatch):
+        """Test a failed Redis command switches to memory until a health check passes"""
+        client = BrokenRedis()
+        monkeypatch.setattr(session_manager_module, "get_redis", lambda: client)
+        manager = SessionManager(health_check_interval=1)
+
+        assert manager.get_state("1", "telegram") is None
+        assert not manager.use_redis
+
+        manager.set_state("1", "telegram", "awaiting_location")
+        assert manager.get_state("1", "telegram") == "awaiting_location"
+
+        assert not manager.check_health()
+        monkeypatch.setattr(client, "ping", lambda: True)
+        assert manager.check_health() and manager.use_redis
+
+    def test_concurrent_messages_keep_each_others_changes(self, monkeypatch):
+        """Test two messages of one chat handled at once both keep their field changes"""
+        monkeypatch.setattr(session_manager_module, "get_redis", lambda: None)
+        manager = SessionManager()
+
+        with manager.context("1", "telegram") as session:
+            session.reset("awaiting_photos")
+            session.store_temp_data("severity", "high")
+
+        with manager.context("1", "telegram") as first, manager.context("1", "telegram") as second:
+            first.append_temp_data("image_urls", ["a.jpg"])
+            second.append_temp_data("image_urls", ["b.jpg"])
+            second.store_temp_data("description", "water at the knees")
+
+        session = manager.get_session("1", "telegram")
+        assert sorted(session["temp_data"]["image_urls"]) == ["a.jpg", "b.jpg"]
+        assert session["temp_data"]["severity"] == "high"
+        assert session["temp_data"]["description"] == "water at the knees"
+        assert session["state"] == "awaiting_photos"
+
+    def test_context_writes_nothing_on_failure(self, monkeypatch):
+        """Test a message that fails leaves the session as it was"""
+        monkeypatch.setattr(session_manager_module, "get_redis", lambda: None)
+        manager = SessionManager()
+        manager.set_state("1", "telegram", "awaiting_location")
+
+        with pytest.raises(RuntimeError):
+            with manager.context("1", "telegram") as session:
+                session.set_state("awaiting_severity")
+                raise RuntimeError("geocoder down")
+
+        assert manager.get_state("1", "telegram") == "awaiting_location"
+
+
+@pytest.mark.unit
+class TestMemorySessionStore:
+    """Unit tests for the bounded in-memory session fallback"""
+
+    def test_least_recently_used_evicted(self):
+        """Test the store never grows past its cap, dropping the least recently used session"""
+        store = MemorySessionStore(ttl=60, max_size=2)
+        store["a"] = {"state": "1"}
+        store["b"] = {"state": "2"}
+        store.get("a")
+        store["c"] = {"state": "3"}
+
+        assert sorted(store.keys()) == ["a", "c"]
+        assert store.stats()["evicted"] == 1
+
+    def test_sessions_expire(self, monkeypatch):
+        """Test sessions expire a TTL after their last write, like the Redis keys"""
+        clock = [1000.0]
+        monkeypatch.setattr(session_manager_module.time, "monotonic", lambda: clock[0])
+        store = MemorySessionStore(ttl=60, max_size=10)
+        store["a"] = {"state": "1"}
+        store["b"] = {"state": "2"}
+
+        clock[0] += 30
+        store["b"] = {"state": "3"}
+        clock[0] += 45
+
+        assert store.get("a") is None
+        assert store.get("b") == {"state": "3"}
+        assert store.stats() == {"sessions": 1, "max_sessions": 10, "expired": 1, "evicted": 0}
@@ -0,0 +1,139 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from app.models import PlatformType
+from app.integrations import sms as sms_module
+from app.integrations.sms import StubSMSProvider, normalize_phone_number
+from app.services import alert_dispatcher as dispatcher_module
+from app.services.alert_dispatcher import AlertDispatcher
+
+
+@pytest.fixture
+def stub_provider(monkeypatch):
+    """SMS through the local stub provider; every Telegram send fails"""
+    provider = StubSMSProvider(max_recipients=2)
+    monkeypatch.setattr(sms_module.sms, "provider", provider)
+    monkeypatch.setattr(sms_module.sms, "enabled", True)
+
+    async def failed_send(*args, **kwargs):
+        return False
+    monkeypatch.setattr(dispatcher_module.telegram, "send_message_async", failed_send)
+    return provider
+
+
+def recipient(i, platform, language="en", phone=None):
+    return SimpleNamespace(
+        id=f"user{i}",
+        platform=platform,
+        platform_id=str(i),
+        language_code=language,
+        phone_number=phone or f"+25470000000{i}"
+    )
+
+
+@pytest.mark.unit
+class TestSMSFallback:
+    """Unit tests for bulk SMS delivery and fallback"""
+
+    def test_bulk_per_message(self, stub_provider):
+        """Test SMS recipients are batched per message text and provider limit"""
+        recipients = [
+            recipient(1, PlatformType.sms),
+            recipient(2, PlatformType.sms),
+            recipient(3, PlatformType.sms),
+            recipient(4, PlatformType.sms, language="sw"),
+        ]
+
+        stats = AlertDispatcher().run(recipients, lambda language: f"alert-{language}")
+
+        assert stats["sms"] == 4
+        assert sorted(len(request["to"]) for request in stub_provider.requests) == [1, 1, 2]
+        assert {request["message"] for request in stub_provider.requests} == {"alert-en", "alert-sw"}
+
+    def test_fallback_after_failed_bot_send(self, stub_provider):
+        """Test failed bot sends go out by SMS, unless there is no real phone number"""
+        recipients = [
+            recipient(1, PlatformType.telegram),
+            recipient(2, PlatformType.telegram, phone="platform_2"),
+        ]
+        results = []
+
+        stats = AlertDispatcher().run(recipients, lambda language: "alert", on_batch=results.extend)
+
+        assert stats == {"total": 2, "whatsapp": 0, "telegram": 0, "sms": 1, "failed": 1}
+        assert [result.platform for result in results] == [PlatformType.sms, PlatformType.sms]
+        assert [result.delivered for result in results] == [True, False]
+
+    def test_clients_kept_across_runs(self, monkeypatch):
+        """Test runs reuse the same shard clients until the dispatcher is closed"""
+        clients = []
+
+        async def send(chat_id, message, client=None):
+            clients.append(client)
+            return True
+        monkeypatch.setattr(dispatcher_module.telegram, "send_message_async", send)
+        dispatcher = AlertDispatcher(concurrency={
+            PlatformType.telegram: 1,
+            PlatformType.whatsapp: 1,
+            PlatformType.sms: 1,
+        })
+
+        dispatcher.run([recipient(1, PlatformType.telegram)], lambda language: "alert")
+        dispatcher.run([recipient(2, PlatformType.telegram)], lambda language: "alert")
+        dispatcher.close()
+
+        assert clients[0] is clients[1]
+        assert clients[0].is_closed
+
+    def test_normalize_phone_number(self):
+        """Test only real international numbers are used"""
+        assert normalize_phone_number("254 700-000001") == "+254700000001"
+        assert normalize_phone_number("platform_12345") is None
+
+    def test_shared_number_reaches_every_recipient(self, stub_provider):
+        """Test recipients sharing a phone number get one SMS and all share its result"""
+        recipients = [
+            recipient(1, PlatformType.sms, phone="+254700000001"),
+            recipient(2, PlatformType.sms, phone="254 700-000001"),
+        ]
+        results = []
+
+        stats = AlertDispatcher().run(recipients, lambda language: "alert", on_batch=results.extend)
+
+        assert stats["sms"] == 2
+        assert [request["to"] for request in stub_provider.requests] == [["+254700000001"]]
+        assert {result.provider_message_id for result in results} == {"stub-1-0"}
+
+    def test_twilio_requests_concurrent_and_isolated(self, monkeypatch):
+        """Test Twilio sends run in parallel up to the SMS concurrency and one bad response fails only its number"""
+        class Response:
+            def __init__(self, number):
+                self.status_code = 201
+                self.text = ""
+                self.number = number
+
+            def json(self):
+                if self.number.endswith("3"):
+                    raise ValueError("not JSON")
+                return {"sid": f"SM{self.number[-1]}"}
+
+        class Client:
+            in_flight = peak = 0
+
+            async def post(self, url, data, auth):
+                Client.in_flight += 1
+                Client.peak = max(Client.peak, Client.in_flight)
+                await asyncio.sleep(0.01)
+                Client.in_flight -= 1
+                return Response(data["To"])
+
+        provider = sms_module.TwilioProvider()
+        provider.concurrency = 2
+        numbers = [f"+25470000000{i}" for i in range(1, 6)]
+
+        results = asyncio.run(provider.send_bulk(Client(), numbers, "alert"))
+
+        assert Client.peak == 2
+        assert results["+254700000001"] == "SM1"
+        assert results["+254700000003"] is None
+        assert len(results) == 5
@@ -0,0 +1,126 @@
+import pytest
+from app.services.status_ingestor import StatusIngestor
+
+
+@pytest.mark.unit
+class TestStatusIngestor:
+    """Unit tests for buffering of delivery/read status callbacks"""
+
+    def test_callbacks_collapse_per_message(self):
+        """Test repeated callbacks for one message become a single buffered update"""
+        ingestor = StatusIngestor(max_buffer=100)
+        kept = ingestor.add_whatsapp_statuses([
+            {"id": "wamid.1", "status": "sent", "timestamp": "1700000000"},
+            {"id": "wamid.1", "status": "delivered", "timestamp": "1700000005"},
+            {"id": "wamid.1", "status": "read", "timestamp": "1700000060"},
+            {"id": "wamid.1", "status": "delivered", "timestamp": "1700000005"},
+        ])
+
+        assert kept == 3
+        assert ingestor.pending() == 1
+
+    def test_failure_ignored_after_delivery(self):
+        """Test a failed status does not override a delivery already buffered"""
+        ingestor = StatusIngestor(max_buffer=100)
+        ingestor.add_whatsapp_statuses([
+            {"id": "wamid.1", "status": "delivered", "timestamp": "1700000005"},
+            {"id": "wamid.1", "status": "failed", "timestamp": "1700000010"},
+            {"id": "wamid.2", "status": "failed", "timestamp": "1700000010"},
+        ])
+
+        statuses, failed, _ = ingestor._drain()
+        assert list(statuses) == ["wamid.1"]
+        assert list(failed) == ["wamid.2"]
+        assert ingestor.pending() == 0
+
+    def test_read_beats_delivered(self):
+        """Test a read keeps its own time next to the earliest delivery, in any order"""
+        ingestor = StatusIngestor(max_buffer=100)
+        ingestor.add_whatsapp_statuses([
+            {"id": "wamid.1", "status": "read", "timestamp": "1700000060"},
+            {"id": "wamid.1", "status": "delivered", "timestamp": "1700000010"},
+            {"id": "wamid.1", "status": "delivered", "timestamp": "1700000005"},
+            {"id": "wamid.1", "status": "failed", "timestamp": "1700000070"},
+        ])
+
+        statuses, failed, _ = ingestor._drain()
+        delivered_at, read_at = statuses["wamid.1"]
+        assert delivered_at.timestamp() == 1700000005
+        assert read_at.timestamp() == 1700000060
+        assert failed == {}
+
+    def test_unknown_statuses_ignored(self):
+        """Test callbacks without an id or with a status that changes nothing are not buffered"""
+        ingestor = StatusIngestor(max_buffer=100)
+        kept = ingestor.add_whatsapp_statuses([
+            {"status": "delivered", "timestamp": "1700000005"},
+            {"id": "wamid.1", "status": "sent", "timestamp": "1700000005"},
+            {"id": "wamid.2", "status": "deleted", "timestamp": "1700000005"},
+        ])
+
+        assert kept == 0
+        assert ingestor.pending() == 0
+
+    def test_failed_flush_rebuffers(self):
+        """Test a batch whose write fails is kept, merged with later callbacks, for the next flush"""
+        class FailingSession:
+            def execute(self, *args, **kwargs):
+                raise RuntimeError("database unavailable")
+
+            def rollback(self):
+                pass
+
+        ingestor = StatusIngestor(max_buffer=100)
+        ingestor.add_whatsapp_statuses([
+            {"id": "wamid.1", "status": "delivered", "timestamp": "1700000005"},
+            {"id": "wamid.2", "status": "failed", "timestamp": "1700000005"},
+        ])
+        ingestor.mark_read("alert-1", "user-1")
+
+        assert ingestor.flush(FailingSession()) == 0
+        assert ingestor.pending() == 3
+
+        ingestor.add_whatsapp_statuses([{"id": "wamid.2", "status": "read", "timestamp": "1700000060"}])
+        statuses, failed, reads = ingestor._drain()
+        assert set(statuses) == {"wamid.1", "wamid.2"}
+        assert failed == {}
+        assert list(reads) == [("alert-1", "user-1")]
+
+    def test_rebuffer_is_capped(self, monkeypatch):
+        """Test a failed batch beyond the retention cap is dropped"""
+        from app.services import status_ingestor as status_ingestor_module
+        monkeypatch.setattr(status_ingestor_module, "MAX_RETAINED_BUFFERS", 1)
+
+        ingestor = StatusIngestor(max_buffer=2)
+        ingestor.add_whatsapp_statuses([
+            {"id": f"wamid.{i}", "status": "delivered", "timestamp": "1700000005"} for i in range(5)
+        ])
+        statuses, failed, reads = ingestor._drain()
+
+        assert ingestor._restore(statuses, failed, reads) == 3
+        assert ingestor.pending() == 2
+
+    def test_unmatched_statuses_retried_until_ttl(self, monkeypatch):
+        """Test callbacks that beat their send's recorded message id are retried, then dropped after the TTL"""
+        class Session:
+            def commit(self):
+                pass
+
+            def rollback(self):
+                pass
+
+        monkeypatch.setattr(StatusIngestor, "_apply_statuses", staticmethod(lambda db, statuses: {"wamid.1"} & set(statuses)))
+        monkeypatch.setattr(StatusIngestor, "_apply_failures", staticmethod(lambda db, failed: set()))
+        ingestor = StatusIngestor(max_buffer=100)
+        ingestor.add_whatsapp_statuses([
+            {"id": "wamid.1", "status": "delivered", "timestamp": "1700000005"},
+            {"id": "wamid.2", "status": "delivered", "timestamp": "1700000005"},
+            {"id": "wamid.3", "status": "failed", "timestamp": "1700000005"},
+        ])
+
+        assert ingestor.flush(Session()) == 1
+        assert ingestor.pending() == 2
+
+        ingestor.unmatched_ttl = 0
+        assert ingestor.flush(Session()) == 2
+        assert ingestor.pending() == 0
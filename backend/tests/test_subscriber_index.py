@@ -0,0 +1,54 @@
+import pytest
+from app.services.subscriber_index import SubscriberIndex
+from app.services.target_area import parse_target_area
+
+WARD = {
+    "type": "Polygon",
+    "coordinates": [[[36.80, -1.30], [36.84, -1.30], [36.84, -1.26], [36.80, -1.26], [36.80, -1.30]]]
+}
+
+
+class FakeRedis:
+    """Stored GEOSEARCH results: key -> list of (user_id, lon, lat)"""
+
+    def __init__(self, results):
+        self.results = results
+
+    def zrange(self, key, start, end):
+        return [user_id for user_id, _, _ in self.results.get(key, [])[start:end + 1]]
+
+    def geopos(self, key, *user_ids):
+        positions = {user_id: (lon, lat) for user_id, lon, lat in self.results[key]}
+        return [positions[user_id] for user_id in user_ids]
+
+    def delete(self, *keys):
+        for key in keys:
+            self.results.pop(key, None)
+
+
+@pytest.mark.unit
+class TestSubscriberIndex:
+    """Unit tests for reading subscriber index search results"""
+
+    def test_results_read_in_pages(self):
+        """Test stored matches come back in batches and are deleted afterwards"""
+        client = FakeRedis({
+            "r0": [(f"user_{i}", 36.82, -1.28) for i in range(5)],
+            "r5": [("user_5", 36.82, -1.28)]
+        })
+
+        batches = list(SubscriberIndex()._read_results(client, ["r0", "r5"], batch_size=2))
+
+        assert batches == [["user_0", "user_1"], ["user_2", "user_3"], ["user_4"], ["user_5"]]
+        assert client.results == {}
+
+    def test_area_results_filtered_per_page(self):
+        """Test each page keeps only the members inside the area"""
+        client = FakeRedis({
+            "r0": [("inside", 36.82, -1.28), ("outside", 36.90, -1.28), ("edge", 36.80, -1.28)]
+        })
+        area = parse_target_area(WARD)
+
+        batches = list(SubscriberIndex()._read_results(client, ["r0"], batch_size=2, area=area))
+
+        assert batches == [["inside"], ["edge"]]
@@ -0,0 +1,36 @@
+import pytest
+import numpy as np
+from app.services.target_area import bounding_box_km, covers_points, parse_target_area
+
+WARD = {
+    "type": "Polygon",
+    "coordinates": [[[36.80, -1.30], [36.84, -1.30], [36.84, -1.26], [36.80, -1.26], [36.80, -1.30]]]
+}
+
+
+@pytest.mark.unit
+class TestTargetArea:
+    """Unit tests for polygon alert target areas"""
+
+    def test_parse_polygon(self):
+        """Test a GeoJSON polygon becomes a multipolygon and non-areas are rejected"""
+        area = parse_target_area(WARD)
+
+        assert area.geom_type == "MultiPolygon"
+        with pytest.raises(ValueError):
+            parse_target_area({"type": "Point", "coordinates": [36.8, -1.3]})
+
+    def test_covers_points(self):
+        """Test points inside or on the boundary match, like ST_Covers"""
+        area = parse_target_area(WARD)
+        lons = np.array([36.82, 36.80, 36.90])
+        lats = np.array([-1.28, -1.28, -1.28])
+
+        assert covers_points(area, lons, lats).tolist() == [True, True, False]
+
+    def test_bounding_box_holds_area(self):
+        """Test the search box is at least as large as the area"""
+        lon, lat, width_km, height_km = bounding_box_km(parse_target_area(WARD))
+
+        assert (lon, lat) == pytest.approx((36.82, -1.28))
+        assert width_km > 0.04 * 111.3 and height_km > 0.04 * 110.5
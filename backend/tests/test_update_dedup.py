@@ -0,0 +1,50 @@
+import pytest
+from app.bots import update_dedup as update_dedup_module
+from app.bots.update_dedup import UpdateDeduplicator
+from app.bots.update_processor import UpdateProcessor
+from app.models import PlatformType
+
+
+class FakeRedis:
+    """The SET NX / DELETE subset of redis.Redis"""
+
+    def __init__(self):
+        self.keys = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.keys:
+            return None
+        self.keys[key] = value
+        return True
+
+    def delete(self, key):
+        self.keys.pop(key, None)
+
+
+@pytest.mark.unit
+class TestUpdateDeduplicator:
+    """Unit tests for discarding redelivered webhook updates"""
+
+    def test_redelivered_update_skipped(self, monkeypatch):
+        """Test an update is handled once, and again only after a failed run"""
+        client = FakeRedis()
+        monkeypatch.setattr(update_dedup_module, "get_redis", lambda: client)
+        handled = []
+        monkeypatch.setattr(UpdateProcessor, "_handle_telegram_update", staticmethod(lambda *args: handled.append(args[0])))
+
+        for _ in range(3):
+            UpdateProcessor.process_telegram_update({"update_id": 7})
+        assert len(handled) == 1
+
+        def fail():
+            raise RuntimeError("provider down")
+        with pytest.raises(RuntimeError):
+            UpdateProcessor._once(PlatformType.whatsapp, "wamid.1", fail)
+        assert UpdateDeduplicator().claim("whatsapp", "wamid.1")
+
+    def test_fails_open_without_redis(self, monkeypatch):
+        """Test every update is handled when Redis is unavailable"""
+        monkeypatch.setattr(update_dedup_module, "get_redis", lambda: None)
+        dedup = UpdateDeduplicator(ttl_seconds=60)
+
+        assert dedup.claim("telegram", "7") and dedup.claim("telegram", "7")
@@ -0,0 +1,52 @@
+import asyncio
+import random
+import time
+import pytest
+from app.bots.update_processor import UpdateQueue, telegram_chat_key
+
+
+@pytest.mark.unit
+class TestUpdateQueue:
+    """Unit tests for background processing of bot webhook updates"""
+
+    def test_updates_handled_in_order_per_chat(self):
+        """Test each chat's updates run in arrival order while chats run in parallel"""
+        handled = []
+
+        def handle(payload, received_at):
+            time.sleep(random.random() / 1000)
+            handled.append(payload)
+
+        async def run():
+            queue = UpdateQueue(workers=4, max_pending=1000)
+            queue.start()
+            for seq in range(20):
+                for chat in range(10):
+                    assert queue.submit(f"telegram:{chat}", handle, (chat, seq))
+            await queue.stop()
+
+        asyncio.run(run())
+
+        assert len(handled) == 200
+        for chat in range(10):
+            assert [seq for c, seq in handled if c == chat] == list(range(20))
+
+    def test_submit_refused_when_full_or_stopped(self):
+        """Test updates are refused (for the provider to retry) instead of dropped"""
+        async def run():
+            queue = UpdateQueue(workers=1, max_pending=2)
+            assert not queue.submit("telegram:1", print, {})
+
+            queue.start()
+            results = [queue.submit("telegram:1", lambda *args: time.sleep(0.01), {}) for _ in range(4)]
+            await queue.stop()
+            return results
+
+        assert asyncio.run(run()).count(False) >= 1
+
+    def test_chat_key(self):
+        """Test updates are keyed by chat, whatever kind of update they are"""
+        assert telegram_chat_key({"update_id": 1, "message": {"chat": {"id": 42}}}) == "telegram:42"
+        assert telegram_chat_key(
+            {"update_id": 2, "callback_query": {"message": {"chat": {"id": 42}}}}
+        ) == "telegram:42"
@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import database
+from app.api import webhooks as webhooks_module
+from app.bots import update_dedup as update_dedup_module
+from app.bots import update_processor as update_processor_module
+from app.bots.update_processor import UpdateProcessor, whatsapp_chats
+from app.bots.whatsapp_api import whatsapp
+from app.models.models import BotMessage
+from app.services.status_ingestor import StatusIngestor
+
+
+def text_message(message_id, sender, text):
+    return {"id": message_id, "from": sender, "type": "text", "text": {"body": text}}
+
+
+# Two entries, one with two changes: the batched shape WhatsApp posts under load
+BATCH = {"entry": [
+    {"changes": [
+        {"value": {"messages": [text_message("m1", "254700000001", "hi"), text_message("m2", "254700000002", "/help")]}},
+        {"value": {"messages": [text_message("m3", "254700000001", "flooding here")]}},
+    ]},
+    {"changes": [{"value": {"messages": [text_message("m4", "254700000003", "/start")]}}]},
+]}
+
+
+class JSONRequest:
+    """The part of a FastAPI request the webhook reads"""
+
+    def __init__(self, body):
+        self.body = body
+
+    async def json(self):
+        return self.body
+
+
+@pytest.fixture
+def bot_db(monkeypatch, tmp_path):
+    """Bot messages in a throwaway SQLite database, without Redis"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'bot.db'}")
+    BotMessage.__table__.create(engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(update_dedup_module, "get_redis", lambda: None)
+    return engine
+
+
+@pytest.mark.unit
+class TestWhatsAppBatch:
+    """Unit tests for handling every message of a batched WhatsApp webhook"""
+
+    def test_every_message_handled(self, monkeypatch, bot_db):
+        """Test all messages are answered, in order per chat, and logged"""
+        sent = []
+        monkeypatch.setattr(update_processor_module.UpdateProcessor, "_respond",
+                            staticmethod(lambda handler, platform, data: f"re: {data['text']}"))
+        monkeypatch.setattr(whatsapp, "send_message", lambda to, message: sent.append((to, message)))
+
+        UpdateProcessor.process_whatsapp_messages(whatsapp.webhook_messages(BATCH))
+
+        assert len(sent) == 4
+        assert [message for to, message in sent if to == "254700000001"] == ["re: hi", "re: flooding here"]
+
+        session = database.SessionLocal()
+        try:
+            assert session.query(BotMessage).count() == 4
+        finally:
+            session.close()
+
+    def test_grouped_by_chat(self):
+        """Test messages are split per sender for the per-chat update queue"""
+        chats = whatsapp_chats(whatsapp.webhook_messages(BATCH))
+
+        assert [message["id"] for message in chats["whatsapp:254700000001"]] == ["m1", "m3"]
+        assert len(chats) == 3
+
+    def test_statuses_and_messages_in_one_payload(self, monkeypatch):
+        """Test status callbacks are buffered and the messages of the same POST still handled"""
+        ingestor = StatusIngestor(max_buffer=100)
+        handled = []
+        monkeypatch.setattr(webhooks_module, "status_ingestor", ingestor)
+        monkeypatch.setattr(webhooks_module.settings, "BOT_WEBHOOK_FAST_ACK", False)
+        monkeypatch.setattr(UpdateProcessor, "process_whatsapp_messages", staticmethod(handled.extend))
+
+        mixed = {"entry": [{"changes": [
+            {"value": {"statuses": [{"id": "wamid.9", "status": "delivered", "timestamp": "1700000000"}]}},
+            *BATCH["entry"][0]["changes"],
+        ]}]}
+        asyncio.run(webhooks_module.whatsapp_webhook(JSONRequest(mixed)))
+
+        assert ingestor.pending() == 1
+        assert [message["id"] for message in handled] == ["m1", "m2", "m3"]
+
+    def test_claims_released_when_batch_fails(self, monkeypatch, bot_db):
+        """Test a batch failing before its messages are handled leaves them to be redelivered"""
+        released = []
+        monkeypatch.setattr(update_processor_module.update_dedup, "release",
+                            lambda platform, message_id: released.append(message_id))
+
+        def failed_download(message):
+            raise RuntimeError("media download failed")
+        monkeypatch.setattr(whatsapp, "parse_message", failed_download)
+
+        with pytest.raises(RuntimeError):
+            UpdateProcessor.process_whatsapp_messages(whatsapp.webhook_messages(BATCH))
+
+        assert sorted(released) == ["m1", "m2", "m3", "m4"]